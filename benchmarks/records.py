@@ -0,0 +1,56 @@
+"""records.py
+Time the conversion of actuators to and from their compact binary form
+(`Actuator.to_bytes` and `Actuator.from_bytes`) against pickle.
+
+$ python benchmarks/records.py 200
+"""
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import modact.problems as pb
+from modact.actuator import Actuator
+from modact.catalogue import load_catalogue
+from modact.models import GearPair
+
+
+def per_design(func, items, repeat=5):
+    """Best time of `func` per item in µs"""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best/len(items)*1e6
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    problem = pb.get_problem('cts3')
+    lb, ub = problem.bounds()
+    X = lb + np.random.default_rng(0).random((n, len(lb)))*(ub - lb)
+    actuators = [problem.quantities(x)['actuator'] for x in X]
+    data = [a.to_bytes() for a in actuators]
+    pickles = [pickle.dumps(a) for a in actuators]
+
+    print("cts3, {} designs (3 stages)".format(n))
+    print("| operation | µs/design | bytes |")
+    print("|---|---|---|")
+    print("| to_bytes | {:.1f} | {} |".format(
+        per_design(Actuator.to_bytes, actuators), len(data[0])))
+    print("| from_bytes | {:.1f} | |".format(
+        per_design(Actuator.from_bytes, data)))
+    with tempfile.TemporaryDirectory() as tmp:
+        GearPair.catalogue = load_catalogue(tmp + '/catalogue.npy')
+        print("| from_bytes (catalogue) | {:.1f} | |".format(
+            per_design(Actuator.from_bytes, data)))
+        GearPair.catalogue = None
+    print("| pickle.dumps | {:.1f} | {:.0f} |".format(
+        per_design(pickle.dumps, actuators),
+        np.mean([len(p) for p in pickles])))
+    print("| pickle.loads | {:.1f} | |".format(
+        per_design(pickle.loads, pickles)))
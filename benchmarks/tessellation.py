@@ -0,0 +1,68 @@
+"""tessellation.py
+Accuracy and cost of the convex hull of the actuators with fixed and
+adaptive numbers of sections of the cylinders.
+
+$ python benchmarks/tessellation.py 200
+"""
+import sys
+import time
+
+import numpy as np
+
+import modact.problems as pb
+from modact.actuator import SECTIONS
+from modact.meshutils import Tessellation, chordal_error, hull_area_error_bound
+
+SETTINGS = [
+    ('8', 8),
+    ('16', 16),
+    ('32', 32),
+    ('tol 0.5', Tessellation(0.5)),
+    ('tol 0.2', Tessellation(0.2)),
+    ('tol 0.1', Tessellation(0.1)),
+    ('tol 0.05', Tessellation(0.05)),
+    ('tol 0.02', Tessellation(0.02)),
+]
+
+
+def hulls(X, sections, problem, repeat=3):
+    """Hull areas, face counts, chordal errors, diameters and time of the
+    mesh and hull of the designs `X`"""
+    SECTIONS['low'] = sections
+    elapsed = np.inf
+    for _ in range(repeat):
+        actuators = [problem.quantities(x)['actuator'] for x in X]
+        start = time.perf_counter()
+        areas = np.array([a.mesh[2].convex_hull.area for a in actuators])
+        elapsed = min(elapsed, time.perf_counter() - start)
+    faces = np.array([len(a.mesh[2].faces) for a in actuators])
+    errors = np.array([max(chordal_error(m.primitive.radius,
+                                         m.primitive.sections)
+                           for m in a.mesh[0]) for a in actuators])
+    diameters = np.array([np.linalg.norm(a.mesh[2].bounding_box.extents)
+                          for a in actuators])
+    return areas, faces, errors, diameters, elapsed
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    problem = pb.get_problem('cs1@low')
+    lb, ub = problem.bounds()
+    X = lb + np.random.default_rng(0).random((n, len(lb)))*(ub - lb)
+    default = SECTIONS['low']
+    try:
+        reference = hulls(X, 512, problem)[0]
+        print("cs1@low, {} designs, reference: 512 sections".format(n))
+        print("| sections | faces | mesh + hull (ms) | mean error (%) "
+              "| max error (%) | max error/bound |")
+        print("|---|---|---|---|---|---|")
+        for name, sections in SETTINGS:
+            areas, faces, errors, diameters, elapsed = hulls(X, sections,
+                                                             problem)
+            error = (reference - areas)/reference
+            bound = hull_area_error_bound(errors, diameters)
+            print("| {} | {:.0f} | {:.2f} | {:.3f} | {:.3f} | {:.2f} |".format(
+                name, faces.mean(), 1e3*elapsed/n, 100*error.mean(),
+                100*error.max(), ((reference - areas)/bound).max()))
+    finally:
+        SECTIONS['low'] = default
@@ -17,6 +17,7 @@ struct SharedPython
 {
     py::scoped_interpreter guard{};
     py::module pb = py::module::import("modact.problems");
+    py::module surrogate = py::module::import("modact.surrogate");
 } sp;
 
 py::object get_problem(const string name)
@@ -24,6 +25,15 @@ py::object get_problem(const string name)
     return sp.pb.attr("get_problem")(name);
 }
 
+py::object get_surrogate_problem(const string name)
+{
+    return sp.surrogate.attr("get_surrogate_problem")(name);
+}
+
+// Release the GIL held by the main thread, e.g. around a parallel section
+// calling problem::operator() from several threads.
+using evaluation_scope = py::gil_scoped_release;
+
 class problem
 {
 protected:
@@ -59,6 +69,9 @@ pair<vector<double>, vector<double> > problem::operator()(const vector<double>&
 {
     double fit_multiplier = minimize ? -1 : 1;
     double const_multiplier = bigger_0 ? -1 : 1;
+    // Reentrant: can be called from several threads as long as the thread
+    // owning the interpreter released the GIL (see evaluation_scope)
+    py::gil_scoped_acquire acquire;
     py::tuple result = pyprob(x);
     auto fitness = result[0].cast<py::tuple>();
     auto constraints = result[1].cast<py::tuple>();
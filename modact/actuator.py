@@ -1,20 +1,135 @@
 import typing
+from collections import namedtuple
 from operator import attrgetter
 
 import attr
 import numpy as np
-import trimesh
-from cached_property import cached_property
 from trimesh.transformations import translation_matrix
 
-from .meshutils import merge_meshes
+from .codec import STAGE_DTYPE, design_dtype
+from .collisions import collision_context
+from .meshutils import cylinder_sections, merge_meshes
 from .materials import get_material
-from .models import Model, OperatingCondition, GearPair
+from .models import (Model, OperatingCondition, GearPair, Stepper,
+                     cached_property, get_stepper, make_gearpair)
+from .models.gears import security_per_unit_torque
+from .models.motors import motors
+
+# Number of sections of the cylinders of the mesh for each fidelity level.
+# At low fidelity, collisions and bounding box are computed analytically from
+# the cylinder primitives and only the convex hull relies on the coarse mesh.
+# A level can use a modact.meshutils.Tessellation instead of a fixed number,
+# to adapt the number of sections to the radius of the cylinders.
+SECTIONS = {
+    'full': 32,
+    'low': 8
+}
+
+FIDELITIES = tuple(SECTIONS.keys())
+
+# Torque used instead of a null motor torque, for numerical reasons
+MIN_TORQUE = 1.e-6
+
+Propagation = namedtuple('Propagation', ['speed', 'torque', 'current',
+                                         'dead', 'over_current'])
+
+
+def propagate_torque(speed, torque, current, imax, ratios):
+    """Propagate the output of motors through lossless gear stages.
+
+    `speed`, `torque` and `current` are the outputs of the motors, of shape
+    (..., n_conditions), `imax` the current limit of the conditions and
+    `ratios` the ratios of the gear stages, of shape (..., n_stages). The
+    gear stages only divide the speed and multiply the torque by their
+    ratio.
+
+    out : Propagation with `speed` and `torque` of shape
+          (..., n_stages + 1, n_conditions) at the input of each stage and
+          at the output, `current` and the flags `dead` (no motor torque)
+          and `over_current` (current limited) of shape (..., n_conditions)
+    """
+    ratios = np.asarray(ratios, dtype=float)
+    torque = np.asarray(torque, dtype=float)
+    dead = torque <= 0
+    over_current = np.asarray(current) > imax
+    shape = np.broadcast_shapes(ratios.shape[:-1] + (1,), torque.shape)
+    n = ratios.shape[-1]
+    speeds = np.empty(shape[:-1] + (n + 1, shape[-1]))
+    torques = np.empty_like(speeds)
+    speeds[..., 0, :] = speed
+    torques[..., 0, :] = np.where(dead, MIN_TORQUE, torque)
+    for k in range(n):
+        i = ratios[..., k, None]
+        speeds[..., k+1, :] = speeds[..., k, :]/i
+        torques[..., k+1, :] = torques[..., k, :]*i
+    return Propagation(speeds, torques, current, dead, over_current)
 
 
 @attr.s(auto_attribs=True)
 class Actuator(object):
     components: typing.List[Model] = attr.Factory(list)
+    fidelity: str = 'full'
+
+    @property
+    def sections(self):
+        return SECTIONS[self.fidelity]
+
+    @property
+    def is_gear_train(self):
+        """True if the actuator is a stepper followed by gear pairs"""
+        return (bool(self.components) and
+                isinstance(self.components[0], Stepper) and
+                all(isinstance(comp, GearPair)
+                    for comp in self.components[1:]))
+
+    def to_record(self):
+        """Compact form of the design: a record of
+        :func:`~modact.codec.design_dtype` with the motor id, the coil
+        parameters and the parameters of each gear stage.
+
+        Only actuators made of a stepper followed by gear pairs can be
+        converted. A missing angle is stored as NaN. The materials of the
+        gears and the properties of the motor are not stored:
+        :meth:`from_record` uses the steel of the gears and the motor of the
+        registry, use pickle for other actuators."""
+        motor, gears = self.components[0], self.components[1:]
+        if not self.is_gear_train:
+            raise ValueError("Only a stepper followed by gear pairs can be "
+                             "converted to a record")
+        record = np.zeros((), dtype=design_dtype(len(gears)))
+        record['motor'] = motors.index(motor.name)
+        record['fill_factor'] = motor.fill_factor
+        record['r_scale'] = motor.r_scale
+        stages = record['stages']
+        for k, gp in enumerate(gears):
+            p, g = gp.gears
+            angle = np.nan if gp.angle is None else gp.angle
+            stages[k] = (p.Z, p.x, g.Z, g.x, p.m, p.b/p.m, gp.disp, angle)
+        return record
+
+    @classmethod
+    def from_record(cls, record, fidelity='full'):
+        """Rebuild an actuator from :meth:`to_record`"""
+        components = [get_stepper(int(record['motor']),
+                                  float(record['fill_factor']),
+                                  float(record['r_scale']))]
+        for s in record['stages'].tolist():
+            Z1, x1, Z2, x2, m, b, disp, angle = s
+            components.append(make_gearpair(
+                float(Z1), x1, float(Z2), x2, m, b, disp,
+                None if angle != angle else angle))
+        return cls(components=components, fidelity=fidelity)
+
+    def to_bytes(self):
+        """Binary form of :meth:`to_record`"""
+        return self.to_record().tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, fidelity='full'):
+        n_stages = ((len(data) - design_dtype(0).itemsize) //
+                    STAGE_DTYPE.itemsize)
+        record = np.frombuffer(data, dtype=design_dtype(n_stages))[0]
+        return cls.from_record(record, fidelity)
 
     @cached_property
     def mesh(self):
@@ -30,7 +145,7 @@ class Actuator(object):
             last_position.dot(translation_matrix([0., 0., sign*last_height/2]),
                               out=last_position)
             last_height = comp.height
-            mesh = comp.mesh(last_position, groups)
+            mesh = comp.mesh(last_position, groups, sections=self.sections)
             components.extend(mesh)
 
         space = merge_meshes(components)
@@ -64,7 +179,29 @@ class Actuator(object):
             for cond in conditions]
         return in_conditions
 
+    def propagate(self, in_conditions):
+        """Output of the motor for `in_conditions` propagated through the
+        gear pairs in closed form, see :func:`propagate_torque`.
+
+        The actuator must be a motor followed by gear pairs.
+        `in_conditions` is a list of conditions or a condition of arrays, for
+        which the motor is evaluated on all the conditions at once."""
+        motor, gears = self.components[0], self.components[1:]
+        ratios = [gear.i for gear in gears]
+        if isinstance(in_conditions, OperatingCondition):
+            out = motor.get_speed_torque(in_conditions)
+            return propagate_torque(out.speed, out.torque, out.imax,
+                                    in_conditions.imax, ratios)
+        out = [motor.get_speed_torque(cond) for cond in in_conditions]
+        return propagate_torque([op.speed for op in out],
+                                [op.torque for op in out],
+                                [op.imax for op in out],
+                                [cond.imax for cond in in_conditions],
+                                ratios)
+
     def get_speed_torque(self, in_conditions, target=False):
+        if not target and self.is_gear_train:
+            return self._propagated_speed_torque(in_conditions)
         op_per_comp = [[] for _ in range(len(self.components))]
         out_conditions = []
 
@@ -79,7 +216,7 @@ class Actuator(object):
                 if next_op.torque <= 0:
                     # No torque available
                     # Use small amount for numerical reasons
-                    next_op.torque = 1.e-6
+                    next_op.torque = MIN_TORQUE
 
             if target and next_op.torque > target[i].torque:
                 # Output torque is higher than required torque
@@ -95,25 +232,69 @@ class Actuator(object):
 
         return out_conditions, op_per_comp
 
+    def _propagated_speed_torque(self, in_conditions):
+        """Fast path of :meth:`get_speed_torque` for a motor followed by
+        gear pairs: the gear pairs only scale the output of the motor"""
+        motor, gears = self.components[0], self.components[1:]
+        op_per_comp = [[] for _ in range(len(self.components))]
+        out_conditions = []
+        for cond in in_conditions:
+            op_per_comp[0].append(cond)
+            op = motor.get_speed_torque(cond)
+            speed = op.speed
+            torque = op.torque if op.torque > 0 else MIN_TORQUE
+            for j, gear in enumerate(gears, 1):
+                op_per_comp[j].append(
+                    OperatingCondition(speed, torque, cond.V, op.imax))
+                speed = speed/gear.i
+                torque = torque*gear.i
+            out_conditions.append(
+                OperatingCondition(speed, torque, cond.V, op.imax))
+        return out_conditions, op_per_comp
+
     def gear_constraints(self, op_per_comp):
+        kinematic = self.gear_kinematics()
+        if kinematic.size == 0:
+            return kinematic, np.zeros((0, 0, 0))
+        return kinematic, self.gear_resistance(op_per_comp)
+
+    def gear_kinematics(self):
+        """Kinematic indicators of the gear pairs, which do not depend on the
+        operating conditions"""
+        gears = [comp for comp in self.components
+                 if isinstance(comp, GearPair)]
+        if not gears:
+            return np.zeros((0, 0))
+        kinematic = np.zeros((len(gears), 4))
+        for i, comp in enumerate(gears):
+            kinematic[i, :] = (comp.interference, comp.contact_ratio,
+                               *comp.specific_speed)
+        return kinematic
+
+    def gear_resistance(self, op_per_comp, unit=None):
+        """Safety factors of the gear pairs for each operating condition.
+
+        The safety factors are computed once per gear pair for a unit torque
+        with the array kernels (or given as `unit`) and scaled to the torque
+        of each condition. The conditions of a component are either a list
+        or a single condition of arrays (duty cycles).
+        """
         gear_idx = [i for i, comp in enumerate(self.components)
                     if isinstance(comp, GearPair)]
         if not gear_idx:
-            return np.zeros((0, 0)), np.zeros((0, 0, 0))
-        n_gears = len(gear_idx)
-        n_conditions = len(op_per_comp[gear_idx[0]])
-        kinematic = np.zeros((n_gears, 4))
-        resistance = np.zeros((n_gears, n_conditions, 4))
-        for i, idx in enumerate(gear_idx):
-            comp = self.components[idx]
-            conditions = op_per_comp[idx]
-            kinematic[i, :] = (comp.interference, comp.contact_ratio,
-                               *comp.specific_speed)
-            for j, cond in enumerate(conditions):
-                resistance[i, j, :] = (*comp.security_h(cond),
-                                       *comp.security_f(cond))
-        
-        return kinematic, resistance
+            return np.zeros((0, 0, 0))
+        if unit is None:
+            unit = security_per_unit_torque([self.components[i]
+                                             for i in gear_idx])
+        torque = np.array([
+            op_per_comp[i].torque
+            if isinstance(op_per_comp[i], OperatingCondition) else
+            [cond.torque for cond in op_per_comp[i]]
+            for i in gear_idx], dtype=float)
+        # Flank stresses scale with sqrt(torque), root stresses with torque
+        scale = np.stack([torque**-0.5, torque**-0.5,
+                          1/torque, 1/torque], axis=-1)
+        return unit[:, None, :]*scale
 
     def cost(self, with_hull=False):
         comp_cost = list(map(attrgetter("cost"), self.components))
@@ -126,10 +307,44 @@ class Actuator(object):
             comp_cost.append(cost_hull)
         return comp_cost
 
+    def cylinders(self):
+        """Return centers, radii and heights of the cylinders of the mesh.
+
+        All cylinders are aligned with the z axis."""
+        meshes, _, _ = self.mesh
+        centers = np.array([m.primitive.transform[:3, 3] for m in meshes])
+        radius = np.array([m.primitive.radius for m in meshes])
+        height = np.array([m.primitive.height for m in meshes])
+        return centers, radius, height
+
+    def extents(self):
+        """Extents of the axis aligned bounding box"""
+        if self.fidelity == 'full':
+            _, _, space = self.mesh
+            return space.bounding_box.extents
+        centers, radius, height = self.cylinders()
+        half = np.column_stack([radius, radius, height/2])
+        return (centers + half).max(axis=0) - (centers - half).min(axis=0)
+
     def internal_collisions(self):
-        cm = trimesh.collision.CollisionManager()
+        if self.fidelity != 'full':
+            return self.analytic_collisions()
         meshes, _, space = self.mesh
-        for i, m in enumerate(meshes):
-            cm.add_object(i, m)
-        _, names = cm.in_collision_internal(return_names=True)
-        return len(names)/len(space.faces)
+        pairs = collision_context().colliding_pairs(meshes)
+        return len(pairs)/len(space.faces)
+
+    def analytic_collisions(self, tol=1e-6):
+        """Count the pairs of intersecting cylinders analytically.
+
+        The count is normalized by the number of faces of the full fidelity
+        mesh to match :meth:`internal_collisions`."""
+        centers, radius, height = self.cylinders()
+        i, j = np.triu_indices(len(radius), 1)
+        d_xy = np.hypot(centers[i, 0] - centers[j, 0],
+                        centers[i, 1] - centers[j, 1])
+        d_z = np.abs(centers[i, 2] - centers[j, 2])
+        hits = ((d_xy < radius[i] + radius[j] - tol) &
+                (d_z < (height[i] + height[j])/2 - tol))
+        n_faces = 4*sum(cylinder_sections(SECTIONS['full'], r)
+                        for r in radius)
+        return np.count_nonzero(hits)/n_faces
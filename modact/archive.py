@@ -0,0 +1,238 @@
+"""Append-only archive of evaluations stored in a memory-mapped file.
+
+The file starts with a fixed-size header describing the problem followed by
+fixed-width records::
+
+    x (n_var), F (n_obj), G (n_constr), time, feasible
+
+Objectives and constraints are stored in the minimization convention used by
+pymoo (`F` minimized, `G <= 0` feasible), such that the views returned by
+the archive can be used directly. Appends are atomic and can be made
+concurrently by several processes on the same file.
+
+An archive opened before its creator wrote the header (the file is still
+empty) is empty until the header is written.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from .pareto import non_dominated_mask
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+MAGIC = b'MODACTEA'
+VERSION = 1
+HEADER_SIZE = 4096
+
+
+def record_dtype(n_var, n_obj, n_constr):
+    return np.dtype([('x', 'f8', (n_var,)),
+                     ('F', 'f8', (n_obj,)),
+                     ('G', 'f8', (n_constr,)),
+                     ('time', 'f8'),
+                     ('feasible', '?')])
+
+
+def _lock(fd, exclusive=True):
+    """Lock the file `fd` until it is closed. Without `fcntl` (Windows),
+    the file is not locked and only the appends are atomic"""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+class EvaluationArchive(object):
+    """Evaluation archive stored at `path`.
+
+    An existing archive is opened with `EvaluationArchive(path)`. A new one is
+    created by giving the dimensions of the problem (see also
+    :meth:`for_problem`).
+    """
+
+    def __init__(self, path, n_var=None, n_obj=None, n_constr=None, name=''):
+        self.path = os.fspath(path)
+        if n_var is not None:
+            self._write_header(n_var, n_obj, n_constr, name)
+        elif not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)
+        self._read_header()
+        if n_var is not None and (n_var, n_obj, n_constr) != (
+                self.n_var, self.n_obj, self.n_constr):
+            raise ValueError("Archive {} has different dimensions".format(
+                self.path))
+
+    @classmethod
+    def for_problem(cls, path, problem):
+        lb, _ = problem.bounds()
+        return cls(path, len(lb), len(problem.weights),
+                   len(problem.c_weights), problem.name)
+
+    def _write_header(self, n_var, n_obj, n_constr, name):
+        meta = json.dumps({'name': name, 'n_var': n_var, 'n_obj': n_obj,
+                           'n_constr': n_constr})
+        meta = meta.encode()
+        header = MAGIC + np.array([VERSION, len(meta)], '<u4').tobytes() + meta
+        if len(header) > HEADER_SIZE:
+            raise ValueError("Header is too long")
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            _lock(fd)
+            # The archive may already exist or have been created by another
+            # process in the meantime
+            if os.fstat(fd).st_size == 0:
+                os.write(fd, header.ljust(HEADER_SIZE, b'\0'))
+        finally:
+            os.close(fd)
+
+    def _read_header(self):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            # Wait for a header being written
+            _lock(fd, exclusive=False)
+            header = os.read(fd, HEADER_SIZE)
+        finally:
+            os.close(fd)
+        if not header:
+            # Not written yet
+            self.name = ''
+            self.n_var = self.n_obj = self.n_constr = None
+            self.dtype = record_dtype(0, 0, 0)
+            return
+        if header[:8] != MAGIC:
+            raise ValueError("{} is not an evaluation archive".format(
+                self.path))
+        version, length = np.frombuffer(header[8:16], '<u4')
+        if version != VERSION:
+            raise ValueError("Unsupported archive version {}".format(version))
+        meta = json.loads(header[16:16+length].decode())
+        self.name = meta['name']
+        self.n_var = meta['n_var']
+        self.n_obj = meta['n_obj']
+        self.n_constr = meta['n_constr']
+        self.dtype = record_dtype(self.n_var, self.n_obj, self.n_constr)
+
+    def __len__(self):
+        if self.n_var is None:
+            self._read_header()
+        size = os.path.getsize(self.path) - HEADER_SIZE
+        return max(size, 0) // self.dtype.itemsize
+
+    def append(self, X, F, G, timestamp=None):
+        """Append evaluations given in the minimization convention"""
+        if self.n_var is None:
+            self._read_header()
+            if self.n_var is None:
+                raise ValueError("Archive {} has no header".format(self.path))
+        X = np.atleast_2d(X)
+        records = np.zeros(len(X), dtype=self.dtype)
+        records['x'] = X
+        records['F'] = np.reshape(F, (len(X), self.n_obj))
+        records['G'] = np.reshape(G, (len(X), self.n_constr))
+        records['time'] = time.time() if timestamp is None else timestamp
+        records['feasible'] = np.all(records['G'] <= 0, axis=1)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        try:
+            _lock(fd)
+            os.write(fd, records.tobytes())
+        finally:
+            os.close(fd)
+        return len(records)
+
+    def append_problem_output(self, problem, x, f, g, timestamp=None):
+        """Append the output `(f, g)` of `problem`, converted using the
+        weights of the problem"""
+        F = -np.asarray(f, dtype=float) * problem.weights
+        G = np.asarray(g, dtype=float) * problem.c_weights
+        return self.append(x, F, G, timestamp)
+
+    def records(self, start=None, stop=None):
+        """Read-only memory-mapped view of the records"""
+        n = len(self)
+        if n == 0:
+            return np.zeros(0, dtype=self.dtype)
+        mm = np.memmap(self.path, dtype=self.dtype, mode='r',
+                       offset=HEADER_SIZE, shape=(n,))
+        return mm[start:stop]
+
+    def __getitem__(self, item):
+        return self.records()[item]
+
+    @property
+    def X(self):
+        return self.records()['x']
+
+    @property
+    def F(self):
+        return self.records()['F']
+
+    @property
+    def G(self):
+        return self.records()['G']
+
+    @property
+    def feasible(self):
+        return self.records()['feasible']
+
+    def arrays(self, start=None, stop=None):
+        """Return views of `X`, `F` and `G` usable by pymoo"""
+        rec = self.records(start, stop)
+        return rec['x'], rec['F'], rec['G']
+
+    def iter_chunks(self, chunk_size=100000):
+        """Iterate over the records by chunks of `chunk_size`"""
+        rec = self.records()
+        for start in range(0, len(rec), chunk_size):
+            yield start, rec[start:start+chunk_size]
+
+    def query(self, feasible=None, t_min=None, t_max=None,
+              chunk_size=100000):
+        """Indices of the records matching all the given criteria"""
+        indices = []
+        for start, chunk in self.iter_chunks(chunk_size):
+            mask = np.ones(len(chunk), dtype=bool)
+            if feasible is not None:
+                mask &= chunk['feasible'] == feasible
+            if t_min is not None:
+                mask &= chunk['time'] >= t_min
+            if t_max is not None:
+                mask &= chunk['time'] <= t_max
+            indices.append(np.flatnonzero(mask) + start)
+        return np.concatenate(indices) if indices else np.zeros(0, int)
+
+    def non_dominated(self, chunk_size=100000):
+        """Indices of the non-dominated records.
+
+        Only feasible records are considered if there are any, otherwise the
+        records with the smallest constraint violation are returned. Records
+        are processed by chunks, so that only the current front and a chunk
+        are held in memory."""
+        front = np.zeros(0, dtype=int)
+        front_F = np.zeros((0, self.n_obj or 0))
+        best_cv = np.inf
+        any_feasible = False
+        for start, chunk in self.iter_chunks(chunk_size):
+            feasible = chunk['feasible']
+            if feasible.any():
+                if not any_feasible:
+                    front = np.zeros(0, dtype=int)
+                    front_F = np.zeros((0, self.n_obj))
+                    any_feasible = True
+                idx = np.flatnonzero(feasible)
+                F = np.concatenate([front_F, chunk['F'][idx]])
+                front = np.concatenate([front, idx + start])
+                mask = non_dominated_mask(F)
+                front, front_F = front[mask], F[mask]
+            elif not any_feasible:
+                cv = np.maximum(chunk['G'], 0).sum(axis=1)
+                cv_min = cv.min()
+                idx = np.flatnonzero(cv == cv_min) + start
+                if cv_min < best_cv:
+                    front, best_cv = idx, cv_min
+                elif cv_min == best_cv:
+                    front = np.concatenate([front, idx])
+        return front
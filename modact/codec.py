@@ -0,0 +1,158 @@
+"""Vectorized conversion between design vectors and structured designs.
+
+The design vector `x` of the problems packs discrete and continuous
+variables::
+
+    x[0]            motor id + (fill factor - 0.3)/0.9
+    x[1]            resistance scaling of the coil
+    x[2+6*k]        Z1 + (x1 + 0.1)/0.7       (pinion teeth + profile shift)
+    x[3+6*k]        Z2 + (x2 + 0.6)/1.2       (gear teeth + profile shift)
+    x[4+6*k:8+6*k]  m, b, disp, angle
+
+for each stage `k`. :class:`Codec` decodes and encodes whole populations
+between this representation and a structured array (see :func:`design_dtype`),
+repairs populations and computes canonical hashes to detect duplicates.
+"""
+import numpy as np
+
+from .models.motors import motor_names
+
+STAGE_DTYPE = np.dtype([('Z1', 'i4'), ('x1', 'f8'),
+                        ('Z2', 'i4'), ('x2', 'f8'),
+                        ('m', 'f8'), ('b', 'f8'),
+                        ('disp', 'f8'), ('angle', 'f8')])
+
+# Scaling of the fractional parts: value = offset + fraction*scale
+FF_SCALE = (0.3, 0.9)
+X1_SCALE = (-0.1, 0.7)
+X2_SCALE = (-0.6, 1.2)
+
+
+def design_dtype(n_stages):
+    """Structured dtype of a design with `n_stages` gear stages"""
+    return np.dtype([('motor', 'i4'), ('fill_factor', 'f8'),
+                     ('r_scale', 'f8'),
+                     ('stages', STAGE_DTYPE, (n_stages,))])
+
+
+def _split(values, scale):
+    integer = np.floor(values)
+    return integer.astype('i4'), scale[0] + (values - integer)*scale[1]
+
+
+def _join(integer, value, scale):
+    return integer + (value - scale[0])/scale[1]
+
+
+def _mix(h, values):
+    """Combine 64-bit hashes `h` with the 64-bit words `values`"""
+    h ^= values
+    h *= np.uint64(0x100000001b3)
+    h ^= h >> np.uint64(29)
+    return h
+
+
+class Codec(object):
+    """Vectorized codec for designs with `n_stages` gear stages"""
+
+    def __init__(self, n_stages, bounds=None):
+        self.n_stages = n_stages
+        self.dtype = design_dtype(n_stages)
+        self.n_var = 2 + 6*n_stages
+        self.bounds = bounds
+
+    @classmethod
+    def for_problem(cls, problem):
+        return cls(problem.n_stages, problem.bounds())
+
+    def decode(self, X):
+        """Decode the rows of `X` into a structured array"""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] != self.n_var:
+            raise ValueError("Expected {} variables, got {}".format(
+                self.n_var, X.shape[1]))
+        designs = np.zeros(len(X), dtype=self.dtype)
+        designs['motor'], designs['fill_factor'] = _split(X[:, 0], FF_SCALE)
+        designs['r_scale'] = X[:, 1]
+        stages = designs['stages']
+        S = X[:, 2:].reshape(len(X), self.n_stages, 6)
+        stages['Z1'], stages['x1'] = _split(S[:, :, 0], X1_SCALE)
+        stages['Z2'], stages['x2'] = _split(S[:, :, 1], X2_SCALE)
+        for i, field in enumerate(('m', 'b', 'disp', 'angle'), 2):
+            stages[field] = S[:, :, i]
+        return designs
+
+    def encode(self, designs):
+        """Encode a structured array of designs into design vectors"""
+        designs = np.atleast_1d(designs)
+        X = np.zeros((len(designs), self.n_var))
+        X[:, 0] = _join(designs['motor'], designs['fill_factor'], FF_SCALE)
+        X[:, 1] = designs['r_scale']
+        stages = designs['stages']
+        S = X[:, 2:].reshape(len(X), self.n_stages, 6)
+        S[:, :, 0] = _join(stages['Z1'], stages['x1'], X1_SCALE)
+        S[:, :, 1] = _join(stages['Z2'], stages['x2'], X2_SCALE)
+        for i, field in enumerate(('m', 'b', 'disp', 'angle'), 2):
+            S[:, :, i] = stages[field]
+        return X
+
+    def integer_columns(self):
+        """Columns of `x` packing an integer and a fraction"""
+        return np.array([0] + [2 + 6*k + j for k in range(self.n_stages)
+                               for j in (0, 1)])
+
+    def repair(self, X, resolution=None):
+        """Bring the rows of `X` back in bounds.
+
+        Non finite values are replaced by the lower bound. If `resolution`
+        is given, the fractional parts of the packed variables (fill factor
+        and profile shifts) are snapped to a grid of that step.
+        """
+        X = np.array(X, dtype=float, ndmin=2)
+        if self.bounds is None:
+            lb = np.zeros(self.n_var)
+            lb[1] = -np.inf
+            ub = np.full(self.n_var, np.inf)
+            ub[0] = len(motor_names) - 1e-6
+        else:
+            lb, ub = self.bounds
+        X = np.where(np.isfinite(X), X, lb)
+        X = np.clip(X, lb, ub)
+        if resolution is not None:
+            cols = self.integer_columns()
+            integer = np.floor(X[:, cols])
+            frac = np.round((X[:, cols] - integer)/resolution)*resolution
+            frac = np.minimum(frac, 1 - resolution)
+            X[:, cols] = np.clip(integer + frac, lb[cols], ub[cols])
+        return X
+
+    def hash(self, X, decimals=9):
+        """Canonical 64-bit hash of each design.
+
+        Designs decoding to the same actuator (up to `decimals` digits) get
+        the same hash. Angles are taken modulo 2*pi."""
+        designs = self.decode(X)
+        stages = designs['stages']
+        angle = np.mod(stages['angle'], 2*np.pi)
+        angle[np.isclose(angle, 2*np.pi, rtol=0, atol=10.**-decimals)] = 0
+        columns = [designs['motor'][:, None].astype(float),
+                   designs['fill_factor'][:, None],
+                   designs['r_scale'][:, None],
+                   stages['Z1'].astype(float), stages['x1'],
+                   stages['Z2'].astype(float), stages['x2'],
+                   stages['m'], stages['b'], stages['disp'], angle]
+        values = np.round(np.hstack(columns), decimals) + 0.
+        words = np.ascontiguousarray(values).view(np.uint64)
+        h = np.full(len(values), 0xcbf29ce484222325, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for k in range(words.shape[1]):
+                h = _mix(h, words[:, k])
+        return h
+
+    def unique(self, X, decimals=9):
+        """Mask of the first occurrence of each distinct design"""
+        h = self.hash(X, decimals)
+        _, first = np.unique(h, return_index=True)
+        mask = np.zeros(len(h), dtype=bool)
+        mask[first] = True
+        return mask
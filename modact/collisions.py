@@ -0,0 +1,106 @@
+"""Internal collisions of the cylinders of an actuator with reused FCL objects.
+
+`trimesh.collision.CollisionManager` checks the convexity of each mesh and
+builds a new FCL geometry and collision object from its vertices for every
+design. :class:`CollisionContext` builds the FCL geometries directly from
+the cylinder primitives (radius, height and sections) and keeps one
+collision object per position in the list of cylinders of an actuator. A
+geometry is only rebuilt when the shape of the cylinder at its position
+changes, the others (e.g. the motor, or the first stages of designs which
+only differ by their last stages) only get a new transform. The broad phase
+manager is reused as well, and each thread (or worker process) has its own
+context (see :func:`collision_context`).
+
+python-fcl cannot resize a geometry in place, so designs whose gears all
+differ, as in a random population, rebuild all the geometries of their
+gears; the gain is then the construction without trimesh.
+"""
+import functools
+import threading
+
+import fcl
+import numpy as np
+from trimesh.creation import cylinder
+
+
+def _collide(o1, o2, data):
+    # Unlike fcl.defaultCollisionCallback, do not stop at the first contact
+    fcl.collide(o1, o2, data.request, data.result)
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def _unit_cylinder(sections):
+    """Vertices and FCL faces of the cylinder of unit radius and height.
+
+    The vertices of `trimesh.creation.cylinder` are exactly these ones
+    scaled by the radius and the height."""
+    mesh = cylinder(radius=1., height=1., sections=sections)
+    faces = np.column_stack((np.full(len(mesh.faces), 3), mesh.faces))
+    return mesh.vertices, faces.ravel()
+
+
+class CollisionContext(object):
+    """Collision objects of the cylinder primitives of the actuators, kept
+    per position in the list of cylinders.
+
+    `hits` and `misses` count the geometries reused and rebuilt."""
+
+    def __init__(self):
+        self.manager = fcl.DynamicAABBTreeCollisionManager()
+        self.request = fcl.CollisionRequest(num_max_contacts=1,
+                                            enable_contact=True)
+        self.hits = 0
+        self.misses = 0
+        self._slots = []
+
+    def _object(self, k, primitive):
+        """Geometry and collision object of the `k`-th cylinder, with the
+        shape of `primitive`"""
+        key = (primitive.radius, primitive.height, primitive.sections)
+        if k < len(self._slots) and self._slots[k][0] == key:
+            self.hits += 1
+            return self._slots[k][1:]
+        self.misses += 1
+        vertices, faces = _unit_cylinder(primitive.sections)
+        vertices = vertices*[primitive.radius, primitive.radius,
+                             primitive.height]
+        geometry = fcl.Convex(vertices, len(faces)//4, faces)
+        slot = (key, geometry, fcl.CollisionObject(geometry))
+        if k < len(self._slots):
+            self._slots[k] = slot
+        else:
+            self._slots.append(slot)
+        return slot[1:]
+
+    def colliding_pairs(self, meshes):
+        """Pairs of indices of the cylinders of `meshes` (trimesh
+        primitives) in collision"""
+        index = {}
+        objects = []
+        for k, mesh in enumerate(meshes):
+            primitive = mesh.primitive
+            geometry, obj = self._object(k, primitive)
+            obj.setTransform(fcl.Transform(primitive.transform[:3, :3],
+                                           primitive.transform[:3, 3]))
+            index[id(geometry)] = k
+            objects.append(obj)
+        self.manager.clear()
+        self.manager.registerObjects(objects)
+        self.manager.setup()
+        data = fcl.CollisionData(request=self.request)
+        self.manager.collide(data, _collide)
+        return {tuple(sorted((index[id(c.o1)], index[id(c.o2)])))
+                for c in data.result.contacts}
+
+
+_local = threading.local()
+
+
+def collision_context():
+    """Collision context of the current thread"""
+    try:
+        return _local.context
+    except AttributeError:
+        _local.context = CollisionContext()
+        return _local.context
@@ -0,0 +1,140 @@
+"""Evaluation of designs through the graph of the intermediate quantities.
+
+The objectives and constraints of a problem are computed from intermediate
+quantities (see :mod:`modact.terms`): decoded actuator, motor output
+propagated through the gears (`operating`), kinematics, safety factors
+(`resistance`), mesh, convex hull, collisions, etc. Each quantity is a node
+of a dependency graph and :class:`Evaluator` computes only the nodes
+required by the terms of the problem, once per design, while recording the
+time spent in each node::
+
+    evaluator = Evaluator(get_problem('cs3'), cache_size=1000)
+    F, G = evaluator.evaluate(X)
+    print(evaluator.report())
+
+Populations are evaluated node by node, and the nodes with a batch
+implementation (e.g. the safety factors of all the gear pairs with a single
+call to the array kernels) are computed for all the designs at once.
+"""
+import collections
+import time
+
+import attr
+import numpy as np
+
+from .terms import QUANTITIES, Quantities
+
+
+@attr.s(auto_attribs=True)
+class NodeStats(object):
+    """Number of designs for which a node was computed and total time"""
+    count: int = 0
+    time: float = 0.
+
+    def add(self, count, time):
+        self.count += count
+        self.time += time
+
+    @property
+    def mean(self):
+        return self.time/self.count if self.count else 0.
+
+
+class Evaluator(object):
+    """Evaluate the designs of `problem` through the graph of its
+    intermediate quantities.
+
+    Only the nodes required by the terms of the problem are computed
+    (`nodes`) and the time spent in each of them is accumulated in `stats`.
+    With `cache_size`, the quantities of the last evaluated designs are kept
+    (least recently used first out), so that designs evaluated again reuse
+    all their intermediate quantities. The cache is specific to the fidelity
+    of the problem and is not used with screening, which may switch the
+    fidelity of the actuators.
+    """
+
+    def __init__(self, problem, cache_size=0):
+        self.problem = problem
+        self.cache_size = cache_size
+        self.stats = collections.defaultdict(NodeStats)
+        self.hits = 0
+        self._cache = collections.OrderedDict()
+
+    @property
+    def nodes(self):
+        """Nodes evaluated for each design, after their dependencies"""
+        return [name for name in self.problem.requires if name != 'x']
+
+    def reset(self):
+        """Clear the cache and the statistics"""
+        self.stats.clear()
+        self.hits = 0
+        self._cache.clear()
+
+    def quantities(self, x):
+        """Intermediate quantities of the design `x`, from the cache if
+        possible"""
+        x = np.asarray(x, dtype=float)
+        if not self.cache_size or self.problem.screening is not None:
+            return Quantities(self.problem, self.stats, x=x)
+        key = (self.problem.fidelity, x.tobytes())
+        try:
+            q = self._cache[key]
+        except KeyError:
+            q = self._cache[key] = Quantities(self.problem, self.stats, x=x)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+            self.hits += 1
+        return q
+
+    def _evaluate(self, x, q):
+        if self.problem.screening is not None:
+            return self.problem.staged_call(x, q)
+        return (self.problem.objectives.evaluate(q),
+                self.problem.constraints.evaluate(q))
+
+    def __call__(self, x):
+        """Objectives and constraints of `x`, as `problem(x)`"""
+        return self._evaluate(x, self.quantities(x))
+
+    def evaluate(self, X):
+        """Evaluate the rows of `X` node by node.
+
+        out : (F, G) arrays in the convention of the problem"""
+        X = np.asarray(X, dtype=float)
+        qs = [self.quantities(x) for x in X]
+        if self.problem.screening is None:
+            for name in self.nodes:
+                self._compute(name, [q for q in qs if name not in q])
+        F = np.zeros((len(X), len(self.problem.weights)))
+        G = np.zeros((len(X), len(self.problem.c_weights)))
+        for k, (x, q) in enumerate(zip(X, qs)):
+            F[k], G[k] = self._evaluate(x, q)
+        return F, G
+
+    def _compute(self, name, qs):
+        """Compute the node `name` for the designs of `qs`"""
+        if not qs:
+            return
+        quantity = QUANTITIES[name]
+        args = [[q[r] for q in qs] for r in quantity.requires]
+        start = time.perf_counter()
+        if quantity.batch is not None and len(qs) > 1:
+            values = quantity.batch(self.problem, *args)
+        else:
+            values = [quantity.func(self.problem, *a) for a in zip(*args)]
+        self.stats[name].add(len(qs), time.perf_counter() - start)
+        for q, value in zip(qs, values):
+            q[name] = value
+
+    def report(self):
+        """Table of the time spent in each node"""
+        total = sum(s.time for s in self.stats.values()) or 1.
+        lines = ["{:<16} {:>8} {:>10} {:>10} {:>6}".format(
+            'node', 'count', 'total (s)', 'mean (ms)', '%')]
+        for name, s in sorted(self.stats.items(), key=lambda i: -i[1].time):
+            lines.append("{:<16} {:>8} {:>10.3f} {:>10.3f} {:>6.1f}".format(
+                name, s.count, s.time, s.mean*1e3, 100*s.time/total))
+        return '\n'.join(lines)
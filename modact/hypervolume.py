@@ -0,0 +1,163 @@
+"""Hypervolume indicator.
+
+All functions use the minimization convention. Exact values are computed
+with a sweep for two objectives, the HV3D sweep (incremental 2-D front along
+the third objective) for three objectives and the WFG algorithm above. A
+Monte-Carlo estimator is provided for many points in five objectives.
+
+:class:`Hypervolume` computes the indicator of raw problem outputs relative
+to :attr:`modact.problems.Problem.ref`: the objectives are converted with the
+weights of the problem and normalized such that the ideal point is mapped to
+0 and the nadir point to 10, `ref` (11, ..., 11) thus lies 10% beyond the
+nadir point.
+"""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from .pareto import non_dominated_mask
+
+
+def _prepare(F, ref):
+    F = np.asarray(F, dtype=float).reshape(-1, len(ref))
+    ref = np.asarray(ref, dtype=float)
+    F = F[np.all(F < ref, axis=1)]
+    return np.unique(F, axis=0), ref
+
+
+def _hv2d(F, ref):
+    F = F[np.lexsort((F[:, 1], F[:, 0]))]
+    # Running minimum of f2 gives the staircase of the non-dominated points
+    f2 = np.minimum.accumulate(F[:, 1])
+    widths = np.diff(np.append(F[:, 0], ref[0]))
+    return float(np.sum(widths * (ref[1] - f2)))
+
+
+class _Staircase(object):
+    """2-D front with incremental update of the dominated area"""
+
+    def __init__(self, ref):
+        self.ref = ref
+        self.f1 = []
+        self.f2 = []
+        self.area = 0.
+
+    def insert(self, a, b):
+        k = bisect_right(self.f1, a)
+        if k > 0 and self.f2[k-1] <= b:
+            return
+        upper = self.f2[k-1] if k > 0 else self.ref[1]
+        start = bisect_left(self.f1, a)
+        stop = start
+        while stop < len(self.f2) and self.f2[stop] >= b:
+            stop += 1
+        # Exclusive area of the new point
+        xs = [a] + self.f1[start:stop]
+        xs.append(self.f1[stop] if stop < len(self.f1) else self.ref[0])
+        ys = [upper] + self.f2[start:stop]
+        self.area += sum((xs[i+1] - xs[i])*(ys[i] - b)
+                         for i in range(len(ys)))
+        self.f1[start:stop] = [a]
+        self.f2[start:stop] = [b]
+
+
+def _hv3d(F, ref):
+    F = F[np.argsort(F[:, 2], kind='stable')]
+    front = _Staircase(ref)
+    z_next = np.append(F[1:, 2], ref[2])
+    volume = 0.
+    for (a, b, _), z0, z1 in zip(F, F[:, 2], z_next):
+        front.insert(a, b)
+        volume += front.area * (z1 - z0)
+    return float(volume)
+
+
+def _wfg(F, ref):
+    n, m = F.shape
+    if n == 0:
+        return 0.
+    if n == 1:
+        return float(np.prod(ref - F[0]))
+    if m == 2:
+        return _hv2d(F, ref)
+    if m == 3:
+        return _hv3d(F, ref)
+    # Points with the worst last objective first keep the limited sets small
+    F = F[np.argsort(-F[:, -1], kind='stable')]
+    volume = 0.
+    for i in range(n):
+        incl = np.prod(ref - F[i])
+        limited = np.maximum(F[i+1:], F[i])
+        if len(limited):
+            limited = limited[non_dominated_mask(limited)]
+            limited = np.unique(limited, axis=0)
+        volume += incl - _wfg(limited, ref)
+    return float(volume)
+
+
+def hypervolume(F, ref):
+    """Exact hypervolume of `F` (minimization) dominated up to `ref`"""
+    F, ref = _prepare(F, ref)
+    if len(F) == 0:
+        return 0.
+    if len(ref) == 1:
+        return float(ref[0] - F[:, 0].min())
+    F = F[non_dominated_mask(F)]
+    return _wfg(F, ref)
+
+
+def hypervolume_mc(F, ref, n_samples=100000, seed=None, chunk_size=1000000):
+    """Monte-Carlo estimate of the hypervolume of `F` up to `ref`.
+
+    Samples are drawn uniformly in the box between the ideal point of `F` and
+    `ref`. Returns the estimate and its standard error."""
+    F, ref = _prepare(F, ref)
+    if len(F) == 0:
+        return 0., 0.
+    F = F[non_dominated_mask(F)]
+    rng = np.random.default_rng(seed)
+    lower = F.min(axis=0)
+    box = np.prod(ref - lower)
+    batch = max(1, chunk_size // (len(F)*len(ref)))
+    hits = 0
+    for start in range(0, n_samples, batch):
+        n = min(batch, n_samples - start)
+        samples = lower + rng.random((n, len(ref)))*(ref - lower)
+        dominated = np.all(F[None, :, :] <= samples[:, None, :], axis=2)
+        hits += np.count_nonzero(dominated.any(axis=1))
+    p = hits / n_samples
+    return box*p, box*np.sqrt(p*(1 - p)/n_samples)
+
+
+class Hypervolume(object):
+    """Hypervolume of problem outputs relative to `problem.ref`.
+
+    Args:
+        problem: problem defining `weights` and `ref`
+        ideal: best value of each objective (problem convention)
+        nadir: worst value of each objective (problem convention)
+        n_samples: number of samples of the Monte-Carlo estimator, used
+            instead of the exact computation if given
+    """
+
+    def __init__(self, problem, ideal, nadir, n_samples=None, seed=None):
+        self.weights = np.asarray(problem.weights, dtype=float)
+        self.ref = np.asarray(problem.ref, dtype=float)
+        self.ideal = self.to_min(ideal)
+        self.nadir = self.to_min(nadir)
+        self.n_samples = n_samples
+        self.seed = seed
+
+    def to_min(self, f):
+        return -np.asarray(f, dtype=float)*self.weights
+
+    def normalize(self, f):
+        """Convert problem outputs to the normalized minimization space"""
+        return 10.*(self.to_min(f) - self.ideal)/(self.nadir - self.ideal)
+
+    def __call__(self, f):
+        F = self.normalize(f)
+        if self.n_samples is None:
+            return hypervolume(F, self.ref)
+        hv, _ = hypervolume_mc(F, self.ref, self.n_samples, self.seed)
+        return hv
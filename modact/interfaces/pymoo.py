@@ -1,17 +1,23 @@
 import numpy as np
 from pymoo.core.problem import ElementwiseProblem
+from pymoo.core.repair import Repair
+from pymoo.core.sampling import Sampling
 
 import modact.problems as pb
+from modact.codec import Codec
+from modact.pareto import ParetoArchive
+from modact.sampling import DesignSampler
 
 
 class PymopProblem(ElementwiseProblem):
 
-    def __init__(self, function, **kwargs):
+    def __init__(self, function, archive=None, pareto=False, **kwargs):
 
-        if isinstance(function, pb.Problem):
-            self.fct = function
-        else:
+        if isinstance(function, str):
             self.fct = pb.get_problem(function)
+        else:
+            # Problem or any wrapper exposing the same interface
+            self.fct = function
         lb, ub = self.fct.bounds()
         n_var = len(lb)
         n_obj = len(self.fct.weights)
@@ -21,6 +27,10 @@ class PymopProblem(ElementwiseProblem):
 
         self.weights = np.array(self.fct.weights)
         self.c_weights = np.array(self.fct.c_weights)
+        # Optional EvaluationArchive storing every evaluation
+        self.archive = archive
+        # Running set of non-dominated designs (updated in the main process)
+        self.pareto = ParetoArchive(n_obj) if pareto else None
 
         super().__init__(
             n_var=n_var,
@@ -32,7 +42,46 @@ class PymopProblem(ElementwiseProblem):
             **kwargs,
         )
 
+    def do(self, X, return_values_of, *args, **kwargs):
+        out = super().do(X, return_values_of, *args, **kwargs)
+        if self.pareto is not None and "F" in out:
+            self.pareto.add_batch(out["F"], out.get("G"), X)
+        return out
+
     def _evaluate(self, x, out, *args, **kwargs):
         f, g = self.fct(x)
         out["F"] = np.array(f) * -1 * self.weights
         out["G"] = np.array(g) * self.c_weights
+        if self.archive is not None:
+            self.archive.append(x, out["F"], out["G"])
+
+
+class CodecRepair(Repair):
+    """Repair offspring of a :class:`PymopProblem` with :class:`Codec`"""
+
+    def __init__(self, resolution=None, **kwargs):
+        super().__init__(**kwargs)
+        self.resolution = resolution
+
+    def _do(self, problem, X, **kwargs):
+        codec = Codec.for_problem(problem.fct)
+        return codec.repair(X, self.resolution)
+
+
+class BankSampling(Sampling):
+    """Initial population of a :class:`PymopProblem` drawn from the sample
+    bank of :class:`~modact.sampling.DesignSampler`.
+
+    The population only depends on `method` and `seed`, not on the random
+    state of the algorithm."""
+
+    def __init__(self, method='lhs', seed=0, **kwargs):
+        super().__init__()
+        self.method = method
+        self.seed = seed
+        self.kwargs = kwargs
+
+    def _do(self, problem, n_samples, **kwargs):
+        sampler = DesignSampler(problem.fct, self.method, self.seed,
+                                **self.kwargs)
+        return sampler.sample(n_samples)
@@ -1,9 +1,11 @@
 import attr
 
+from .registry import Registry
 
-@attr.s(auto_attribs=True, slots=True)
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
 class Material(object):
-    "Class to store material properties"
+    "Class to store material properties (immutable)"
     name: str
     E: float
     rho: float
@@ -33,5 +35,30 @@ material_data = {
 }
 
 
+def validate_material(material):
+    """Raise ValueError if a property of the material is out of range"""
+    for field in ('E', 'rho', 'sigma_f_lim', 'sigma_h_lim'):
+        if getattr(material, field) <= 0:
+            raise ValueError("{} of material {} must be positive".format(
+                field, material.name))
+    if not 0 <= material.nu < 0.5:
+        raise ValueError("Invalid Poisson's ratio of material {}".format(
+            material.name))
+    if material.cost < 0:
+        raise ValueError("Cost of material {} must not be negative".format(
+            material.name))
+
+
+# Registry of the materials: a single immutable record per material, shared
+# by all the gears, and a read-only table of the properties indexed by id.
+# The files listed in $MODACT_MATERIALS are added to the built-in materials.
+materials = Registry(Material,
+                     [Material(name=name, **material_data[name])
+                      for name in sorted(material_data)],
+                     validate=validate_material, env='MODACT_MATERIALS')
+material_names = materials.names
+MATERIAL_FIELDS = materials.fields
+
+
 def get_material(name):
-    return Material(name=name, **material_data[name])
+    return materials[name]
@@ -1,7 +1,55 @@
+from math import acos, ceil, cos, pi
+
+import attr
 import numpy as np
 import trimesh
 
 
+@attr.s(auto_attribs=True, frozen=True)
+class Tessellation(object):
+    """Number of sections of the cylinders adapted to their radius.
+
+    A cylinder of radius `r` gets the smallest number of sections `n` whose
+    chordal error (distance between the circle and the inscribed polygon)
+    `r*(1 - cos(pi/n))` is at most `tolerance` (mm), within
+    [`min_sections`, `max_sections`].
+
+    The convex hull of the inscribed polygons is contained in the hull of
+    the cylinders, which is contained in the former grown by the largest
+    chordal error `e`. By the Steiner formula, the area of the hull (hence
+    the hull cost) is thus underestimated by at most `4*pi*e*(D + e)`, with
+    `D` the diameter of the hull (at most the diagonal of its bounding box),
+    see :func:`hull_area_error_bound`."""
+    tolerance: float = 0.05
+    min_sections: int = 8
+    max_sections: int = 128
+
+    def __call__(self, radius):
+        if radius <= self.tolerance/2:
+            return self.min_sections
+        n = ceil(pi/acos(1 - self.tolerance/radius))
+        if chordal_error(radius, n) > self.tolerance:
+            n += 1
+        return min(max(n, self.min_sections), self.max_sections)
+
+
+def cylinder_sections(sections, radius):
+    """Number of sections of a cylinder of `radius`, `sections` being a
+    number or a :class:`Tessellation`"""
+    return sections(radius) if callable(sections) else sections
+
+
+def chordal_error(radius, sections):
+    """Largest distance between a circle and its inscribed polygon"""
+    return radius*(1 - cos(pi/sections))
+
+
+def hull_area_error_bound(error, diameter):
+    """Bound of the area missing to the convex hull of inscribed polygons
+    with the largest chordal `error`, for a hull of `diameter`"""
+    return 4*pi*error*(diameter + error)
+
+
 def merge_meshes(meshes):
     """
     Concatenate meshes.
@@ -1,3 +1,3 @@
-from .base import Model, OperatingCondition
+from .base import Model, OperatingCondition, cached_property
 from .gears import GearPair, make_gearpair
 from .motors import get_stepper, Stepper
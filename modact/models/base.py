@@ -4,6 +4,30 @@ from typing import Any
 import attr
 
 
+class cached_property(object):
+    """Property computed once and stored in the instance.
+
+    The cache is thread-safe: concurrent first accesses may each compute the
+    value, but all of them return the first stored one. No lock is held
+    while computing, so independent instances are evaluated in parallel.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            pass
+        value = self.func(obj)
+        return obj.__dict__.setdefault(self.name, value)
+
+
 class Model(object):
     pass
 
@@ -1,15 +1,17 @@
 from collections import namedtuple
-from math import acos, atan, cos, pi, sin, sqrt, tan
+from math import acos, atan, cos, isnan, pi, sin, sqrt, tan
 from operator import attrgetter
 
 import numpy as np
-from cached_property import cached_property
 from scipy import optimize
 from trimesh.primitives import Cylinder
 from trimesh.transformations import rotation_matrix, translation_matrix
 
 from ..materials import Material, get_material
-from .base import Model
+from ..meshutils import cylinder_sections
+from .base import Model, cached_property
+from .kernels import (gear_pair_kinematics, gear_pair_security,  # noqa: F401
+                      working_pressure_angle)
 
 
 def inv(alpha):
@@ -20,10 +22,27 @@ def alpha_p_with_shifts(aw, a, Z1, x1, Z2, x2):
     return inv(aw) - 2 * (x1+x2)/(Z1+Z2) * tan(a) - inv(a)
 
 
+def refine_alpha_p(aw, a, Z1, x1, Z2, x2, max_iter=20):
+    """Working pressure angle by Newton iterations started from `aw`, to
+    machine precision"""
+    target = 2 * (x1+x2)/(Z1+Z2) * tan(a) + inv(a)
+    for _ in range(max_iter):
+        t = tan(aw)
+        step = (t - aw - target)/(t*t)
+        aw -= step
+        if abs(step) <= 1e-15*aw:
+            break
+    return aw
+
+
 """Derived using ISO 21771:2007 & 1328-1:2013 & 53 & 6336 Method B & 1122-1"""
 
 
 class SpurGear(object):
+    __slots__ = ('alpha', 'alpha_p', 'm', 'ha', 'hf', 'x', 'Z', 'b',
+                 'stretch', 'material', 'm_p', 'tan_alpha_t_p', 'alpha_t',
+                 'alpha_t_p')
+
     def __init__(self, Z, m, x, b, material='steel', stretch=0):
         self.alpha = pi/9  # 20° contact angle
         self.alpha_p = self.alpha  # working contact angle
@@ -102,9 +121,11 @@ class SpurGear(object):
         Ft = 2*torque/(self.d_p*1e-3)
         return (Ft, Ft*self.tan_alpha_t_p, 0, Ft/cos(self.alpha_p))
 
-    def mesh(self, at):
-        return Cylinder(radius=self.d_p/2-0.005, height=self.b+self.stretch,
-                        transform=at.copy())
+    def mesh(self, at, sections=32):
+        radius = self.d_p/2-0.005
+        return Cylinder(radius=radius, height=self.b+self.stretch,
+                        transform=at.copy(),
+                        sections=cylinder_sections(sections, radius))
 
 
 TwoGears = namedtuple('TwoGears', ['p', 'g'])  # Pinion, gear
@@ -112,6 +133,11 @@ TwoGears = namedtuple('TwoGears', ['p', 'g'])  # Pinion, gear
 
 class GearPair(Model):
     stretch_margin: float = .001
+    # Optional modact.catalogue.GearCatalogue whose working pressure angle
+    # at the closest grid point is refined by Newton iterations instead of
+    # solving for it from scratch. All the quantities are computed exactly.
+    # Only used by this scalar constructor, not by the array kernels.
+    catalogue = None
 
     def __init__(self, pinion, gear, disp=0, angle=None):
         self.gears = TwoGears(p=pinion, g=gear)
@@ -133,11 +159,20 @@ class GearPair(Model):
     def set_working_conditions(self):
         p = self.gears.p
         g = self.gears.g
-        try:
-            self.alpha_p = optimize.brentq(alpha_p_with_shifts, 0.1, pi/2,
-                                           args=(self.alpha, p.Z, p.x, g.Z, g.x))
-        except ValueError:
-            raise
+        alpha_p = None
+        if self.catalogue is not None:
+            try:
+                start = self.catalogue.alpha_p(p.Z, p.x, g.Z, g.x)
+            except ValueError:
+                # Outside of the catalogue
+                start = np.nan
+            if not isnan(start):
+                alpha_p = refine_alpha_p(start, self.alpha, p.Z, p.x, g.Z,
+                                         g.x)
+        if alpha_p is None:
+            alpha_p = optimize.brentq(alpha_p_with_shifts, 0.1, pi/2,
+                                      args=(self.alpha, p.Z, p.x, g.Z, g.x))
+        self.alpha_p = alpha_p
         p.alpha_p = self.alpha_p
         p.update_prime()
         g.alpha_p = self.alpha_p
@@ -300,7 +335,7 @@ class GearPair(Model):
     def height(self):
         return self.gears.p.height
 
-    def mesh(self, at, groups=None):
+    def mesh(self, at, groups=None, sections=32):
         """Generate mesh for gear pair at position given by `at`.
 
         .. note: `at` is/must be edited by reference
@@ -312,16 +347,39 @@ class GearPair(Model):
             stretch = sign*(self.height+self.gears.p.stretch+2*self.stretch_margin)/2
         at.dot(translation_matrix([0, 0, stretch]), out=at)
         at.dot(rotation_matrix(self.angle, [0, 0, 1]), out=at)
-        p_mesh = self.gears.p.mesh(at)
+        p_mesh = self.gears.p.mesh(at, sections)
         at.dot(translation_matrix(
             [self.ap, 0, sign*self.gears.p.stretch/2]), out=at)
-        g_mesh = self.gears.g.mesh(at)
+        g_mesh = self.gears.g.mesh(at, sections)
         if groups is not None:
             groups[-1].append(p_mesh)
             groups.append([g_mesh])
         return (p_mesh, g_mesh)
 
 
+def _stack_materials(materials):
+    fields = ('E', 'rho', 'nu', 'cost', 'sigma_f_lim', 'sigma_h_lim')
+    return Material(name='', **{f: np.array([getattr(m, f) for m in materials])
+                                for f in fields})
+
+
+def security_per_unit_torque(pairs):
+    """Safety factors (*`security_h`, *`security_f`) of gear pairs for a
+    pinion torque of 1 N.m.
+
+    out : array (n_pairs, 4)"""
+    p = [gp.gears.p for gp in pairs]
+    g = [gp.gears.g for gp in pairs]
+    values = gear_pair_security(
+        [gear.Z for gear in p], [gear.x for gear in p],
+        [gear.Z for gear in g], [gear.x for gear in g],
+        [gear.m for gear in p], [gear.b/gear.m for gear in p],
+        [gp.alpha_p for gp in pairs], [gp.contact_ratio for gp in pairs],
+        _stack_materials([gear.material for gear in p]),
+        _stack_materials([gear.material for gear in g]))
+    return np.column_stack(values)
+
+
 def make_gearpair(Z1, x1, Z2, x2, m, b, disp=0, angle=None):
     p = SpurGear(Z1, m, x1, b)
     g = SpurGear(Z2, m, x2, b)
@@ -0,0 +1,255 @@
+"""Array kernels of the gear and motor models.
+
+The formulas of :mod:`modact.models.gears` and :mod:`modact.models.motors`
+are written once below with NumPy ufuncs only, so that they apply both to
+arrays (NumPy backend) and to scalars in numba's nopython mode. When numba
+is installed, the scalar versions are compiled and applied element-wise in a
+compiled loop, which avoids the temporary arrays of the NumPy backend. The
+backend can be forced with the `MODACT_BACKEND` environment variable
+(`numpy` or `numba`).
+
+All public functions broadcast their arguments and return a tuple of arrays.
+The compiled loops release the GIL and the kernels can be called from
+several threads.
+"""
+import os
+import threading
+import types
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # pragma: no cover
+    numba = None
+
+ALPHA = np.pi/9  # 20° contact angle
+
+
+def _inv(alpha):
+    return np.tan(alpha) - alpha
+
+
+def _kinematics(Z1, x1, Z2, x2, m):
+    """(interference, contact_ratio, gs1, gs2, alpha_p) of a gear pair"""
+    target = 2*(x1 + x2)/(Z1 + Z2)*np.tan(ALPHA) + _inv(ALPHA)
+    # Newton iterations on the convex involute function started on the
+    # right of the root converge monotonically
+    aw = 1.2 + 0*target
+    for _ in range(30):
+        t = np.tan(aw)
+        aw = aw - (t - aw - target)/(t*t)
+    m_p = m*np.cos(ALPHA)/np.cos(aw)
+    tan_aw = np.tan(aw)
+    db1 = m_p*Z1*np.cos(aw)
+    db2 = m_p*Z2*np.cos(aw)
+    da1 = m*Z1 + 2*(m + x1*m)
+    da2 = m*Z2 + 2*(m + x2*m)
+    rho_A1 = 0.5*np.sqrt(da1*da1 - db1*db1)
+    rho_A2 = 0.5*np.sqrt(da2*da2 - db2*db2)
+    CT1 = 0.5*db1*tan_aw
+    CT2 = 0.5*db2*tan_aw
+    g1 = rho_A1 - CT1
+    g2 = rho_A2 - CT2
+    T1T2 = 0.5*m_p*(Z1 + Z2)*np.sin(aw)
+    interf = (np.minimum(CT2 - g1, 0.) + np.minimum(CT1 - g2, 0.) +
+              np.minimum(rho_A2, 0.))
+    interf = interf*((interf < -1e-6) | (interf >= 0))
+    contact_ratio = (g1 + g2)/(np.pi*m_p*np.cos(aw))
+    u = np.maximum(Z2/Z1, Z1/Z2)
+    gs1 = 1 - rho_A2/u/(T1T2 - rho_A2)
+    gs2 = 1 - u*rho_A1/(T1T2 - rho_A1)
+    return interf, contact_ratio, gs1, gs2, aw
+
+
+def _foot_stress(Z, x, m, width, eps):
+    """Tooth root stress of a gear for a tangential force of 1 N"""
+    rho_fp = 0.38*m
+    hf = 1.25*m
+    E = (np.pi/4*m - hf*np.tan(ALPHA) -
+         (1 - np.sin(ALPHA))*rho_fp/np.cos(ALPHA))
+    G = rho_fp/m - hf/m + x
+    dn = m*Z
+    dbn = dn*np.cos(ALPHA)
+    dan = dn + 2*(m + x*m)
+    den = 2*np.sqrt((np.sqrt(dan*dan/4 - dbn*dbn/4) -
+                     np.pi*m*np.cos(ALPHA)*(eps - 1))**2 + dbn*dbn/4)
+    alpha_en = np.arccos(dbn/den)
+    ge = (0.5*np.pi + 2*np.tan(ALPHA)*x)/Z + _inv(ALPHA) - _inv(alpha_en)
+    alpha_Fen = alpha_en - ge
+    T = np.pi/3  # exterior gear
+    H = 2./Z*(np.pi/2 - E/m) - T
+    theta = np.pi/6 + 0*H
+    for _ in range(20):
+        c = np.cos(theta)
+        theta = theta - ((theta - 2*G/Z*np.tan(theta) + H) /
+                         (1 - 2*G/Z/(c*c)))
+    c = np.cos(theta)
+    sFnom = Z*np.sin(T - theta) + np.sqrt(3.)*(G/c - rho_fp/m)
+    hFeom = 0.5*((np.cos(ge) - np.sin(ge)*np.tan(alpha_Fen))*den/m -
+                 Z*np.cos(T - theta) - (G/c - rho_fp/m))
+    rhofom = rho_fp/m + 2*G*G/(c*(Z*c*c - 2*G))
+    Y_F = 6*hFeom*np.cos(alpha_Fen)/(sFnom*sFnom*np.cos(ALPHA))
+    L = sFnom/hFeom
+    qs = sFnom/rhofom/2
+    Y_S = (1.2 + 0.13*L)*qs**(1/(1.21 + 2.3/L))
+    return 1./(width*m*1e-6)*Y_F*Y_S
+
+
+def _security(Z1, x1, Z2, x2, m, b, aw, eps, E1, nu1, E2, nu2,
+              sh_lim1, sh_lim2, sf_lim1, sf_lim2):
+    """Safety factors (flank p/g, root p/g) for an input torque of 1 N.m.
+
+    The flank safety factors scale with 1/sqrt(torque) and the root safety
+    factors with 1/torque."""
+    m_p = m*np.cos(ALPHA)/np.cos(aw)
+    tan_aw = np.tan(aw)
+    width = b*m
+    Ft = 2./(m_p*Z1*1e-3)
+    u = np.maximum(Z2/Z1, Z1/Z2)
+    Z_H = np.sqrt(2/np.cos(ALPHA)**2/tan_aw)
+    Z_E = np.sqrt(1/((1 - nu1*nu1)/E1 + (1 - nu2*nu2)/E2)/np.pi)
+    Z_eps = np.sqrt((4 - eps)/3)
+    sigma_h_0 = Z_H*Z_E*Z_eps*np.sqrt(Ft/(m*Z1*1e-3)/(width*1e-3)*(u + 1)/u)
+    db1 = m*Z1*np.cos(ALPHA)
+    db2 = m*Z2*np.cos(ALPHA)
+    da1 = m*Z1 + 2*(m + x1*m)
+    da2 = m*Z2 + 2*(m + x2*m)
+    e1 = np.sqrt(da1*da1/(db1*db1) - 1)
+    e2 = np.sqrt(da2*da2/(db2*db2) - 1)
+    M1 = tan_aw/np.sqrt((e1 - 2*np.pi/Z1)*(e2 - (eps - 1)*2*np.pi/Z2))
+    M2 = tan_aw/np.sqrt((e2 - 2*np.pi/Z2)*(e1 - (eps - 1)*2*np.pi/Z1))
+    # Invalid factors (negative square roots) are replaced by 1
+    ZB = np.fmax(M1, 1.)
+    ZD = np.fmax(M2, 1.)
+    sh1 = sh_lim1*0.85/(sigma_h_0*ZB*np.sqrt(1.25))
+    sh2 = sh_lim2*0.85/(sigma_h_0*ZD*np.sqrt(1.25))
+    sf1 = sf_lim1*2*0.85/(_foot_stress(Z1, x1, m, width, eps)*Ft*1.25)
+    sf2 = sf_lim2*2*0.85/(_foot_stress(Z2, x2, m, width, eps)*Ft*1.25)
+    return sh1, sh2, sf1, sf2
+
+
+def _stepper(speed, V, imax, R, Nw, km0, L0, Nm, Q_fstat, Q_fdyn):
+    """(speed, torque, current) at the output of a stepper motor driven at
+    `speed` (electrical pulsation)"""
+    Vm = V - 0.1
+    Rtot = R + 1.
+    km = km0*Nw
+    L = L0*Nw*Nw
+    i_max = np.minimum(4/np.pi*Vm/Rtot, imax)
+    omega = speed/Nm
+    RL = Rtot*Rtot + speed*speed*L*L
+    i = Vm*4/np.pi/np.sqrt(RL) - km*omega*Rtot/RL
+    torque = np.maximum(np.minimum(i, i_max)*km - Q_fstat - Q_fdyn*omega, 0.)
+    return omega, torque, i
+
+
+KERNELS = {
+    'kinematics': (_kinematics, 5),
+    'security': (_security, 4),
+    'stepper': (_stepper, 3),
+}
+
+
+def _compile():
+    """Compile the scalar formulas with numba.
+
+    The functions are recreated with a namespace in which the helpers are
+    replaced by their compiled versions, the NumPy versions stay untouched.
+    """
+    namespace = dict(globals())
+    for name in ('_inv', '_foot_stress', '_kinematics', '_security',
+                 '_stepper'):
+        fct = globals()[name]
+        namespace[name] = numba.njit(types.FunctionType(
+            fct.__code__, namespace, name, fct.__defaults__))
+    return namespace
+
+
+def _make_loop(scalar, n_args, n_out):
+    """Compile a loop applying `scalar` to flat arrays"""
+    args = ', '.join('a{}'.format(k) for k in range(n_args))
+    items = ', '.join('a{}[k]'.format(k) for k in range(n_args))
+    src = (
+        "def loop({args}, out):\n"
+        "    for k in range(out.shape[1]):\n"
+        "        res = scalar({items})\n"
+        "        for j in range({n_out}):\n"
+        "            out[j, k] = res[j]\n").format(args=args, items=items,
+                                                n_out=n_out)
+    namespace = {'scalar': scalar}
+    exec(src, namespace)
+    return numba.njit(namespace['loop'], nogil=True)
+
+
+_loops = {}
+_compiled = {}
+_compile_lock = threading.Lock()
+
+
+def backend():
+    """Name of the active backend"""
+    selected = os.environ.get('MODACT_BACKEND')
+    if selected is None:
+        return 'numpy' if numba is None else 'numba'
+    if selected == 'numba' and numba is None:
+        raise ImportError("numba is not installed")
+    return selected
+
+
+def _apply(name, args, use=None):
+    fct, n_out = KERNELS[name]
+    args = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in args])
+    if (use or backend()) == 'numpy':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = fct(*args)
+        return tuple(np.broadcast_to(o, args[0].shape) for o in out)
+    if name not in _loops:
+        with _compile_lock:
+            if not _compiled:
+                _compiled.update(_compile())
+            if name not in _loops:
+                _loops[name] = _make_loop(_compiled[fct.__name__], len(args),
+                                          n_out)
+    shape = args[0].shape
+    flat = [np.ascontiguousarray(a).ravel() for a in args]
+    out = np.empty((n_out, flat[0].size))
+    _loops[name](*flat, out)
+    return tuple(o.reshape(shape) for o in out)
+
+
+def gear_pair_kinematics(Z1, x1, Z2, x2, m=1., backend=None):
+    """Kinematic indicators of gear pairs, equivalent to (`interference`,
+    `contact_ratio`, *`specific_speed`, `alpha_p`) of
+    :class:`~modact.models.gears.GearPair`.
+
+    out : (interference, contact_ratio, gs1, gs2, alpha_p)"""
+    return _apply('kinematics', (Z1, x1, Z2, x2, m), backend)
+
+
+def working_pressure_angle(Z1, x1, Z2, x2, backend=None):
+    return gear_pair_kinematics(Z1, x1, Z2, x2, 1., backend)[4]
+
+
+def gear_pair_security(Z1, x1, Z2, x2, m, b, alpha_p, contact_ratio,
+                       p_material, g_material, backend=None):
+    """Safety factors of gear pairs for an input torque of 1 N.m, equivalent
+    to (*`security_h`, *`security_f`) of
+    :class:`~modact.models.gears.GearPair`.
+
+    Materials are objects with the attributes of
+    :class:`~modact.materials.Material`."""
+    materials = (p_material.E, p_material.nu, g_material.E, g_material.nu,
+                 p_material.sigma_h_lim, g_material.sigma_h_lim,
+                 p_material.sigma_f_lim, g_material.sigma_f_lim)
+    return _apply('security', (Z1, x1, Z2, x2, m, b, alpha_p, contact_ratio,
+                               *materials), backend)
+
+
+def stepper_speed_torque(speed, V, imax, R, Nw, km0, L0, Nm, Q_fstat, Q_fdyn,
+                         backend=None):
+    """Output (speed, torque, current) of stepper motors, equivalent to
+    :meth:`~modact.models.motors.Stepper.get_speed_torque`. The torque is
+    not clipped to a minimal value."""
+    return _apply('stepper', (speed, V, imax, R, Nw, km0, L0, Nm, Q_fstat,
+                              Q_fdyn), backend)
@@ -1,18 +1,58 @@
 from math import pi, sqrt
+from types import MappingProxyType
 
+import attr
 import numpy as np
 from trimesh.primitives import Cylinder
 from trimesh.transformations import translation_matrix
 
+from ..meshutils import cylinder_sections
+from ..registry import Registry
 from .base import Model
 
 
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class MotorRecord(object):
+    """Immutable properties of a stepper motor (see `motor_data`)"""
+    name: str
+    L0: float
+    Nm: int
+    NwNom: float
+    RNom: float
+    km0: float
+    Q_fstat: float
+    Q_fdyn: float
+    cb: float
+    ca: float
+    r: float  # radius and height of the housing
+    h: float
+
+    @classmethod
+    def from_dict(cls, name, data):
+        """Create a record from a dict of properties, the dimensions of the
+        housing being either given by `r` and `h` or in a `mesh` dict"""
+        values = dict(data)
+        values.update(values.pop('mesh', {}))
+        values = {k: float(v) for k, v in values.items()}
+        if 'Nm' in values:
+            if not values['Nm'].is_integer():
+                raise ValueError("Nm of motor {} must be an integer".format(
+                    name))
+            values['Nm'] = int(values['Nm'])
+        return cls(name=name, **values)
+
+
 class Stepper(Model):
-    """Stepper class"""
-    def __init__(self, name, motor_data):
+    """Stepper class.
+
+    The properties of the motor are shared (`motor` record), only the
+    parameters of the coil are stored per instance."""
+    def __init__(self, name, motor_data=None):
         self.name = name
-        self.motor_data = motor_data.copy()
-        # Not a deepcopy as only top dict is modified
+        if motor_data is None:
+            self.motor = motors[name]
+        else:
+            self.motor = MotorRecord.from_dict(name, motor_data)
         self.fill_factor = 1
         self.r_scale = 1
         self.disp = 0
@@ -28,14 +68,26 @@ class Stepper(Model):
         """
         self.fill_factor = fill_factor
         self.r_scale = r_scale
-        self.motor_data['R'] = self.motor_data['RNom'] * r_scale
-        self.motor_data['Nw'] = self.motor_data['NwNom']*sqrt(r_scale*fill_factor)
+        self.R = self.motor.RNom * r_scale
+        self.Nw = self.motor.NwNom*sqrt(r_scale*fill_factor)
+
+    @property
+    def motor_data(self):
+        """Read-only view of the properties of the motor and of the coil.
+
+        The motor record is shared and immutable: use :meth:`adjust_coil` to
+        change the coil or create a `Stepper` with new `motor_data`."""
+        data = attr.asdict(self.motor)
+        data['mesh'] = MappingProxyType({'r': data.pop('r'),
+                                         'h': data.pop('h')})
+        data.update(R=self.R, Nw=self.Nw)
+        return MappingProxyType(data)
 
     @property
     def height(self):
-        return self.motor_data['mesh']['h']
+        return self.motor.h
 
-    def mesh(self, previous_edge, groups=None):
+    def mesh(self, previous_edge, groups=None, sections=32):
         """Return the mesh of the motor described in mesh_data and centered
         around `center`
         """
@@ -43,9 +95,9 @@ class Stepper(Model):
         previous_edge.dot(
             translation_matrix([0, 0, self.disp+sign*self.height/2]),
             out=previous_edge)
-        mesh_data = self.motor_data['mesh']
-        mesh = Cylinder(radius=mesh_data['r'], height=mesh_data['h'],
-                        transform=previous_edge.copy())
+        mesh = Cylinder(radius=self.motor.r, height=self.motor.h,
+                        transform=previous_edge.copy(),
+                        sections=cylinder_sections(sections, self.motor.r))
 
         if groups is not None:
             groups[-1].append(mesh)
@@ -54,49 +106,59 @@ class Stepper(Model):
 
     @property
     def volume(self):
-        mesh_data = self.motor_data['mesh']
-        return mesh_data['r']**2*mesh_data['h']*pi
+        return self.motor.r**2*self.motor.h*pi
 
     @property
     def i(self):
-        return self.motor_data['Nm']  # speed ratio f_drive / f_mechanical
+        return self.motor.Nm  # speed ratio f_drive / f_mechanical
 
     def get_speed_torque(self, op):
-        Vm = op.V - 0.1
+        return speed_torque(self.motor, self.R, self.Nw, op)
 
-        Reff = self.motor_data['R']
-        Rtot = Reff + 1.
-        Nw = self.motor_data['Nw']
-        km0 = self.motor_data['km0']
-        km = km0 * Nw
-        L = self.motor_data['L0'] * Nw**2
+    @property
+    def cost(self):
+        cost = self.motor.ca
+        cost += self.fill_factor*self.motor.cb
+        return cost
 
-        imax = 4/np.pi*Vm / Rtot
-        if op.imax is not None and op.imax < imax:
-            imax = op.imax
 
-        Q_fstat = self.motor_data['Q_fstat']
-        Q_fdyn = self.motor_data['Q_fdyn']
+def speed_torque(motor, R, Nw, op):
+    """Output condition of steppers of the `motor` (a `MotorRecord`) with
+    coils of resistance `R` and `Nw` turns driven at the condition `op`.
 
-        wloop = op.speed
-        omega = wloop / self.motor_data['Nm']
+    `R`, `Nw` and the fields of `op` can be arrays, e.g. to evaluate at once
+    all the designs of a population using the same motor."""
+    Vm = op.V - 0.1
 
-        RL = Rtot**2 + wloop**2*L**2
-        i = Vm*4/np.pi/np.sqrt(RL) - (km)*omega*Rtot/RL
-        Tp2 = np.minimum(i, imax)*km-Q_fstat-Q_fdyn*omega
-        Tp2 = np.maximum(Tp2, 0)
+    Rtot = R + 1.
+    km0 = motor.km0
+    km = km0 * Nw
+    L = motor.L0 * Nw**2
 
-        out = op.copy()
-        out.speed = omega
-        out.torque = Tp2
-        out.imax = i
-        return out
+    imax = 4/np.pi*Vm / Rtot
+    if op.imax is not None:
+        # The conditions may be arrays
+        if np.ndim(imax) or np.ndim(op.imax):
+            imax = np.minimum(imax, op.imax)
+        elif op.imax < imax:
+            imax = op.imax
 
-    @property
-    def cost(self):
-        cost = self.motor_data['ca']
-        cost += self.fill_factor*self.motor_data['cb']
-        return cost
+    Q_fstat = motor.Q_fstat
+    Q_fdyn = motor.Q_fdyn
+
+    wloop = op.speed
+    omega = wloop / motor.Nm
+
+    RL = Rtot**2 + wloop**2*L**2
+    i = Vm*4/np.pi/np.sqrt(RL) - (km)*omega*Rtot/RL
+    Tp2 = np.minimum(i, imax)*km-Q_fstat-Q_fdyn*omega
+    Tp2 = np.maximum(Tp2, 0)
+
+    out = op.copy()
+    out.speed = omega
+    out.torque = Tp2
+    out.imax = i
+    return out
 
 
 motor_data = {
@@ -127,8 +189,30 @@ motor_data = {
           'mesh': {'r': 14., 'h': 8}}
 }
 
-motor_names = list(motor_data.keys())
-motor_names.sort()
+
+def validate_motor(motor):
+    """Raise ValueError if a property of the motor is out of range"""
+    for field in ('L0', 'Nm', 'NwNom', 'RNom', 'km0', 'r', 'h'):
+        if getattr(motor, field) <= 0:
+            raise ValueError("{} of motor {} must be positive".format(
+                field, motor.name))
+    for field in ('Q_fstat', 'Q_fdyn', 'ca', 'cb'):
+        if getattr(motor, field) < 0:
+            raise ValueError("{} of motor {} must not be negative".format(
+                field, motor.name))
+
+
+# Registry of the motors: a single immutable record per motor, shared by all
+# the steppers, and a read-only table of the properties indexed by motor id.
+# The built-in motors come first, then the ones of the files listed in
+# $MODACT_MOTORS.
+motors = Registry(MotorRecord,
+                  [MotorRecord.from_dict(name, motor_data[name])
+                   for name in sorted(motor_data)],
+                  validate=validate_motor, env='MODACT_MOTORS')
+# Live list of the motor names, the motor id is the index in this list
+motor_names = motors.names
+MOTOR_FIELDS = motors.fields
 
 
 def get_stepper(name_or_number, fill_factor=1., r_scale=1.):
@@ -136,6 +220,6 @@ def get_stepper(name_or_number, fill_factor=1., r_scale=1.):
         name = motor_names[int(name_or_number)]
     else:
         name = name_or_number
-    s = Stepper(name, motor_data[name])
+    s = Stepper(name)
     s.adjust_coil(fill_factor, r_scale)
     return s
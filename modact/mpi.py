@@ -0,0 +1,207 @@
+"""Parallel evaluation over MPI ranks with mpi4py.
+
+Rank 0 is the master and distributes the designs to the other ranks, which
+evaluate them one at a time. A new design is sent to a worker as soon as it
+returns a result, which balances the load when evaluation times differ a
+lot between designs (e.g. collision checks of problems C2 to C5). This
+mirrors the master-worker setup of the Borg MOEA interface.
+
+Typical use (run with `mpirun -n 4 python script.py`)::
+
+    evaluator = MPIEvaluator(get_problem('cs3'), archive=archive)
+    if evaluator.start():  # workers serve until the master closes
+        F, G = evaluator.evaluate(X)
+        evaluator.close()
+
+The master can also submit designs asynchronously with :meth:`submit` and
+collect them with :meth:`next_result`. With a single rank, the designs are
+evaluated by the master itself.
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+try:
+    from mpi4py import MPI
+except ImportError:  # pragma: no cover
+    MPI = None
+
+TAG_TASK = 1
+TAG_RESULT = 2
+TAG_STOP = 3
+
+
+class MPIEvaluator(object):
+    """Master-worker evaluation of `problem` over the ranks of `comm`.
+
+    Results are appended to `archive` (an
+    :class:`~modact.archive.EvaluationArchive`) by the master if given."""
+
+    def __init__(self, problem, comm=None, archive=None):
+        if MPI is None:
+            raise ImportError("mpi4py is required for MPIEvaluator")
+        self.problem = problem
+        self.comm = comm if comm is not None else MPI.COMM_WORLD
+        self.rank = self.comm.Get_rank()
+        self.size = self.comm.Get_size()
+        self.archive = archive
+        self._idle = deque(range(1, self.size))
+        self._running = {}  # task id per busy worker
+        self._queue = deque()
+        self._done = deque()
+        self._next_id = 0
+        self.n_evaluated = 0
+        self.busy_time = np.zeros(self.size)
+
+    @property
+    def is_master(self):
+        return self.rank == 0
+
+    @property
+    def n_pending(self):
+        return len(self._queue) + (self.size - 1 - len(self._idle))
+
+    def start(self):
+        """Return True on the master, serve until closed on the workers"""
+        if not self.is_master:
+            self.serve()
+        return self.is_master
+
+    def _evaluate(self, x):
+        t0 = time.perf_counter()
+        try:
+            f, g = self.problem(x)
+            error = None
+        except Exception as e:
+            f, g, error = None, None, repr(e)
+        return f, g, error, time.perf_counter() - t0
+
+    def serve(self):
+        """Worker loop: evaluate designs until the master sends stop"""
+        status = MPI.Status()
+        while True:
+            task = self.comm.recv(source=0, tag=MPI.ANY_TAG, status=status)
+            if status.Get_tag() == TAG_STOP:
+                break
+            task_id, x = task
+            self.comm.send((task_id, x, *self._evaluate(x)), dest=0,
+                           tag=TAG_RESULT)
+
+    def _dispatch(self):
+        while self._idle and self._queue:
+            task, rank = self._queue.popleft(), self._idle.popleft()
+            self._running[rank] = task[0]
+            self.comm.send(task, dest=rank, tag=TAG_TASK)
+
+    def _receive(self):
+        """Wait for the result of a worker and give it a new task"""
+        status = MPI.Status()
+        result = self.comm.recv(source=MPI.ANY_SOURCE, tag=TAG_RESULT,
+                                status=status)
+        source = status.Get_source()
+        del self._running[source]
+        self._idle.append(source)
+        self._dispatch()
+        return (*result, source)
+
+    def submit(self, x):
+        """Queue design `x` for evaluation and return its task id"""
+        task_id = self._next_id
+        self._next_id += 1
+        if self.size == 1:
+            self._done.append((task_id, x, *self._evaluate(x), 0))
+        else:
+            self._queue.append((task_id, np.asarray(x, dtype=float)))
+            self._dispatch()
+        return task_id
+
+    def next_result(self):
+        """Wait for the next finished design.
+
+        out : (task_id, x, f, g)"""
+        if self._done:
+            result = self._done.popleft()
+        else:
+            if self.n_pending == 0:
+                raise RuntimeError("No design submitted")
+            result = self._receive()
+        task_id, x, f, g, error, elapsed, source = result
+        if error is not None:
+            raise RuntimeError("Evaluation of {} failed on rank {}: {}".format(
+                list(x), source, error))
+        self.n_evaluated += 1
+        self.busy_time[source] += elapsed
+        if self.archive is not None:
+            self.archive.append_problem_output(self.problem, x, f, g)
+        return task_id, x, f, g
+
+    def evaluate(self, X):
+        """Evaluate the rows of `X`, return `F` and `G` in the convention of
+        the problem, in the order of `X`"""
+        ids = {self.submit(x): i for i, x in enumerate(X)}
+        results = [None]*len(ids)
+        try:
+            while ids:
+                task_id, _, f, g = self.next_result()
+                results[ids.pop(task_id)] = (f, g)
+        except BaseException:
+            # Do not leave the other designs of X to the next calls
+            self.cancel(ids)
+            raise
+        F = np.array([f for f, _ in results], dtype=float)
+        G = np.array([g for _, g in results], dtype=float)
+        return F, G
+
+    def cancel(self, task_ids):
+        """Forget the tasks `task_ids`: the queued ones are dropped and the
+        results of the running ones are waited for and discarded, the
+        results of the other tasks are kept for :meth:`next_result`"""
+        task_ids = set(task_ids)
+        self._queue = deque(t for t in self._queue if t[0] not in task_ids)
+        self._done = deque(r for r in self._done if r[0] not in task_ids)
+        while task_ids.intersection(self._running.values()):
+            result = self._receive()
+            if result[0] not in task_ids:
+                self._done.append(result)
+
+    def close(self):
+        """Stop the workers (master only)"""
+        if self.is_master:
+            for rank in range(1, self.size):
+                self.comm.send(None, dest=rank, tag=TAG_STOP)
+
+
+def main(args=None):
+    """Evaluate random designs of a problem over all ranks.
+
+    $ mpirun -n 4 python -m modact.mpi cs3 100 [archive]
+    """
+    import sys
+
+    from .archive import EvaluationArchive
+    from .problems import get_problem
+
+    args = sys.argv[1:] if args is None else args
+    problem = get_problem(args[0])
+    n = int(args[1]) if len(args) > 1 else 100
+    archive = None
+    comm = MPI.COMM_WORLD
+    if len(args) > 2 and comm.Get_rank() == 0:
+        archive = EvaluationArchive.for_problem(args[2], problem)
+    evaluator = MPIEvaluator(problem, comm, archive)
+    if evaluator.start():
+        lb, ub = problem.bounds()
+        X = lb + np.random.default_rng(0).random((n, len(lb)))*(ub - lb)
+        t0 = time.perf_counter()
+        evaluator.evaluate(X)
+        elapsed = time.perf_counter() - t0
+        evaluator.close()
+        print("{} designs on {} ranks in {:.2f} s".format(
+            evaluator.n_evaluated, evaluator.size, elapsed))
+        print("Busy time per rank [s]: {}".format(
+            np.round(evaluator.busy_time, 2)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Multi-threaded evaluation of designs within one process.
+
+The evaluation of a design only touches objects created for that design
+(actuator, gears, meshes) and module level data that is read only, so
+:class:`~modact.problems.Problem` instances can be called concurrently from
+several threads. The stress computations run in the array kernels of
+:mod:`modact.models.kernels` (which release the GIL when compiled with
+numba) instead of `scipy.optimize.fsolve`, which serializes its callers.
+
+Threads do not make the evaluation faster on a regular CPython build: the
+work of a design is mostly Python code holding the GIL (the kernels run on
+arrays of a few elements and python-fcl holds the GIL during the collision
+checks), so :class:`ThreadPoolEvaluator` only makes concurrent calls safe.
+It is meant for free-threaded builds (3.13t), on which its scaling has not
+been measured yet.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class ThreadPoolEvaluator(object):
+    """Evaluate designs of `problem` with a pool of `n_threads` threads.
+
+    Does not scale with the GIL (see the module docstring). Can be used as
+    a context manager to shut down the pool."""
+
+    def __init__(self, problem, n_threads=None):
+        self.problem = problem
+        self.n_threads = n_threads or os.cpu_count()
+        self.executor = ThreadPoolExecutor(self.n_threads)
+
+    def map(self, X):
+        """Iterate over the results `(f, g)` of the rows of `X` in order"""
+        return self.executor.map(self.problem, X)
+
+    def __call__(self, X):
+        """Evaluate the rows of `X`, return the arrays `F` and `G` in the
+        convention of the problem"""
+        results = list(self.map(X))
+        F = np.array([f for f, _ in results], dtype=float)
+        G = np.array([g for _, g in results], dtype=float)
+        return F, G
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,178 @@
+"""Incremental archive of the non-dominated designs.
+
+Results are inserted one by one as they are evaluated and the archive only
+keeps the designs that are not dominated under the constrained dominance:
+
+* a feasible design dominates any infeasible design,
+* of two infeasible designs, the one with the smaller constraint violation
+  dominates,
+* otherwise the usual Pareto dominance applies.
+
+For two objectives, the front is kept sorted along the first objective so
+that an insertion only costs a binary search and the removal of the
+contiguous block of designs it dominates. For more objectives, the front is
+stored in a contiguous array and checked with vectorized comparisons.
+"""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+
+def non_dominated_mask(F):
+    """Return the mask of non-dominated rows of `F` (minimization)"""
+    F = np.asarray(F)
+    mask = np.ones(len(F), dtype=bool)
+    for i in range(len(F)):
+        if not mask[i]:
+            continue
+        dominated = np.all(F[i] <= F, axis=1) & np.any(F[i] < F, axis=1)
+        mask[dominated] = False
+    return mask
+
+
+class _SortedFront(object):
+    """Bi-objective front sorted by increasing f1 (and decreasing f2)"""
+
+    def __init__(self):
+        self.f1 = []
+        self.f2 = []
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def insert(self, F, item):
+        f1, f2 = F
+        # Last design with a smaller or equal f1 is the only one that can
+        # dominate (or be equal to) the new design
+        k = bisect_right(self.f1, f1)
+        if k > 0 and self.f2[k-1] <= f2:
+            if self.f1[k-1] < f1 or self.f2[k-1] < f2:
+                return False
+        # Designs from the first with f1 >= new f1 with f2 >= new f2 are
+        # dominated, they are contiguous
+        start = bisect_left(self.f1, f1)
+        stop = start
+        while stop < len(self.f2) and self.f2[stop] >= f2:
+            if self.f1[stop] == f1 and self.f2[stop] == f2:
+                # Keep duplicates
+                start = stop + 1
+            stop += 1
+        del self.f1[start:stop], self.f2[start:stop], self.items[start:stop]
+        self.f1.insert(start, f1)
+        self.f2.insert(start, f2)
+        self.items.insert(start, item)
+        return True
+
+    def objectives(self):
+        return np.column_stack([self.f1, self.f2]).reshape(-1, 2)
+
+
+class _ArrayFront(object):
+    """Front of any number of objectives in a growing array"""
+
+    def __init__(self, n_obj):
+        self.F = np.zeros((16, n_obj))
+        self.n = 0
+        self.items = []
+
+    def __len__(self):
+        return self.n
+
+    def insert(self, F, item):
+        front = self.F[:self.n]
+        le = front <= F
+        if np.any(np.all(le, axis=1) & np.any(front < F, axis=1)):
+            return False
+        dominated = np.all(front >= F, axis=1) & np.any(front > F, axis=1)
+        if dominated.any():
+            keep = ~dominated
+            n = np.count_nonzero(keep)
+            self.F[:n] = front[keep]
+            self.items = [it for it, k in zip(self.items, keep) if k]
+            self.n = n
+        if self.n == len(self.F):
+            self.F = np.concatenate([self.F, np.zeros_like(self.F)])
+        self.F[self.n] = F
+        self.items.append(item)
+        self.n += 1
+        return True
+
+    def objectives(self):
+        return self.F[:self.n].copy()
+
+
+def _make_front(n_obj):
+    return _SortedFront() if n_obj == 2 else _ArrayFront(n_obj)
+
+
+class ParetoArchive(object):
+    """Running set of non-dominated designs.
+
+    Objectives and constraints are given in the minimization convention of
+    pymoo (`F` minimized, `G <= 0` feasible), unless `weights` and
+    `c_weights` are given, in which case they are converted as for
+    :class:`modact.interfaces.pymoo.PymopProblem`.
+    """
+
+    def __init__(self, n_obj, weights=None, c_weights=None):
+        self.n_obj = n_obj
+        self.weights = None if weights is None else np.asarray(weights)
+        self.c_weights = None if c_weights is None else np.asarray(c_weights)
+        self.front = _make_front(n_obj)
+        self.best_cv = np.inf
+        self.n_added = 0
+
+    @classmethod
+    def for_problem(cls, problem):
+        """Archive accepting the raw outputs `(f, g)` of `problem`"""
+        return cls(len(problem.weights), problem.weights, problem.c_weights)
+
+    def __len__(self):
+        return len(self.front)
+
+    @property
+    def feasible(self):
+        return self.best_cv == 0
+
+    def add(self, f, g=(), x=None):
+        """Insert a design, return True if it enters the archive"""
+        F = np.asarray(f, dtype=float)
+        G = np.asarray(g, dtype=float)
+        if self.weights is not None:
+            F = -F * self.weights
+        if self.c_weights is not None:
+            G = G * self.c_weights
+        cv = float(np.maximum(G, 0).sum())
+        self.n_added += 1
+        if cv > self.best_cv:
+            return False
+        if cv < self.best_cv:
+            self.front = _make_front(self.n_obj)
+            self.best_cv = cv
+        return self.front.insert(F, (x, F, G))
+
+    def add_batch(self, F, G=None, X=None):
+        """Insert several designs, return the mask of the accepted ones"""
+        n = len(F)
+        if G is None:
+            G = np.zeros((n, 0))
+        if X is None:
+            X = [None]*n
+        return np.array([self.add(f, g, x) for f, g, x in zip(F, G, X)],
+                        dtype=bool)
+
+    @property
+    def F(self):
+        """Objectives of the front in the minimization convention"""
+        return np.array([it[1] for it in self.front.items]).reshape(
+            -1, self.n_obj)
+
+    @property
+    def G(self):
+        """Constraints of the front in the minimization convention"""
+        return np.array([it[2] for it in self.front.items])
+
+    @property
+    def X(self):
+        return np.array([it[0] for it in self.front.items])
@@ -1,14 +1,17 @@
+import itertools
 import re
 import typing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
 
 import attr
 import numpy as np
-import scipy.stats
-from cached_property import cached_property
 
+from .actuator import FIDELITIES, propagate_torque
 from .models import OperatingCondition
-from .models.motors import motor_names
-from .util import create_actuator_from_x
+from .models.motors import motor_names, speed_torque
+from .terms import (CONSTRAINT_TERMS, OBJECTIVE_TERMS, Quantities,
+                    dependencies, get_terms)
 
 op_set_1 = [
     OperatingCondition(speed=1.8, torque=0.8, V=9, imax=2.0),
@@ -21,121 +24,313 @@ op_set_2 = [
 ]
 
 
+def _as_array(values):
+    return np.atleast_1d(np.asarray(values, dtype=float))
+
+
+@attr.s(auto_attribs=True)
+class DutyCycle(object):
+    """Operating conditions stored as arrays, e.g. the points of a duty
+    cycle.
+
+    `V` and `imax` may be scalars. `weights` is the share of time of each
+    condition (uniform by default), used by the weighted aggregation.
+    Iterating gives the conditions one by one, so that a duty cycle can be
+    used wherever a list of conditions is expected."""
+    speed: np.ndarray = attr.ib(converter=_as_array)
+    torque: np.ndarray = attr.ib(converter=_as_array)
+    V: np.ndarray = attr.ib(converter=_as_array)
+    imax: np.ndarray = attr.ib(converter=_as_array)
+    weights: np.ndarray = attr.ib(
+        default=None, converter=attr.converters.optional(_as_array))
+
+    def __attrs_post_init__(self):
+        n = len(self.speed)
+        self.torque, self.V, self.imax = (
+            np.broadcast_to(a, (n,)) for a in (self.torque, self.V, self.imax))
+        weights = np.ones(n) if self.weights is None else self.weights
+        self.weights = np.broadcast_to(weights/weights.sum(), (n,))
+
+    @classmethod
+    def from_conditions(cls, conditions, weights=None):
+        return cls(*zip(*[(op.speed, op.torque, op.V, op.imax)
+                          for op in conditions]), weights=weights)
+
+    def __len__(self):
+        return len(self.speed)
+
+    def __iter__(self):
+        for values in zip(self.speed.tolist(), self.torque.tolist(),
+                          self.V.tolist(), self.imax.tolist()):
+            yield OperatingCondition(*values)
+
+
+def hmean(values, axis=None):
+    """Harmonic mean along `axis` (int or tuple), as
+    :func:`scipy.stats.hmean` without its overhead on small arrays: null
+    values give 0 and negative values NaN"""
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide='ignore'):
+        mean = 1/np.mean(1/values, axis=axis)
+    return np.where(np.any(values < 0, axis=axis), np.nan, mean)[()]
+
+
+# Aggregations of the indicators over the operating conditions
+AGGREGATIONS = ('min', 'hmean', 'weighted')
+
+
+def aggregate(values, how, weights=None, axis=-1):
+    """Aggregate `values` over the operating conditions (`axis`) with the
+    minimum, the harmonic mean or the mean weighted by `weights`"""
+    values = np.asarray(values, dtype=float)
+    if how == 'min':
+        return values.min(axis=axis)
+    if how == 'hmean':
+        return hmean(np.maximum(values, 0), axis=axis)
+    if how == 'weighted':
+        return np.average(values, axis=axis, weights=weights)
+    raise ValueError("Unknown aggregation {}".format(how))
+
+
+def _set_weights(obj):
+    """Set the `weights` of the objectives or constraints `obj` (a class or
+    an instance) from its terms, unless a class defines them explicitly"""
+    if isinstance(obj, type) and 'weights' in vars(obj):
+        return
+    obj.weights = sum((term.weights for term in obj.terms), ())
+
+
 class Objectives(object):
+    """Objectives of the problems, defined by a list of terms (see
+    :mod:`modact.terms`), given by name or as :class:`~modact.terms.Term`.
+
+    The indicators evaluated for each operating condition (torque margin,
+    safety factors, efficiency) are combined following `aggregation`, one
+    of `AGGREGATIONS`. By default (None), the definitions of the benchmark
+    problems are used: worst torque margin and efficiency, and harmonic
+    mean of the safety factors over the gears and the conditions. The
+    torque margin can be negative and uses the minimum with `hmean`.
+
+    The indicators also apply to stacked designs, with an additional first
+    axis, see :meth:`batch`."""
+    terms = ()
     # Problems are defined for maximization
-    weights = tuple()
-    ref = tuple()
+    weights = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _set_weights(cls)
+
+    def __init__(self, aggregation=None, terms=None):
+        if aggregation is not None and aggregation not in AGGREGATIONS:
+            raise ValueError("Unknown aggregation {}".format(aggregation))
+        self.aggregation = aggregation
+        if terms is not None:
+            self.terms = get_terms(terms, OBJECTIVE_TERMS)
+            _set_weights(self)
+
+    def evaluate(self, quantities):
+        """Objectives from the :class:`~modact.terms.Quantities` (or a
+        mapping) of a design"""
+        return [value for term in self.terms
+                for value in term(self, quantities)]
 
-    def __call__(self, *args, **kwargs):
-        return tuple()
+    def __call__(self, actuator, output, t_err, kinematic, resistance):
+        return self.evaluate(Quantities(
+            actuator=actuator, output=output, t_err=t_err,
+            kinematic=kinematic, resistance=resistance))
+
+    def batch(self, cost, output, t_err, kinematic, resistance, i_gp=None):
+        """Objectives of stacked designs.
+
+        `cost` and `i_gp` are arrays (n_designs,), `output` a condition of
+        arrays (n_designs, n_conditions), `t_err` an array (n_designs,
+        n_conditions) and `resistance` an array (n_designs, n_gears,
+        n_conditions, 4). The weights of the conditions are taken from
+        `output.weights` if present.
+
+        out : array (n_designs, n_objectives)"""
+        quantities = dict(cost=cost, output=output, t_err=t_err,
+                          kinematic=kinematic, resistance=resistance,
+                          i_gp=i_gp)
+        values = self.evaluate(quantities)
+        if not values:
+            return np.zeros((len(cost), 0))
+        return np.column_stack(values)
+
+    def torque(self, output, t_err):
+        if self.aggregation == 'weighted':
+            return aggregate(t_err, 'weighted', _weights(output))
+        return np.min(t_err, axis=-1)
+
+    def security(self, output, resistance):
+        root = resistance[..., 2:4]
+        if self.aggregation is not None:
+            root = aggregate(root, self.aggregation, _weights(output),
+                             axis=-2)
+            return hmean(root, axis=(-2, -1))
+        return hmean(root, axis=(-3, -2, -1))
+
+    def efficiency(self, output):
+        if hasattr(output, 'speed'):
+            # Condition of arrays
+            eff = output.speed*output.torque/(output.imax*output.V)
+        else:
+            eff = [op.speed * op.torque/(op.imax*op.V) for op in output]
+        if self.aggregation is None:
+            return np.min(eff, axis=-1)
+        return aggregate(eff, self.aggregation, _weights(output))
+
+
+def _weights(output):
+    return getattr(output, 'weights', None)
 
 
 class Constraints(object):
-    weights = tuple()
+    """Constraints of the problems, defined by a list of terms (see
+    :mod:`modact.terms`) evaluated from the cheapest stages (kinematic,
+    torque) to the most expensive ones (resistance, geometry).
+
+    `min_t` is the torque margin required for every operating condition
+    (set by :func:`build_problem` if None).
+    The constraint functions also apply to stacked designs, in which case
+    the arrays have an additional first axis and one array per constraint
+    is returned."""
+    terms = ()
+    weights = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _set_weights(cls)
+
+    def __init__(self, min_t=None, terms=None):
+        self.min_t = min_t
+        if terms is not None:
+            self.terms = get_terms(terms, CONSTRAINT_TERMS)
+            _set_weights(self)
 
-    def __call__(self, *args, **kwargs):
-        return tuple()
+    @property
+    def stages(self):
+        # Evaluation stage of each constraint
+        return sum(((term.stage,)*len(term.weights) for term in self.terms),
+                   ())
+
+    def evaluate(self, quantities, stages=None):
+        """Constraints from the :class:`~modact.terms.Quantities` (or a
+        mapping) of a design, only the ones of `stages` if given"""
+        return tuple(value for term in self.terms
+                     if stages is None or term.stage in stages
+                     for value in term(self, quantities))
 
+    def __call__(self, actuator, output, t_err, kinematic, resistance):
+        return self.evaluate(Quantities(
+            actuator=actuator, output=output, t_err=t_err,
+            kinematic=kinematic, resistance=resistance))
+
+    def batch(self, t_err, kinematic, resistance, geometric=()):
+        """Constraints of stacked designs (see :meth:`Objectives.batch`),
+        `kinematic` being an array (n_designs, n_gears, 4). The geometric
+        constraints depend on the actuators and are given as a sequence of
+        arrays (n_designs,) in the order of the constraints.
+
+        out : array (n_designs, n_constraints)"""
+        geometric = iter(geometric)
+        quantities = dict(t_err=t_err, kinematic=kinematic,
+                          resistance=resistance)
+        columns = []
+        for term in self.terms:
+            if term.stage == 'geometry':
+                columns.extend(next(geometric) for _ in term.weights)
+            else:
+                columns.extend(term(self, quantities))
+        return np.column_stack(columns)
+
+    def geometric_constraints(self, actuator):
+        return self.evaluate(Quantities(actuator=actuator), ('geometry',))
+
+    def kinematic_constraints(self, kinematic):
+        gkconsts = kinematic.min(axis=-2)
+        gkconsts[..., 1:] /= [1.1, 5, 5]
+        gkconsts[..., 1:] += [-1, 1, 1]
+        return tuple(gkconsts.T)
+
+    def resistance_constraints(self, resistance):
+        min_h = resistance[..., :2].min(axis=(-3, -2, -1)) - 1
+        min_f = resistance[..., 2:4].min(axis=(-3, -2, -1)) - 1
+        return (min_h, min_f)
+
+    def torque_constraints(self, t_err):
+        return (np.min(t_err, axis=-1) + self.min_t,)
 
-class CT(Objectives):
-    weights = (-1, 1)
 
-    def __call__(self, actuator, output, t_err, kinematic, resistance):
-        return [sum(actuator.cost(True)), min(t_err)]
+class CT(Objectives):
+    terms = get_terms(['cost', 'torque'], OBJECTIVE_TERMS)
 
 
 class CS(Objectives):
-    weights = (-1, 1)
-
-    def __call__(self, actuator, output, t_err, kinematic, resistance):
-        return [sum(actuator.cost(True)),
-                scipy.stats.hmean(resistance[:, :, 2:4], axis=None)]
+    terms = get_terms(['cost', 'security'], OBJECTIVE_TERMS)
 
 
 class CTS(Objectives):
-    weights = (-1, 1, 1)
-
-    def __call__(self, actuator, output, t_err, kinematic, resistance):
-        return [sum(actuator.cost(True)), min(t_err),
-                scipy.stats.hmean(resistance[:, :, 2:4], axis=None)]
+    terms = get_terms(['cost', 'torque', 'security'], OBJECTIVE_TERMS)
 
 
 class CTSE(Objectives):
-    weights = (-1, 1, 1, 1)
-
-    def __call__(self, actuator, output, t_err, kinematic, resistance):
-        eff = [op.speed * op.torque/(op.imax*op.V) for op in output]
-        return [sum(actuator.cost(True)), min(t_err),
-                scipy.stats.hmean(resistance[:, :, 2:4], axis=None),
-                min(eff)]
+    terms = get_terms(['cost', 'torque', 'security', 'efficiency'],
+                      OBJECTIVE_TERMS)
 
 
 class CTSEI(Objectives):
-    weights = (-1, 1, 1, 1, -1)
-
-    def __call__(self, actuator, output, t_err, kinematic, resistance):
-        eff = [op.speed * op.torque/(op.imax*op.V) for op in output]
-        return [sum(actuator.cost(True)), min(t_err),
-                scipy.stats.hmean(resistance[:, :, 2:4], axis=None),
-                min(eff), actuator.i_gp]
+    terms = get_terms(['cost', 'torque', 'security', 'efficiency', 'ratio'],
+                      OBJECTIVE_TERMS)
 
 
 class C1(Constraints):
-    weights = (-1, -1, -1, -1, -1, -1, -1)
-
-    def __init__(self, min_t):
-        self.min_t = min_t
-
-    def __call__(self, actuator, output, t_err, kinematic, resistance):
-        gkconsts = kinematic.min(axis=0)
-        gkconsts[1:] /= [1.1, 5, 5]
-        gkconsts[1:] += [-1, 1, 1]
-        min_h = resistance[:, :, :2].min() - 1
-        min_f = resistance[:, :, 2:4].min() - 1
-        min_t_err = min(t_err) + self.min_t
-        return (*gkconsts, min_h, min_f, min_t_err)
+    terms = get_terms(['kinematic', 'resistance', 'torque'],
+                      CONSTRAINT_TERMS)
 
 
 class C2(C1):
-    weights = C1.weights + (1,)
-
-    def __call__(self, actuator, *args):
-        csts = super().__call__(actuator, *args)
-        return csts + (actuator.internal_collisions(),)
+    terms = C1.terms + get_terms(['collisions'], CONSTRAINT_TERMS)
 
 
 class C3(C2):
-    weights = C2.weights + (1, 1)
-
-    def __call__(self, actuator, *args):
-        csts = super().__call__(actuator, *args)
-        _, _, space = actuator.mesh
-        bb_bounds = space.bounding_box.extents[1:] / [50., 35.] - 1
-        return (*csts, *bb_bounds)
+    terms = C2.terms + get_terms(['extents'], CONSTRAINT_TERMS)
 
 
 class C4(C2):
-    weights = C2.weights + (1,)
-
-    def __call__(self, actuator, *args):
-        csts = super().__call__(actuator, *args)
-        meshes, _, _ = actuator.mesh
-        output = np.linalg.norm(meshes[-1].primitive.transform[:2, 3] - [40., 0.])
-        output = max(0, output - .5)
-        return csts + (output/10.,)
+    terms = C2.terms + get_terms(['output'], CONSTRAINT_TERMS)
 
 
 class C5(C2):
     """Combine all constraints, only for analysis"""
-    weights = C2.weights + (1, 1, 1)
+    terms = C2.terms + get_terms(['extents', 'output'], CONSTRAINT_TERMS)
 
-    def __call__(self, actuator, *args):
-        csts = super().__call__(actuator, *args)
-        meshes, _, space = actuator.mesh
-        bb_bounds = space.bounding_box.extents[1:] / [50., 35.] - 1
-        output = np.linalg.norm(meshes[-1].primitive.transform[:2, 3] - [40., 0.])
-        output = max(0, output - .5)
-        return csts + (*bb_bounds, output/10.,)
+
+@attr.s(auto_attribs=True)
+class Screening(object):
+    """Staged evaluation of the constraints.
+
+    Constraints are evaluated from the cheapest stages (kinematics and
+    torque) to the most expensive ones (stresses, then geometry). As soon as
+    the total constraint violation exceeds `margin`, the remaining stages
+    are skipped and each of their constraints is set to a violation of
+    `penalty` plus the violation of the evaluated ones.
+
+    As long as `penalty` is larger than the total violation of the skipped
+    constraints, the violation of a skipped design is thus never smaller
+    than its real one, and skipped designs rank after all the fully
+    evaluated ones (whose violations are below `penalty`) and between
+    themselves by their observed violation. The stress constraints are
+    violated by at most 1 each (the safety factors are not negative) and
+    the geometric ones by a few units within the bounds of the problems,
+    hence the default `penalty`.
+    The objectives of a design skipped before the stress stage use null
+    safety factors and the ones of a design skipped before the geometry
+    stage use the low fidelity geometry.
+    """
+    margin: float = 0.
+    penalty: float = 1000.
 
 
 @attr.s(auto_attribs=True)
@@ -145,6 +340,8 @@ class Problem(object):
     objectives: Objectives
     constraints: Constraints
     n_stages: int
+    fidelity: str = 'full'
+    screening: typing.Optional[Screening] = None
 
     @property
     def weights(self):
@@ -166,19 +363,206 @@ class Problem(object):
             ub.extend([41-1e-6, 81-1e-6, 1.0, 15., 20, np.pi])
         return np.array(lb), np.array(ub)
 
-    def prepare(self, x):
-        actuator = create_actuator_from_x(x, self.n_stages, True)
+    def operating_points(self, actuator):
+        """Output conditions of `actuator` for the operating conditions of
+        the problem, conditions at the input of each component and torque
+        margin of each condition"""
         control = actuator.matched_speed_control(self.op)
         output, op_per_comp = actuator.get_speed_torque(control)
-        kinematic, resistance = actuator.gear_constraints(op_per_comp)
         t_err = [op.torque - op_t.torque for op_t, op in zip(self.op, output)]
-        return actuator, output, t_err, kinematic, resistance
+        return output, op_per_comp, t_err
+
+    def batch_operating_points(self, actuators):
+        """:meth:`operating_points` of several actuators.
+
+        The actuators made of a stepper followed by gear pairs are grouped
+        by motor: the motor model is evaluated once per motor on the arrays
+        of the designs using it, and the outputs of all the motors are
+        propagated through the gear pairs at once."""
+        if not all(actuator.is_gear_train for actuator in actuators):
+            return [self.operating_points(a) for a in actuators]
+        speed, V, imax = np.array([(op.speed, op.V, op.imax)
+                                   for op in self.op]).T
+        steppers = [actuator.components[0] for actuator in actuators]
+        i_tot = np.array([actuator.i for actuator in actuators])
+        ratios = np.array([[gear.i for gear in actuator.components[1:]]
+                           for actuator in actuators]).reshape(
+                               len(actuators), -1)
+        coils = np.array([(s.R, s.Nw) for s in steppers]).reshape(-1, 2)
+
+        # Designs sharing a motor record are contiguous in `order`
+        keys = {}
+        motor_ids = np.array([keys.setdefault(id(s.motor), len(keys))
+                              for s in steppers])
+        order = np.argsort(motor_ids, kind='stable')
+        groups = np.split(order, np.flatnonzero(np.diff(
+            motor_ids[order])) + 1)
+        omega, torque, current = np.empty((3, len(actuators), len(speed)))
+        for group in groups:
+            control = OperatingCondition(speed*i_tot[group, None], 0, V, imax)
+            out = speed_torque(steppers[group[0]].motor, coils[group, :1],
+                               coils[group, 1:], control)
+            omega[group], torque[group], current[group] = (
+                out.speed, out.torque, out.imax)
+        prop = propagate_torque(omega, torque, current, imax, ratios)
+
+        results = []
+        for actuator, speeds, torques, i in zip(
+                actuators, prop.speed.tolist(), prop.torque.tolist(),
+                current.tolist()):
+            op_per_comp = [actuator.matched_speed_control(self.op)]
+            for speed_k, torque_k in zip(speeds, torques):
+                op_per_comp.append([
+                    OperatingCondition(*values)
+                    for values in zip(speed_k, torque_k, V.tolist(), i)])
+            output = op_per_comp.pop()
+            t_err = [op.torque - op_t.torque
+                     for op_t, op in zip(self.op, output)]
+            results.append((output, op_per_comp, t_err))
+        return results
+
+    @property
+    def requires(self):
+        """Intermediate quantities computed to evaluate a design, see
+        :mod:`modact.terms`"""
+        terms = self.objectives.terms + self.constraints.terms
+        return dependencies([r for term in terms for r in term.requires])
+
+    def quantities(self, x):
+        """Lazily computed intermediate quantities of the design `x`"""
+        return Quantities(self, x=x)
+
+    def prepare(self, x):
+        q = self.quantities(x)
+        return (q['actuator'], q['output'], q['t_err'], q['kinematic'],
+                q['resistance'])
 
     def __call__(self, x):
-        actuator, output, t_err, kinematic, resistance = self.prepare(x)
-        obj = self.objectives(actuator, output, t_err, kinematic, resistance)
-        csts = self.constraints(actuator, output, t_err, kinematic, resistance)
-        return (obj, csts)
+        if self.screening is not None:
+            return self.staged_call(x)
+        q = self.quantities(x)
+        return (self.objectives.evaluate(q), self.constraints.evaluate(q))
+
+    def staged_call(self, x, quantities=None):
+        """Evaluate `x` following the `screening` settings"""
+        screening = self.screening or Screening()
+        c = self.constraints
+        stages = np.array(c.stages)
+        w = np.array(c.weights, dtype=float)
+        g = np.full(len(w), np.nan)
+        q = self.quantities(x) if quantities is None else quantities
+
+        def violation():
+            return np.nansum(np.maximum(g*w, 0))
+
+        def evaluate(*names):
+            for name in names:
+                g[stages == name] = c.evaluate(q, (name,))
+
+        evaluate('kinematic', 'torque')
+        if violation() <= screening.margin:
+            evaluate('resistance')
+            if violation() <= screening.margin:
+                evaluate('geometry')
+        if 'resistance' not in q:
+            q['resistance'] = np.zeros((len(q['kinematic']),
+                                        len(q['t_err']), 4))
+        if np.isnan(g[stages == 'geometry']).any():
+            q['actuator'].fidelity = 'low'
+
+        skipped = np.isnan(g)
+        g[skipped] = (screening.penalty + violation()) * w[skipped]
+        return (self.objectives.evaluate(q), tuple(g))
+
+    def evaluate_chunk(self, X):
+        """Evaluate the rows of `X`.
+
+        out : (F, G) arrays in the convention of the problem"""
+        F = np.zeros((len(X), len(self.weights)))
+        G = np.zeros((len(X), len(self.c_weights)))
+        for k, x in enumerate(X):
+            F[k], G[k] = self(x)
+        return F, G
+
+    def iter_evaluate(self, xs, chunk_size=1000, executor=None, ordered=True,
+                      max_pending=None):
+        """Evaluate the designs of the iterable `xs` by chunks.
+
+        The designs are consumed lazily, so that `xs` can be a generator or
+        a memory-mapped array, and blocks `(X, F, G)` of at most `chunk_size`
+        designs are yielded. With an `executor` (from
+        :mod:`concurrent.futures` or an object with the same `submit`
+        method), the chunks are evaluated in parallel and at most
+        `max_pending` chunks are in memory. `max_pending` is required with
+        an executor, since the number of workers of an executor is not
+        public (2 per worker keeps them busy). If `ordered` is False, the
+        blocks are yielded as soon as they are evaluated.
+        """
+        if executor is not None and max_pending is None:
+            raise ValueError("max_pending is required with an executor")
+        xs = iter(xs)
+
+        def chunks():
+            while True:
+                X = np.array(list(itertools.islice(xs, chunk_size)),
+                             dtype=float)
+                if len(X) == 0:
+                    return
+                yield X
+
+        if executor is None:
+            for X in chunks():
+                yield (X, *self.evaluate_chunk(X))
+            return
+
+        pending = deque()
+
+        def done():
+            if ordered:
+                X, future = pending.popleft()
+            else:
+                finished, _ = wait([f for _, f in pending],
+                                   return_when=FIRST_COMPLETED)
+                k = next(k for k, (_, f) in enumerate(pending)
+                         if f in finished)
+                X, future = pending[k]
+                del pending[k]
+            return (X, *future.result())
+
+        for X in chunks():
+            if len(pending) >= max_pending:
+                yield done()
+            pending.append((X, executor.submit(self.evaluate_chunk, X)))
+        while pending:
+            yield done()
+
+
+@attr.s(auto_attribs=True)
+class DutyCycleProblem(Problem):
+    """Problem evaluated on a duty cycle.
+
+    The operating conditions `op` are a :class:`DutyCycle`: the motor, the
+    propagation through the gear pairs and the stresses are computed on all
+    the conditions at once with array operations instead of one condition
+    at a time. The objectives combine the conditions following their
+    `aggregation` and the torque and stress constraints apply to the worst
+    condition."""
+
+    def operating_points(self, actuator):
+        cycle = self.op
+        control = OperatingCondition(cycle.speed*actuator.i, 0, cycle.V,
+                                     cycle.imax)
+        prop = actuator.propagate(control)
+        op_per_comp = [control] + [
+            OperatingCondition(speed, torque, cycle.V, prop.current)
+            for speed, torque in zip(prop.speed[:-1], prop.torque[:-1])]
+        output = DutyCycle(prop.speed[-1], prop.torque[-1], cycle.V,
+                           prop.current, cycle.weights)
+        return output, op_per_comp, output.torque - cycle.torque
+
+    def batch_operating_points(self, actuators):
+        # The conditions are already evaluated at once for each actuator
+        return [self.operating_points(a) for a in actuators]
 
 
 OBJECTIVES = {
@@ -199,22 +583,61 @@ CONSTRAINTS = {
 }
 
 
-def get_problem(name, op_set=op_set_2):
-    m = re.match(r"^(c(t|s)s?e?i?)([1-9])(s[1-9])?$", name)
-    if m is None:
+def build_problem(name, objectives, constraints, n_stages=3, op_set=op_set_2,
+                  fidelity='full', screening=None, aggregation=None):
+    """Create a problem from its objectives and constraints.
+
+    `objectives` and `constraints` are :class:`Objectives` and
+    :class:`Constraints` or lists of terms, given by name (see
+    `modact.terms.OBJECTIVE_TERMS` and `CONSTRAINT_TERMS`) or as
+    :class:`~modact.terms.Term`. Only the quantities required by the terms
+    are computed (see `Problem.requires`). Unless set in `constraints`, the
+    required torque margin is the smallest torque of `op_set` if the torque
+    is an objective, and null otherwise.
+    """
+    if not isinstance(objectives, Objectives):
+        objectives = Objectives(aggregation, objectives)
+    if not isinstance(constraints, Constraints):
+        constraints = Constraints(terms=constraints)
+    if constraints.min_t is None:
+        if any(term.name == 'torque' for term in objectives.terms):
+            constraints.min_t = min([op.torque for op in op_set])-0.001
+        else:
+            constraints.min_t = 0+0.001
+    cls = DutyCycleProblem if isinstance(op_set, DutyCycle) else Problem
+    return cls(name=name, objectives=objectives, constraints=constraints,
+               n_stages=n_stages, op=op_set, fidelity=fidelity,
+               screening=screening)
+
+
+def get_problem(name, op_set=op_set_2, screening=None):
+    """Create problem from its name, e.g. `cs3` or `ctsei4s2`.
+
+    The name gives the objectives (`OBJECTIVES`), the constraints
+    (`CONSTRAINTS`) and optionally the number of gear stages (3 by default).
+    The fidelity of the geometric constraints is selected with a suffix, e.g.
+    `cs3@low`. Low fidelity uses coarse cylinders for the convex hull and
+    analytic collisions and bounding box. Full fidelity (`@full`) is the
+    default. The fidelity can be changed later through `Problem.fidelity`.
+    """
+    base_name, _, fidelity = name.partition('@')
+    fidelity = fidelity or 'full'
+    m = re.match(r"^([a-z]+)([1-9])(?:s([1-9]))?$", base_name)
+    if (m is None or fidelity not in FIDELITIES or
+            m.group(1).upper() not in OBJECTIVES or
+            "C" + m.group(2) not in CONSTRAINTS):
         raise NotImplementedError("Unable to parse {}".format(name))
 
-    o_name = m.group(1).upper()
-    o = OBJECTIVES[o_name]()
-
-    if "T" not in o_name:
-        min_t = 0+0.001
-    else:
-        min_t = min([op.torque for op in op_set])-0.001
-    c_name = "C" + m.group(3)
-    c = CONSTRAINTS[c_name](min_t)
+    o = OBJECTIVES[m.group(1).upper()]()
+    c = CONSTRAINTS["C" + m.group(2)]()
+    n_stages = int(m.group(3)) if m.group(3) else 3
+    return build_problem(name, o, c, n_stages, op_set, fidelity, screening)
 
-    n_stages = int(m.group(4)[1]) if m.group(4) else 3
 
-    prob = Problem(name=name, objectives=o, constraints=c, n_stages=n_stages, op=op_set)
+def get_duty_cycle_problem(name, cycle, aggregation=None, screening=None):
+    """Create the problem `name` (see :func:`get_problem`) evaluated on the
+    :class:`DutyCycle` `cycle`, the objectives being combined over the
+    conditions following `aggregation` (see :class:`Objectives`)."""
+    prob = get_problem(name, cycle, screening)
+    prob.objectives = Objectives(aggregation, prob.objectives.terms)
     return prob
@@ -0,0 +1,217 @@
+"""Registries of the motors and materials.
+
+A :class:`Registry` holds immutable records (attrs classes) identified by a
+name and a numeric id, which is their position in the registry. The numeric
+properties of all records are also available as a read-only structured
+array `table` indexed by id, for vectorized computations. Records are added
+with :meth:`Registry.register` or loaded in bulk from files:
+
+- CSV with a header row (`name` column and one column per property),
+- JSON, either a mapping `{name: {property: value}}` or a list of objects
+  with a `name` key,
+- columnar `.npz` files (one array per column) or `.parquet` files (requires
+  pyarrow).
+
+Files added with :meth:`Registry.add_source` (or listed in the environment
+variable of the registry, separated by `os.pathsep`) are only read on the
+first access to the registry. Ids of the existing records never change, new
+records are appended, and lookups by name or id are dictionary or array
+accesses whatever the size of the registry.
+"""
+import collections.abc
+import csv
+import json
+import os
+import threading
+
+import attr
+import numpy as np
+
+
+def read_records(path):
+    """Read the rows of a CSV, JSON, NPZ or Parquet file as dicts with a
+    `name` key"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        with open(path, newline='') as f:
+            return [dict(row) for row in csv.DictReader(f)]
+    if ext == '.json':
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [dict(values, name=name) for name, values in data.items()]
+        return list(data)
+    if ext == '.npz':
+        with np.load(path) as data:
+            columns = {key: data[key].tolist() for key in data.files}
+    elif ext == '.parquet':
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow is required to read {}".format(path))
+        columns = pyarrow.parquet.read_table(path).to_pydict()
+    else:
+        raise ValueError("Unknown file format {}".format(path))
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+
+class _Names(collections.abc.Sequence):
+    """Live read-only sequence of the names of the records of a registry,
+    the pending sources of the registry are loaded before any access"""
+
+    def __init__(self, registry, names):
+        self._registry = registry
+        self._names = names
+
+    def __len__(self):
+        self._registry._load()
+        return len(self._names)
+
+    def __getitem__(self, key):
+        self._registry._load()
+        return self._names[key]
+
+    def __iter__(self):
+        self._registry._load()
+        return iter(list(self._names))
+
+    def __contains__(self, name):
+        self._registry._load()
+        return name in self._registry._index
+
+    def index(self, name, *args):
+        self._registry._load()
+        return self._names.index(name, *args)
+
+    def __eq__(self, other):
+        if isinstance(other, collections.abc.Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class Registry(object):
+    """Registry of records of type `record_type`.
+
+    `validate(record)` is called on each new record and raises ValueError
+    if it is invalid. `env` is the name of an environment variable listing
+    files to load lazily."""
+
+    def __init__(self, record_type, records=(), validate=None, env=None):
+        self.record_type = record_type
+        self.fields = tuple(f.name for f in attr.fields(record_type)
+                            if f.name != 'name')
+        self.validate = validate
+        # Live list of the names: its length follows the registry
+        self._names = []
+        self.names = _Names(self, self._names)
+        self._records = {}
+        self._index = {}
+        self._table = None
+        self._sources = []
+        self._lock = threading.RLock()
+        for record in records:
+            self._add(record, replace=False)
+        if env is not None and os.environ.get(env):
+            for path in os.environ[env].split(os.pathsep):
+                self.add_source(path)
+
+    def _add(self, record, replace):
+        if not isinstance(record, self.record_type):
+            record = self.from_dict(record)
+        for field in self.fields:
+            value = getattr(record, field)
+            if not np.isfinite(value):
+                raise ValueError("Invalid {} of {}: {}".format(
+                    field, record.name, value))
+        if self.validate is not None:
+            self.validate(record)
+        if record.name in self._records:
+            if not replace:
+                raise ValueError("{} is already registered".format(
+                    record.name))
+        else:
+            self._index[record.name] = len(self._names)
+            self._names.append(record.name)
+        self._records[record.name] = record
+        self._table = None
+
+    def from_dict(self, data):
+        """Create a record from a dict, converting the values to float"""
+        data = dict(data)
+        name = str(data.pop('name'))
+        try:
+            if hasattr(self.record_type, 'from_dict'):
+                return self.record_type.from_dict(name, data)
+            return self.record_type(name=name, **{k: float(v)
+                                                  for k, v in data.items()})
+        except (TypeError, KeyError) as e:
+            raise ValueError("Invalid properties of {}: {}".format(name, e))
+
+    def register(self, records, replace=False):
+        """Add records (instances of `record_type` or dicts)"""
+        self._load()
+        with self._lock:
+            if isinstance(records, (self.record_type, dict)):
+                records = [records]
+            for record in records:
+                self._add(record, replace)
+
+    def load(self, path, replace=False):
+        """Add the records of a file"""
+        self.register(read_records(path), replace)
+
+    def add_source(self, path):
+        """Add the records of a file on the first access"""
+        with self._lock:
+            self._sources.append(path)
+
+    def _load(self):
+        if self._sources:
+            with self._lock:
+                while self._sources:
+                    path = self._sources.pop(0)
+                    for record in read_records(path):
+                        self._add(record, replace=False)
+
+    def __len__(self):
+        self._load()
+        return len(self.names)
+
+    def __contains__(self, name):
+        self._load()
+        return name in self._records
+
+    def __iter__(self):
+        return iter(list(self.names))
+
+    def __getitem__(self, key):
+        """Record from its name or id"""
+        self._load()
+        if isinstance(key, str):
+            return self._records[key]
+        return self._records[self._names[int(key)]]
+
+    def index(self, name):
+        """Id of a record"""
+        self._load()
+        return self._index[name]
+
+    @property
+    def table(self):
+        """Read-only structured array of the properties indexed by id"""
+        self._load()
+        table = self._table
+        if table is None:
+            with self._lock:
+                records = [self._records[name] for name in self._names]
+                table = np.array(
+                    [tuple(getattr(r, f) for f in self.fields)
+                     for r in records],
+                    dtype=[(f, 'f8') for f in self.fields])
+                table.flags.writeable = False
+                self._table = table
+        return table
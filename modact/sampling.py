@@ -0,0 +1,329 @@
+"""Generation of initial designs satisfying the cheap constraints.
+
+Uniform samples in the bounds of the problems are mostly infeasible, in
+particular for the bounding box (C3) and output position (C4) constraints.
+:class:`DesignSampler` draws candidates with a Latin hypercube, a scrambled
+Sobol sequence or uniformly (:mod:`scipy.stats.qmc`) and selects the ones
+with the lowest violation of the constraints, computed analytically for a
+whole population at once (see :func:`cheap_constraints`). The constraints on
+the gears and on the torque are exact, the geometric constraints are the
+ones of the low fidelity (analytic collisions and bounding box). For the
+problems with an output position constraint, the angles of the last two
+stages are set to reach the output position when possible.
+
+As few random designs satisfy all the constraints, the selection also
+returns near-feasible designs. The candidates and
+their violation of the cheap constraints are stored in a bank (a `.npy`
+file in `<cache_dir>/samples`) per problem, method and seed, so that the
+same initial populations can be drawn again instantly. The name of the
+bank includes a hash of the operating conditions, the constraints, the
+bounds and the motors of the problem (see :func:`problem_hash`)::
+
+    X = DesignSampler(get_problem('cs3'), 'sobol', seed=1).sample(100)
+"""
+import hashlib
+import os
+import warnings
+
+import numpy as np
+from scipy.stats import qmc
+
+from .actuator import SECTIONS, propagate_torque
+from .catalogue import cache_dir
+from .codec import Codec
+from .materials import get_material
+from .models.kernels import (ALPHA, gear_pair_kinematics, gear_pair_security,
+                             stepper_speed_torque)
+from .models.motors import motors
+
+METHODS = ('lhs', 'sobol', 'uniform')
+
+
+def layout(designs, alpha_p):
+    """Cylinders of the actuators of decoded `designs` (see
+    :meth:`~modact.codec.Codec.decode`), as :meth:`Actuator.cylinders`.
+
+    `alpha_p` is the working pressure angle of each stage, of shape
+    (n_designs, n_stages).
+
+    out : centers (n, n_cyl, 3), radius (n, n_cyl), height (n, n_cyl)"""
+    n, n_stages = designs['stages'].shape
+    centers = np.zeros((n, 1 + 2*n_stages, 3))
+    radius = np.zeros((n, 1 + 2*n_stages))
+    height = np.zeros((n, 1 + 2*n_stages))
+    margin = 0.001  # GearPair.stretch_margin
+    motor = designs['motor']
+    radius[:, 0] = motors.table['r'][motor]
+    height[:, 0] = motors.table['h'][motor]
+    xy = np.zeros((n, 2))
+    z = height[:, 0]/2
+    centers[:, 0, 2] = z
+    theta = np.zeros(n)
+    last_height = height[:, 0]
+    for k in range(n_stages):
+        s = designs['stages'][:, k]
+        sign = np.where(s['disp'] != 0, np.sign(s['disp']), 1.)
+        h = s['b']*s['m']
+        stretch = np.maximum(0, np.abs(s['disp']) - margin)
+        z = z + sign*last_height/2
+        z = z + np.where(np.abs(s['disp']) < margin,
+                         s['disp'] + sign*h/2,
+                         sign*(h + stretch + 2*margin)/2)
+        theta = theta + s['angle']
+        m_p = s['m']*np.cos(ALPHA)/np.cos(alpha_p[:, k])
+        centers[:, 1+2*k, :2] = xy
+        centers[:, 1+2*k, 2] = z
+        radius[:, 1+2*k] = m_p*s['Z1']/2 - 0.005
+        height[:, 1+2*k] = h + stretch
+        ap = 0.5*m_p*(s['Z1'] + s['Z2'])
+        xy = xy + ap[:, None]*np.column_stack([np.cos(theta), np.sin(theta)])
+        z = z + sign*stretch/2
+        centers[:, 2+2*k, :2] = xy
+        centers[:, 2+2*k, 2] = z
+        radius[:, 2+2*k] = m_p*s['Z2']/2 - 0.005
+        height[:, 2+2*k] = h
+        last_height = h
+    return centers, radius, height
+
+
+def _wrap(angle):
+    return np.mod(angle + np.pi, 2*np.pi) - np.pi
+
+
+def aim_output(designs, alpha_p, target=(40., 0.)):
+    """Set the angles of the last two stages of `designs` (in place) so that
+    the output gear is centered on `target` when it is reachable.
+
+    The chain of gear centers is a planar linkage: the last two links are
+    placed by solving the two-link inverse kinematics."""
+    stages = designs['stages']
+    n, n_stages = stages.shape
+    m_p = stages['m']*np.cos(ALPHA)/np.cos(alpha_p)
+    ap = 0.5*m_p*(stages['Z1'] + stages['Z2'])
+    if n_stages == 1:
+        stages['angle'][:, 0] = 0.
+        return designs
+    theta = np.cumsum(stages['angle'][:, :-2], axis=1)
+    P = np.column_stack([
+        np.sum(ap[:, :-2]*np.cos(theta), axis=1),
+        np.sum(ap[:, :-2]*np.sin(theta), axis=1)])
+    phi = theta[:, -1] if n_stages > 2 else np.zeros(n)
+    a1, a2 = ap[:, -2], ap[:, -1]
+    D = np.asarray(target) - P
+    d = np.hypot(D[:, 0], D[:, 1])
+    ok = (d <= a1 + a2) & (d >= np.abs(a1 - a2))
+    cos_g = np.clip((a1*a1 + d*d - a2*a2)/(2*a1*np.maximum(d, 1e-12)), -1, 1)
+    # Keep the elbow on the side given by the sampled angle
+    side = np.where(stages['angle'][:, -1] >= 0, -1., 1.)
+    theta1 = np.arctan2(D[:, 1], D[:, 0]) + side*np.arccos(cos_g)
+    E = D - a1[:, None]*np.column_stack([np.cos(theta1), np.sin(theta1)])
+    theta2 = np.arctan2(E[:, 1], E[:, 0])
+    stages['angle'][ok, -2] = _wrap(theta1 - phi)[ok]
+    stages['angle'][ok, -1] = _wrap(theta2 - theta1)[ok]
+    return designs
+
+
+def _geometric_constraints(constraints, centers, radius, height, tol=1e-6):
+    """Low fidelity geometric constraints of stacked cylinders"""
+    requires = {r for term in constraints.terms if term.stage == 'geometry'
+                for r in term.requires}
+    quantities = {}
+    if 'collisions' in requires:
+        i, j = np.triu_indices(radius.shape[1], 1)
+        d_xy = np.hypot(centers[:, i, 0] - centers[:, j, 0],
+                        centers[:, i, 1] - centers[:, j, 1])
+        d_z = np.abs(centers[:, i, 2] - centers[:, j, 2])
+        hits = ((d_xy < radius[:, i] + radius[:, j] - tol) &
+                (d_z < (height[:, i] + height[:, j])/2 - tol))
+        quantities['collisions'] = (hits.sum(axis=1) /
+                                    (4*SECTIONS['full']*radius.shape[1]))
+    if 'extents' in requires:
+        half = np.stack([radius, radius, height/2], axis=-1)
+        quantities['extents'] = ((centers + half).max(axis=1) -
+                                 (centers - half).min(axis=1))
+    if 'output_position' in requires:
+        quantities['output_position'] = centers[:, -1, :2]
+    return constraints.evaluate(quantities, ('geometry',))
+
+
+def cheap_constraints(problem, X):
+    """Constraints of `problem` computed analytically for the rows of `X`,
+    with the geometry at low fidelity.
+
+    out : array (n, n_constr) in the convention of the problem"""
+    c = problem.constraints
+    designs = Codec(problem.n_stages).decode(X)
+    stages = designs['stages']
+    kin = gear_pair_kinematics(stages['Z1'], stages['x1'], stages['Z2'],
+                               stages['x2'], stages['m'])
+    kinematic = np.stack(kin[:4], axis=-1)
+
+    # Torque propagated through lossless gears (see Actuator.propagate)
+    motor = designs['motor']
+    ff = designs['fill_factor'][:, None]
+    r_scale = designs['r_scale'][:, None]
+    ratios = stages['Z2']/stages['Z1']
+    table = motors.table[motor][:, None]
+    speed, V, imax, target = np.array([(op.speed, op.V, op.imax, op.torque)
+                                       for op in problem.op]).T
+    motor_out = stepper_speed_torque(
+        speed*np.prod(ratios, axis=1)[:, None]*table['Nm'], V, imax,
+        table['RNom']*r_scale, table['NwNom']*np.sqrt(r_scale*ff),
+        table['km0'], table['L0'], table['Nm'], table['Q_fstat'],
+        table['Q_fdyn'])
+    prop = propagate_torque(*motor_out, imax, ratios)
+    t_err = prop.torque[:, -1, :] - target
+
+    # Safety factors for the input torque of each stage and condition
+    steel = get_material('steel')
+    unit = np.stack(gear_pair_security(
+        stages['Z1'], stages['x1'], stages['Z2'], stages['x2'], stages['m'],
+        stages['b'], kin[4], kin[1], steel, steel), axis=-1)
+    torque = prop.torque[:, :-1, :]
+    scale = np.stack([torque**-0.5, torque**-0.5, 1/torque, 1/torque],
+                     axis=-1)
+    resistance = unit[:, :, None, :]*scale
+
+    geometric = _geometric_constraints(c, *layout(designs, kin[4]))
+    return c.batch(t_err, kinematic, resistance, geometric)
+
+
+def cheap_violation(problem, X):
+    """Total violation of the cheap constraints of the rows of `X`"""
+    G = cheap_constraints(problem, X)*problem.c_weights
+    return np.sum(np.maximum(G, 0), axis=1)
+
+
+def problem_hash(problem):
+    """Hash of everything :func:`cheap_constraints` depends on besides the
+    designs: operating conditions, constraint terms and parameters, bounds
+    and motor catalogue"""
+    h = hashlib.sha1()
+    h.update(np.array([(op.speed, op.V, op.imax, op.torque)
+                       for op in problem.op], dtype=float).tobytes())
+    c = problem.constraints
+    parameters = sorted((k, v) for k, v in vars(c).items() if k != 'terms')
+    h.update(repr(([(term.name, term.weights) for term in c.terms],
+                   parameters)).encode())
+    for bound in problem.bounds():
+        h.update(np.asarray(bound, dtype=float).tobytes())
+    h.update(np.ascontiguousarray(motors.table).tobytes())
+    return h.hexdigest()[:12]
+
+
+class DesignSampler(object):
+    """Seeded sampler of designs of `problem` with a low violation of the
+    cheap constraints.
+
+    Candidates are generated by batches of `batch_size` points with
+    `method` ('lhs', 'sobol' or 'uniform'), then each candidate is improved
+    by `n_refine` steps of a random local search (Gaussian steps of
+    `step` times the range of the variables, kept if they reduce the
+    violation). For a given seed, the candidates do not depend on the
+    number of requested designs."""
+
+    def __init__(self, problem, method='lhs', seed=0, batch_size=4096,
+                 n_refine=20, step=0.05, path=None):
+        if method not in METHODS:
+            raise ValueError("Unknown sampling method {}".format(method))
+        self.problem = problem
+        self.method = method
+        self.seed = seed
+        self.batch_size = batch_size
+        self.n_refine = n_refine
+        self.step = step
+        self.codec = Codec.for_problem(problem)
+        if path is None:
+            name = problem.name.partition('@')[0]
+            path = os.path.join(cache_dir(), 'samples',
+                                '{}_{}_{}_{}_{}_{}_{}.npy'.format(
+                                    name, method, seed, batch_size, n_refine,
+                                    step, problem_hash(problem)))
+        self.path = path
+        self.dtype = np.dtype([('x', 'f8', (self.codec.n_var,)),
+                               ('violation', 'f8')])
+
+    def _engine(self):
+        d = self.codec.n_var
+        if self.method == 'lhs':
+            return qmc.LatinHypercube(d, seed=self.seed)
+        if self.method == 'sobol':
+            return qmc.Sobol(d, seed=self.seed)
+        return np.random.default_rng(self.seed)
+
+    def _unit(self, engine):
+        if self.method == 'uniform':
+            return engine.random((self.batch_size, self.codec.n_var))
+        with warnings.catch_warnings():
+            # Sobol batches whose size is not a power of 2
+            warnings.simplefilter('ignore', UserWarning)
+            return engine.random(self.batch_size)
+
+    def _place(self, X):
+        X = self.codec.repair(X)
+        if any(term.name == 'output'
+               for term in self.problem.constraints.terms):
+            designs = self.codec.decode(X)
+            stages = designs['stages']
+            alpha_p = gear_pair_kinematics(
+                stages['Z1'], stages['x1'], stages['Z2'], stages['x2'])[4]
+            X = self.codec.repair(self.codec.encode(
+                aim_output(designs, alpha_p)))
+        return X
+
+    def refine(self, X, violation, rng):
+        """Random local search on the rows of `X`"""
+        lb, ub = self.codec.bounds
+        for _ in range(self.n_refine):
+            active = violation > 0
+            if not active.any():
+                break
+            steps = rng.normal(0, self.step, (active.sum(), len(lb)))
+            Y = self._place(X[active] + steps*(ub - lb))
+            v = cheap_violation(self.problem, Y)
+            better = v < violation[active]
+            idx = np.flatnonzero(active)[better]
+            X[idx] = Y[better]
+            violation[idx] = v[better]
+        return X, violation
+
+    def candidates(self, n_batches):
+        """Generate `n_batches` batches of candidates and their violation"""
+        engine = self._engine()
+        rng = np.random.default_rng(self.seed)
+        lb, ub = self.codec.bounds
+        records = np.zeros(n_batches*self.batch_size, dtype=self.dtype)
+        for k in range(n_batches):
+            X = self._place(lb + self._unit(engine)*(ub - lb))
+            X, violation = self.refine(X, cheap_violation(self.problem, X),
+                                       rng)
+            batch = records[k*self.batch_size:(k+1)*self.batch_size]
+            batch['x'] = X
+            batch['violation'] = violation
+        return records
+
+    def bank(self, n_batches=1, cache=True):
+        """Candidates of the first `n_batches` batches, read from the bank
+        and extended if needed"""
+        records = None
+        if cache and os.path.exists(self.path):
+            records = np.load(self.path, mmap_mode='r')
+        if records is None or len(records) < n_batches*self.batch_size:
+            records = self.candidates(n_batches)
+            if cache:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)),
+                            exist_ok=True)
+                tmp = '{}.{}.tmp'.format(self.path, os.getpid())
+                with open(tmp, 'wb') as f:
+                    np.save(f, records)
+                os.replace(tmp, self.path)
+        return records[:n_batches*self.batch_size]
+
+    def sample(self, n, n_batches=1, cache=True):
+        """The `n` candidates of the first `n_batches` batches with the lowest
+        violation of the cheap constraints, feasible ones first in the order
+        of generation"""
+        n_batches = max(n_batches, -(-n // self.batch_size))
+        records = self.bank(n_batches, cache)
+        idx = np.argsort(records['violation'], kind='stable')[:n]
+        return np.array(records['x'][idx])
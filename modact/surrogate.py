@@ -0,0 +1,167 @@
+"""Surrogate-assisted evaluation of the benchmark problems.
+
+A :class:`SurrogateProblem` wraps a :class:`modact.problems.Problem` and
+learns a radial basis function model of its objectives and constraints from
+the designs that are truly evaluated. Once enough samples are collected,
+candidates are screened with the model and only promising (predicted
+feasible or nearly so) or uncertain (far from any evaluated design) ones are
+passed to the true evaluator. The wrapper exposes the same interface as
+:class:`~modact.problems.Problem` and can be used everywhere a problem is
+expected (pymoo adapter, C++ embedding).
+"""
+import attr
+import numpy as np
+from scipy.interpolate import RBFInterpolator
+
+from .problems import get_problem
+
+
+@attr.s(auto_attribs=True)
+class SurrogatePolicy(object):
+    """Trust and refresh policy of the surrogate.
+
+    Args:
+        min_samples: true evaluations required before the model is trusted
+        refresh: new true evaluations between two refits of the model
+        max_samples: size of the training set (most recent designs are kept)
+        margin: predicted constraint violation above which a design is
+            considered not promising
+        max_distance: normalized distance to the closest evaluated design
+            above which a prediction is considered uncertain
+        kernel: kernel of :class:`scipy.interpolate.RBFInterpolator`
+        smoothing: smoothing of :class:`scipy.interpolate.RBFInterpolator`
+    """
+    min_samples: int = 50
+    refresh: int = 20
+    max_samples: int = 1000
+    margin: float = 0.5
+    max_distance: float = 0.25
+    kernel: str = 'thin_plate_spline'
+    smoothing: float = 1e-6
+
+
+class SurrogateProblem(object):
+    """Wrap `problem` with an online-trained surrogate model"""
+
+    def __init__(self, problem, policy=None):
+        self.problem = problem
+        self.policy = policy if policy is not None else SurrogatePolicy()
+        self.lb, self.ub = problem.bounds()
+        self._c_weights = np.array(problem.c_weights, dtype=float)
+        self._n_obj = len(problem.weights)
+        self._X = []
+        self._Y = []
+        self._model = None
+        self._n_fit_samples = 0
+        self.n_true = 0
+        self.n_avoided = 0
+        self.n_fits = 0
+
+    @property
+    def name(self):
+        return self.problem.name
+
+    @property
+    def n_stages(self):
+        return self.problem.n_stages
+
+    @property
+    def weights(self):
+        return self.problem.weights
+
+    @property
+    def ref(self):
+        return self.problem.ref
+
+    @property
+    def c_weights(self):
+        return self.problem.c_weights
+
+    def bounds(self):
+        return self.lb.copy(), self.ub.copy()
+
+    @property
+    def stats(self):
+        """Evaluation statistics of the surrogate"""
+        n_calls = self.n_true + self.n_avoided
+        return {
+            'n_calls': n_calls,
+            'n_true': self.n_true,
+            'n_avoided': self.n_avoided,
+            'n_fits': self.n_fits,
+            'avoided_ratio': self.n_avoided / n_calls if n_calls else 0.,
+        }
+
+    def normalize(self, x):
+        return (np.asarray(x, dtype=float) - self.lb) / (self.ub - self.lb)
+
+    def violation(self, g):
+        """Total constraint violation (0 if feasible) of `g`, which is given
+        in the convention of the wrapped problem."""
+        return np.maximum(np.asarray(g) * self._c_weights, 0).sum(axis=-1)
+
+    @property
+    def trusted(self):
+        return self._model is not None
+
+    def predict(self, x):
+        """Predict objectives, constraints and distance to the closest
+        evaluated design for one or several designs."""
+        X = np.atleast_2d(self.normalize(x))
+        Y = self._model(X)
+        train = np.asarray(self._X)
+        dist = np.sqrt(((X[:, None, :] - train[None, :, :])**2).sum(axis=-1))
+        dist = dist.min(axis=1) / np.sqrt(X.shape[1])
+        return Y[:, :self._n_obj], Y[:, self._n_obj:], dist
+
+    def screen(self, x):
+        """Return True if `x` needs to be evaluated by the true problem"""
+        if not self.trusted:
+            return True, None
+        f, g, dist = self.predict(x)
+        promising = self.violation(g[0]) <= self.policy.margin
+        uncertain = dist[0] > self.policy.max_distance
+        return promising or uncertain, (f[0], g[0])
+
+    def fit(self):
+        """Refit the model on the collected samples"""
+        X = np.asarray(self._X)
+        Y = np.asarray(self._Y)
+        self._model = RBFInterpolator(X, Y, kernel=self.policy.kernel,
+                                      smoothing=self.policy.smoothing)
+        self._n_fit_samples = len(self._X)
+        self.n_fits += 1
+
+    def add_sample(self, x, f, g):
+        y = np.concatenate([np.asarray(f, dtype=float),
+                            np.asarray(g, dtype=float)])
+        if not np.all(np.isfinite(y)):
+            return
+        self._X.append(self.normalize(x))
+        self._Y.append(y)
+        if len(self._X) > self.policy.max_samples:
+            del self._X[0]
+            del self._Y[0]
+            self._n_fit_samples -= 1
+        n_new = len(self._X) - self._n_fit_samples
+        if len(self._X) >= self.policy.min_samples and (
+                self._model is None or n_new >= self.policy.refresh):
+            self.fit()
+
+    def __call__(self, x):
+        evaluate, prediction = self.screen(x)
+        if not evaluate:
+            self.n_avoided += 1
+            f, g = prediction
+            return tuple(f), tuple(g)
+        f, g = self.problem(x)
+        self.n_true += 1
+        self.add_sample(x, f, g)
+        return tuple(f), tuple(g)
+
+
+def get_surrogate_problem(name, policy=None, **kwargs):
+    """Create problem `name` wrapped with a surrogate model.
+
+    `kwargs` are passed to :func:`modact.problems.get_problem`."""
+    return SurrogateProblem(get_problem(name, **kwargs), policy)
@@ -0,0 +1,275 @@
+"""Declarative definition of the objectives and constraints.
+
+A problem is described by a list of objective terms and a list of constraint
+terms (:class:`Term`). Each term declares the intermediate quantities it
+needs (e.g. the safety factors of the gears or the mesh of the actuator).
+The quantities are defined in `QUANTITIES` with their own dependencies and
+are computed lazily by :class:`Quantities`, so that an evaluation computes
+only the union of the dependencies of the terms, each quantity once. For
+instance, a problem without a geometric term or hull cost never builds the
+mesh of the actuator::
+
+    problem = build_problem('light', ['component_cost', 'torque'],
+                            ['kinematic', 'resistance', 'torque'])
+"""
+import time
+import typing
+
+import attr
+import numpy as np
+
+from .models import GearPair
+from .models.gears import security_per_unit_torque
+from .util import create_actuator_from_x
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class Quantity(object):
+    """Intermediate quantity computed by `func(problem, *requires)`.
+
+    `batch(problem, *requires)`, if given, computes the quantity for
+    several designs at once from the lists of the required quantities (see
+    :class:`~modact.evaluator.Evaluator`)."""
+    name: str
+    func: typing.Callable
+    requires: typing.Tuple[str, ...] = ()
+    batch: typing.Optional[typing.Callable] = None
+
+
+def _actuator(problem, x):
+    return create_actuator_from_x(x, problem.n_stages, True,
+                                  problem.fidelity)
+
+
+def _operating(problem, actuator):
+    return problem.operating_points(actuator)
+
+
+def _operating_batch(problem, actuators):
+    return problem.batch_operating_points(actuators)
+
+
+def _output(problem, operating):
+    return operating[0]
+
+
+def _op_per_comp(problem, operating):
+    return operating[1]
+
+
+def _t_err(problem, operating):
+    return operating[2]
+
+
+def _kinematic(problem, actuator):
+    return actuator.gear_kinematics()
+
+
+def _resistance(problem, actuator, op_per_comp):
+    return actuator.gear_resistance(op_per_comp)
+
+
+def _resistance_batch(problem, actuators, op_per_comp):
+    # Safety factors per unit torque of all the gear pairs at once
+    gears = [[comp for comp in actuator.components
+              if isinstance(comp, GearPair)] for actuator in actuators]
+    if not all(gears):
+        return [_resistance(problem, *args)
+                for args in zip(actuators, op_per_comp)]
+    unit = security_per_unit_torque([gp for pairs in gears for gp in pairs])
+    unit = np.split(unit, np.cumsum([len(pairs) for pairs in gears])[:-1])
+    return [actuator.gear_resistance(ops, u)
+            for actuator, ops, u in zip(actuators, op_per_comp, unit)]
+
+
+def _i_gp(problem, actuator):
+    return actuator.i_gp
+
+
+def _component_cost(problem, actuator):
+    return sum(actuator.cost())
+
+
+def _mesh(problem, actuator):
+    return actuator.mesh
+
+
+def _hull(problem, mesh):
+    _, _, space = mesh
+    return space.convex_hull
+
+
+def _cost(problem, actuator, hull):
+    # The convex hull is cached by the mesh
+    return sum(actuator.cost(True))
+
+
+def _collisions(problem, actuator, mesh):
+    return actuator.internal_collisions()
+
+
+def _extents(problem, actuator, mesh):
+    return actuator.extents()
+
+
+def _output_position(problem, mesh):
+    meshes, _, _ = mesh
+    return meshes[-1].primitive.transform[:2, 3]
+
+
+QUANTITIES = {q.name: q for q in [
+    Quantity('actuator', _actuator, ('x',)),
+    # Output conditions, conditions at the input of each component and
+    # torque margins, see Problem.operating_points
+    Quantity('operating', _operating, ('actuator',), _operating_batch),
+    Quantity('output', _output, ('operating',)),
+    Quantity('op_per_comp', _op_per_comp, ('operating',)),
+    Quantity('t_err', _t_err, ('operating',)),
+    Quantity('kinematic', _kinematic, ('actuator',)),
+    Quantity('resistance', _resistance, ('actuator', 'op_per_comp'),
+             _resistance_batch),
+    Quantity('i_gp', _i_gp, ('actuator',)),
+    Quantity('component_cost', _component_cost, ('actuator',)),
+    Quantity('mesh', _mesh, ('actuator',)),
+    Quantity('hull', _hull, ('mesh',)),
+    Quantity('cost', _cost, ('actuator', 'hull')),
+    Quantity('collisions', _collisions, ('actuator', 'mesh')),
+    Quantity('extents', _extents, ('actuator', 'mesh')),
+    Quantity('output_position', _output_position, ('mesh',)),
+]}
+
+
+def dependencies(names):
+    """Quantities needed to compute `names`, each after its dependencies"""
+    order = []
+
+    def visit(name):
+        if name in order:
+            return
+        for required in getattr(QUANTITIES.get(name), 'requires', ()):
+            visit(required)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+class Quantities(object):
+    """Intermediate quantities of the evaluation of a design by `problem`.
+
+    The quantities given as keywords are used as is, the other ones are
+    computed on first access from their definition in `QUANTITIES` and
+    stored, so that each one is computed at most once. If `stats` is given,
+    the time spent computing each quantity (without its dependencies) is
+    added to `stats[name]` (see :class:`~modact.evaluator.NodeStats`)."""
+
+    def __init__(self, problem=None, stats=None, **values):
+        self.problem = problem
+        self.stats = stats
+        self.values = values
+
+    def __contains__(self, name):
+        return name in self.values
+
+    def __getitem__(self, name):
+        try:
+            return self.values[name]
+        except KeyError:
+            pass
+        quantity = QUANTITIES[name]
+        args = [self[required] for required in quantity.requires]
+        start = time.perf_counter()
+        value = self.values[name] = quantity.func(self.problem, *args)
+        if self.stats is not None:
+            self.stats[name].add(1, time.perf_counter() - start)
+        return value
+
+    def __setitem__(self, name, value):
+        self.values[name] = value
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class Term(object):
+    """Objective or constraint term.
+
+    `func(owner, *requires)` returns a tuple of `len(weights)` values, where
+    `owner` is the :class:`~modact.problems.Objectives` or
+    :class:`~modact.problems.Constraints` holding the parameters of the
+    problem (aggregation, minimum torque) and `requires` the quantities
+    named in `requires`. The `stage` of a constraint is used by the staged
+    evaluation (kinematic, torque, resistance or geometry)."""
+    name: str
+    func: typing.Callable
+    requires: typing.Tuple[str, ...]
+    weights: typing.Tuple[int, ...]
+    stage: typing.Optional[str] = None
+
+    def __call__(self, owner, quantities):
+        return self.func(owner, *(quantities[r] for r in self.requires))
+
+
+def _value(owner, value):
+    return (value,)
+
+
+def _torque_objective(objectives, output, t_err):
+    return (objectives.torque(output, t_err),)
+
+
+def _security_objective(objectives, output, resistance):
+    return (objectives.security(output, resistance),)
+
+
+def _efficiency_objective(objectives, output):
+    return (objectives.efficiency(output),)
+
+
+OBJECTIVE_TERMS = {t.name: t for t in [
+    Term('cost', _value, ('cost',), (-1,)),
+    # Cost without the hull, which does not need the mesh
+    Term('component_cost', _value, ('component_cost',), (-1,)),
+    Term('torque', _torque_objective, ('output', 't_err'), (1,)),
+    Term('security', _security_objective, ('output', 'resistance'), (1,)),
+    Term('efficiency', _efficiency_objective, ('output',), (1,)),
+    Term('ratio', _value, ('i_gp',), (-1,)),
+]}
+
+
+def _kinematic_constraints(constraints, kinematic):
+    return constraints.kinematic_constraints(kinematic)
+
+
+def _resistance_constraints(constraints, resistance):
+    return constraints.resistance_constraints(resistance)
+
+
+def _torque_constraints(constraints, t_err):
+    return constraints.torque_constraints(t_err)
+
+
+def _extents_constraints(constraints, extents):
+    return tuple((np.asarray(extents)[..., 1:] / [50., 35.] - 1).T)
+
+
+def _output_constraints(constraints, position):
+    output = np.linalg.norm(position - np.array([40., 0.]), axis=-1)
+    return (np.maximum(0, output - .5)/10.,)
+
+
+CONSTRAINT_TERMS = {t.name: t for t in [
+    Term('kinematic', _kinematic_constraints, ('kinematic',), (-1,)*4,
+         'kinematic'),
+    Term('resistance', _resistance_constraints, ('resistance',), (-1,)*2,
+         'resistance'),
+    Term('torque', _torque_constraints, ('t_err',), (-1,), 'torque'),
+    Term('collisions', _value, ('collisions',), (1,), 'geometry'),
+    Term('extents', _extents_constraints, ('extents',), (1, 1), 'geometry'),
+    Term('output', _output_constraints, ('output_position',), (1,),
+         'geometry'),
+]}
+
+
+def get_terms(terms, available):
+    """Terms from their names or as is"""
+    return tuple(available[t] if isinstance(t, str) else t for t in terms)
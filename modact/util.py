@@ -4,7 +4,7 @@ from .actuator import Actuator
 from .models import get_stepper, make_gearpair
 
 
-def create_actuator_from_x(x, n_stages, with_3d):
+def create_actuator_from_x(x, n_stages, with_3d, fidelity='full'):
     components = []
     ff, mot_sel = math.modf(x[0])
     ff = 0.3 + ff*0.9
@@ -13,7 +13,7 @@ def create_actuator_from_x(x, n_stages, with_3d):
     components.append(stepper)
     gears = create_gears_from_x(x[2:], n_stages, with_3d)
     components.extend(gears)
-    return Actuator(components=components)
+    return Actuator(components=components, fidelity=fidelity)
 
 
 def create_gears_from_x(x, n_stages, with_3d):
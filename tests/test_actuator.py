@@ -1,12 +1,18 @@
+import copy
+import pickle
 from math import pi
 
 import numpy as np
 import pytest
 
-from modact.actuator import Actuator
+import modact.problems as pb
+from modact.actuator import SECTIONS, Actuator, propagate_torque
+from modact.meshutils import (Tessellation, chordal_error,
+                              hull_area_error_bound)
 from modact.models import GearPair, OperatingCondition, Stepper
 from modact.models.gears import SpurGear
 from modact.models.motors import motor_data
+from modact.util import create_actuator_from_x
 
 
 @pytest.fixture(scope="function")
@@ -104,6 +110,40 @@ def test_speed_torque_with_stepper(motored_2_stages):
     assert abs(diff.torque) <= 1e-8
 
 
+def test_propagated_speed_torque(motored_2_stages):
+    conditions = [OperatingCondition(4.*pi/30., 0.24, 12, 0.3),
+                  OperatingCondition(40.*pi, 0.24, 12, 0.3)]
+    control = motored_2_stages.matched_speed_control(conditions)
+    out, per_component = motored_2_stages.get_speed_torque(control)
+    # Reference: component by component
+    for k, cond in enumerate(control):
+        op = cond
+        for j, comp in enumerate(motored_2_stages.components):
+            assert per_component[j][k].speed == op.speed
+            assert per_component[j][k].torque == op.torque
+            op = comp.get_speed_torque(op)
+            op.torque = max(op.torque, 1e-6)
+        assert out[k].speed == op.speed
+        assert out[k].torque == op.torque
+        assert out[k].imax == op.imax
+
+    prop = motored_2_stages.propagate(control)
+    assert prop.torque.shape == (3, 2)
+    assert np.allclose(prop.torque[-1], [op.torque for op in out])
+    assert list(prop.dead) == [False, True]
+    assert list(prop.over_current) == [True, False]
+
+    # Vectorized over designs
+    prop = propagate_torque([[1., 2.], [3., 4.]], [[1., 0.], [2., 3.]],
+                            [[0.1, 0.2], [0.3, 0.4]], 0.25,
+                            [[2., 5.], [3., 1.]])
+    assert prop.torque.shape == (2, 3, 2)
+    assert np.allclose(prop.torque[0, -1], [10., 1e-5])
+    assert np.allclose(prop.speed[1, -1], [1., 4/3])
+    assert np.array_equal(prop.dead, [[False, True], [False, False]])
+    assert np.array_equal(prop.over_current, [[False, False], [True, True]])
+
+
 def test_constraints(good_motored_2_stages):
     conditions = [OperatingCondition(4.*pi/30., 0.24, 12, 0.3)]
     control = good_motored_2_stages.matched_speed_control(conditions)
@@ -183,3 +223,96 @@ def test_gear_mesh_small_minus_stretch():
 
     assert np.allclose(meshes[0].bounds[:, 2], [gp.disp-5., gp.disp])
     assert np.allclose(meshes[1].bounds[:, 2], [gp.disp-5., gp.disp])
+
+
+def test_analytic_collision_detection(motored_2_stages,
+                                      broken_motored_2_stages,
+                                      impossible_motored_2_stages):
+    for a in (motored_2_stages, broken_motored_2_stages,
+              impossible_motored_2_stages):
+        assert a.analytic_collisions() == a.internal_collisions()
+    low = Actuator(components=broken_motored_2_stages.components,
+                   fidelity='low')
+    assert low.internal_collisions() > 0
+    assert len(low.mesh[0][0].faces) == 4*low.sections
+
+
+def test_analytic_extents(impossible_motored_2_stages):
+    a = impossible_motored_2_stages
+    low = Actuator(components=a.components, fidelity='low')
+    assert np.allclose(a.extents(), low.extents(), rtol=1e-2)
+
+
+def test_adaptive_tessellation(monkeypatch, motored_2_stages):
+    tessellation = Tessellation(0.05, 8, 128)
+    for r in (0.01, 0.5, 3., 10., 40., 1e4):
+        n = tessellation(r)
+        assert 8 <= n <= 128
+        assert n == 8 or n == 128 or chordal_error(r, n) <= 0.05
+        assert n == 8 or chordal_error(r, n - 1) > 0.05
+
+    fixed = Actuator(components=motored_2_stages.components).mesh[2]
+    monkeypatch.setitem(SECTIONS, 'full', tessellation)
+    a = Actuator(components=motored_2_stages.components)
+    meshes, _, space = a.mesh
+    assert [m.primitive.sections for m in meshes] == [
+        tessellation(m.primitive.radius) for m in meshes]
+    assert len(space.faces) == 4*sum(m.primitive.sections for m in meshes)
+    # The collisions are normalized by the number of faces of the mesh
+    assert a.analytic_collisions() == a.internal_collisions()
+
+    # The hull of the inscribed polygons misses less than the bound
+    monkeypatch.setitem(SECTIONS, 'full', 1024)
+    exact = Actuator(components=motored_2_stages.components)
+    missing = exact.mesh[2].convex_hull.area - space.convex_hull.area
+    diameter = np.linalg.norm(space.bounding_box.extents)
+    assert 0 < missing <= hull_area_error_bound(0.05, diameter)
+    assert missing < exact.mesh[2].convex_hull.area - fixed.convex_hull.area
+
+
+def test_record_round_trip():
+    problem = pb.get_problem('cts3')
+    lb, ub = problem.bounds()
+    x = lb + np.random.default_rng(1).random(len(lb))*(ub - lb)
+    a = create_actuator_from_x(x, 3, True)
+    record = a.to_record()
+    assert record['motor'] == int(x[0])
+    assert len(a.to_bytes()) == record.dtype.itemsize
+
+    for b in (Actuator.from_record(record), Actuator.from_bytes(a.to_bytes()),
+              pickle.loads(pickle.dumps(a))):
+        assert np.allclose(b.to_record()['stages'].tolist(),
+                           record['stages'].tolist())
+        assert b.components[0].name == a.components[0].name
+        assert b.i == pytest.approx(a.i)
+        assert np.allclose(b.cost(True), a.cost(True))
+        assert np.allclose(b.gear_kinematics(), a.gear_kinematics())
+    low = pickle.loads(pickle.dumps(Actuator(a.components, 'low')))
+    assert low.fidelity == 'low'
+
+    planar = create_actuator_from_x(np.r_[x[:2], x[2:6]], 1, False)
+    assert np.isnan(planar.to_record()['stages']['angle'][0])
+    assert Actuator.from_record(planar.to_record()).components[1].angle is None
+
+
+def test_record_is_explicit(motored_2_stages):
+    a = motored_2_stages
+    # Pickling keeps the full object, the materials of the gears included
+    pom = Actuator(components=[a.components[0]] + [
+        GearPair(*(SpurGear(g.Z, g.m, g.x, g.b/g.m, 'POM') for g in gp.gears),
+                 gp.disp, gp.angle) for gp in a.components[1:]])
+    for b in (pickle.loads(pickle.dumps(pom)), copy.deepcopy(pom)):
+        assert all(g.material.name == 'POM'
+                   for gp in b.components[1:] for g in gp.gears)
+        assert b.cost() == pom.cost()
+    assert copy.copy(pom).components is pom.components
+    # whereas the record rebuilds the gears in steel
+    assert Actuator.from_bytes(pom.to_bytes()).cost() == pytest.approx(
+        a.cost())
+
+
+def test_record_requires_motor(linear_2_stages):
+    with pytest.raises(ValueError):
+        linear_2_stages.to_record()
+    a = pickle.loads(pickle.dumps(linear_2_stages))
+    assert a.i == linear_2_stages.i
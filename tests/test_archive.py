@@ -0,0 +1,106 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import modact.problems as pb
+from modact.archive import EvaluationArchive
+from modact.pareto import non_dominated_mask
+
+
+def test_append_and_read(tmp_path):
+    path = tmp_path / "evals.mda"
+    archive = EvaluationArchive(path, 3, 2, 1, 'test')
+    assert len(archive) == 0
+    assert archive.X.shape == (0, 3)
+
+    X = np.arange(12.).reshape(4, 3)
+    F = X[:, :2]
+    G = np.array([-1., 1., 0., 2.])
+    archive.append(X, F, G)
+    archive.append(X[0], F[0], G[0])
+    assert len(archive) == 5
+
+    reopened = EvaluationArchive(path)
+    assert reopened.name == 'test'
+    X_r, F_r, G_r = reopened.arrays()
+    assert np.array_equal(X_r[:4], X)
+    assert np.array_equal(F_r[4], F[0])
+    assert G_r.shape == (5, 1)
+    assert reopened.feasible.tolist() == [True, False, True, False, True]
+    assert reopened.query(feasible=False).tolist() == [1, 3]
+    assert len(reopened.query(t_max=0.)) == 0
+    assert not reopened.X.flags.writeable
+
+    with pytest.raises(ValueError):
+        EvaluationArchive(path, 4, 2, 1)
+
+
+def test_archive_before_header(tmp_path):
+    path = tmp_path / "empty.mda"
+    with pytest.raises(FileNotFoundError):
+        EvaluationArchive(path)
+    # Created by another process which has not written the header yet
+    path.touch()
+    reader = EvaluationArchive(path)
+    assert len(reader) == 0
+    assert len(reader.records()) == 0
+    assert len(reader.non_dominated()) == 0
+    with pytest.raises(ValueError):
+        reader.append(np.zeros(3), [0., 0.], [0.])
+
+    writer = EvaluationArchive(path, 3, 2, 1, 'test')
+    writer.append(np.ones(3), [1., 2.], [-1.])
+    assert len(reader) == 1
+    assert reader.name == 'test'
+    assert reader.X.tolist() == [[1., 1., 1.]]
+
+
+def test_archive_from_problem(tmp_path):
+    problem = pb.get_problem('cs1')
+    archive = EvaluationArchive.for_problem(tmp_path / "cs1.mda", problem)
+    lb, ub = problem.bounds()
+    x = (lb + ub)/2
+    f, g = problem(x)
+    archive.append_problem_output(problem, x, f, g)
+    assert np.allclose(archive.F[0], -np.array(f)*problem.weights)
+    assert np.allclose(archive.G[0], np.array(g)*problem.c_weights)
+
+
+def test_streaming_non_dominated(tmp_path):
+    archive = EvaluationArchive(tmp_path / "nd.mda", 1, 2, 1)
+    rng = np.random.default_rng(0)
+    F = rng.random((500, 2))
+    G = np.where(rng.random(500) < 0.3, 1., -1.)
+    archive.append(np.zeros((500, 1)), F, G)
+    front = archive.non_dominated(chunk_size=64)
+    feasible = np.flatnonzero(G <= 0)
+    expected = feasible[non_dominated_mask(F[feasible])]
+    assert sorted(front) == sorted(expected)
+
+    infeasible = EvaluationArchive(tmp_path / "inf.mda", 1, 2, 1)
+    infeasible.append(np.zeros((3, 1)), F[:3], [3., 1., 2.])
+    assert infeasible.non_dominated(chunk_size=2).tolist() == [1]
+
+
+def _append_worker(path, seed):
+    archive = EvaluationArchive(path)
+    rng = np.random.default_rng(seed)
+    for _ in range(50):
+        archive.append(rng.random((2, 3)), np.full((2, 2), seed), [0., 0.])
+
+
+def test_concurrent_append(tmp_path):
+    path = tmp_path / "concurrent.mda"
+    EvaluationArchive(path, 3, 2, 1)
+    ctx = multiprocessing.get_context('fork')
+    procs = [ctx.Process(target=_append_worker, args=(path, i))
+             for i in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    archive = EvaluationArchive(path)
+    assert len(archive) == 400
+    counts = np.bincount(archive.F[:, 0].astype(int))
+    assert counts.tolist() == [100]*4
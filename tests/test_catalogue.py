@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from modact.catalogue import load_catalogue
+from modact.models import OperatingCondition
+from modact.models.gears import GearPair, gear_pair_kinematics, make_gearpair
+
+
+@pytest.fixture(scope="module")
+def catalogue(tmp_path_factory):
+    path = tmp_path_factory.mktemp("cache") / "catalogue.npy"
+    return load_catalogue(path, n_shift=11)
+
+
+def test_vectorized_kinematics():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        Z1, Z2 = rng.integers(9, 41), rng.integers(30, 81)
+        x1, x2 = rng.uniform(-0.1, 0.6), rng.uniform(-0.6, 0.6)
+        m = rng.uniform(0.3, 1.)
+        gp = make_gearpair(Z1, x1, Z2, x2, m, 10)
+        expected = (gp.interference, gp.contact_ratio, *gp.specific_speed,
+                    gp.alpha_p)
+        assert np.allclose(gear_pair_kinematics(Z1, x1, Z2, x2, m), expected,
+                           rtol=1e-8, atol=1e-10)
+
+
+def test_catalogue_lookup(catalogue):
+    assert isinstance(catalogue.table, np.memmap)
+    assert catalogue.table.shape == (32, 51, 11, 11, 5)
+    # Grid points are exact
+    Z1, x1, Z2, x2 = catalogue.sample(50, rng=0)
+    values = catalogue.lookup(Z1, x1, Z2, x2, 0.5)
+    expected = np.column_stack(gear_pair_kinematics(Z1, x1, Z2, x2, 0.5))
+    assert np.allclose(values, expected, rtol=1e-5, atol=1e-6)
+    # Sampled stages are kinematically valid
+    assert np.all(values[:, 0] == 0)
+    assert np.all(values[:, 1] >= 1.1)
+    assert np.all(values[:, 2:4] >= -5)
+
+    # Interpolation between grid points
+    rng = np.random.default_rng(1)
+    x1 = rng.uniform(-0.1, 0.6, 100)
+    x2 = rng.uniform(-0.6, 0.6, 100)
+    values = catalogue.lookup(25, x1, 60, x2)
+    expected = np.column_stack(gear_pair_kinematics(25, x1, 60, x2))
+    assert np.allclose(values[:, 1:], expected[:, 1:], rtol=2e-2)
+
+    with pytest.raises(ValueError):
+        catalogue.lookup(8, 0, 60, 0)
+
+
+def test_catalogue_interference_error(catalogue):
+    """The interference (sum of non-smooth minima) is interpolated with an
+    error below 0.15 mm per mm of module on the grid of 11 shifts, and
+    its sign (feasibility) agrees for more than 97% of the stages."""
+    rng = np.random.default_rng(2)
+    n = 20000
+    Z1, Z2 = rng.integers(9, 41, n), rng.integers(30, 81, n)
+    x1, x2 = rng.uniform(-0.1, 0.6, n), rng.uniform(-0.6, 0.6, n)
+    m = rng.uniform(0.3, 1., n)
+    values = catalogue.lookup(Z1, x1, Z2, x2, m)[:, 0]
+    expected = gear_pair_kinematics(Z1, x1, Z2, x2, m)[0]
+    finite = np.isfinite(values) & np.isfinite(expected)
+    assert finite.mean() > 0.99
+    error = np.abs(values - expected)[finite]/m[finite]
+    assert error.max() < 0.15
+    assert error.mean() < 2e-3
+    assert np.mean((values[finite] < 0) == (expected[finite] < 0)) > 0.97
+
+
+def test_gear_pair_with_catalogue(catalogue, monkeypatch):
+    rng = np.random.default_rng(3)
+    stages = [(int(rng.integers(9, 41)), rng.uniform(-0.1, 0.6),
+               int(rng.integers(30, 81)), rng.uniform(-0.6, 0.6))
+              for _ in range(50)]
+    # Outside of the catalogue, fall back to the exact solution
+    stages.append((17, 0.25, 20, 0.))
+    references = [make_gearpair(*s, 0.5, 8) for s in stages]
+    monkeypatch.setattr(GearPair, 'catalogue', catalogue)
+    op = OperatingCondition(1., 0.5, 12., 1.)
+    for s, reference in zip(stages, references):
+        gp = make_gearpair(*s, 0.5, 8)
+        # The working pressure angle is solved exactly from the catalogue,
+        # so that the kinematics and the stresses are exact as well
+        assert gp.alpha_p == pytest.approx(reference.alpha_p, abs=1e-11)
+        assert gp.interference == pytest.approx(reference.interference,
+                                                abs=1e-9)
+        assert gp.contact_ratio == pytest.approx(reference.contact_ratio,
+                                                 rel=1e-10)
+        assert np.allclose(gp.specific_speed, reference.specific_speed,
+                           rtol=1e-9)
+        assert np.allclose(gp.security_h(op), reference.security_h(op),
+                           rtol=1e-9)
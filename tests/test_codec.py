@@ -0,0 +1,79 @@
+import numpy as np
+
+import modact.problems as pb
+from modact.codec import Codec
+from modact.util import create_actuator_from_x
+
+
+def random_population(problem, n, seed=0):
+    lb, ub = problem.bounds()
+    rng = np.random.default_rng(seed)
+    return lb + rng.random((n, len(lb)))*(ub - lb)
+
+
+def test_decode_matches_scalar_decoding():
+    problem = pb.get_problem('cs1')
+    codec = Codec.for_problem(problem)
+    X = random_population(problem, 20)
+    designs = codec.decode(X)
+    assert designs.shape == (20,)
+    assert designs['stages'].shape == (20, 3)
+    for x, d in zip(X, designs):
+        actuator = create_actuator_from_x(x, 3, True)
+        motor, *gears = actuator.components
+        assert abs(motor.fill_factor - d['fill_factor']) < 1e-12
+        assert motor.r_scale == d['r_scale']
+        for gp, s in zip(gears, d['stages']):
+            assert gp.gears.p.Z == s['Z1']
+            assert gp.gears.g.Z == s['Z2']
+            assert abs(gp.gears.p.x - s['x1']) < 1e-12
+            assert abs(gp.gears.g.x - s['x2']) < 1e-12
+            assert gp.gears.p.m == s['m']
+            assert gp.disp == s['disp']
+            assert gp.angle == s['angle']
+
+
+def test_encode_round_trip():
+    codec = Codec(2)
+    X = random_population(pb.get_problem('cs1s2'), 50, 1)
+    assert np.allclose(codec.encode(codec.decode(X)), X, rtol=0, atol=1e-12)
+    designs = codec.decode(X)
+    assert np.array_equal(codec.decode(codec.encode(designs))['stages']['Z2'],
+                          designs['stages']['Z2'])
+
+
+def test_repair():
+    problem = pb.get_problem('cs1s2')
+    codec = Codec.for_problem(problem)
+    lb, ub = problem.bounds()
+    X = random_population(problem, 10, 2)
+    X[0] = lb - 1
+    X[1] = ub + 1
+    X[2, 3] = np.nan
+    R = codec.repair(X)
+    assert np.all(R >= lb) and np.all(R <= ub)
+    assert R[2, 3] == lb[3]
+    assert np.array_equal(R[3:], X[3:])
+
+    R = codec.repair(X, resolution=0.1)
+    frac = np.mod(R[:, codec.integer_columns()], 1)
+    assert np.allclose(np.round(frac*10), frac*10)
+    assert np.all(R <= ub)
+
+
+def test_canonical_hash():
+    problem = pb.get_problem('cs1s2')
+    codec = Codec.for_problem(problem)
+    X = random_population(problem, 100, 3)
+    X[10] = X[0]
+    X[11] = X[1]
+    X[11, 7] = -np.pi
+    X[1, 7] = np.pi
+    h = codec.hash(X)
+    assert h.dtype == np.uint64
+    assert h[10] == h[0]
+    assert h[11] == h[1]
+    assert len(np.unique(h)) == 98
+    mask = codec.unique(X)
+    assert mask.sum() == 98
+    assert not mask[10] and not mask[11]
@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import trimesh
+
+import modact.problems as pb
+from modact.collisions import CollisionContext, collision_context
+
+
+def trimesh_pairs(meshes):
+    cm = trimesh.collision.CollisionManager()
+    for i, m in enumerate(meshes):
+        cm.add_object(i, m)
+    return cm.in_collision_internal(return_names=True)[1]
+
+
+def test_pooled_collisions():
+    context = CollisionContext()
+    rng = np.random.default_rng(4)
+    for name in ('cs1s1', 'cs1s2', 'cs1'):
+        p = pb.get_problem(name)
+        lb, ub = p.bounds()
+        for x in lb + rng.random((40, len(lb)))*(ub - lb):
+            meshes = p.quantities(x)['actuator'].mesh[0]
+            assert context.colliding_pairs(meshes) == trimesh_pairs(meshes)
+            # Same design again: all the objects are reused
+            misses = context.misses
+            assert context.colliding_pairs(meshes) == trimesh_pairs(meshes)
+            assert context.misses == misses
+    assert context.hits > 0
+
+
+def test_reused_geometries():
+    p = pb.get_problem('cs3')
+    lb, ub = p.bounds()
+    X = lb + np.random.default_rng(5).random((30, len(lb)))*(ub - lb)
+    # Designs which only differ by their last stage: only the geometries of
+    # its two gears are rebuilt, the motor and the other gears are reused
+    X[:, :-6] = X[0, :-6]
+    context = CollisionContext()
+    for x in X:
+        meshes = p.quantities(x)['actuator'].mesh[0]
+        assert context.colliding_pairs(meshes) == trimesh_pairs(meshes)
+    assert len(meshes) == 7
+    assert context.misses == 7 + 2*29
+    assert context.hits == 5*29
+
+
+def test_collision_context_per_thread():
+    context = collision_context()
+    assert collision_context() is context
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(collision_context).result() is not context
@@ -0,0 +1,77 @@
+import numpy as np
+
+import modact.problems as pb
+from modact.evaluator import Evaluator
+from modact.models.motors import Stepper, motor_data
+from modact.util import create_actuator_from_x
+
+
+def designs(problem, n, seed=0):
+    lb, ub = problem.bounds()
+    return lb + np.random.default_rng(seed).random((n, len(lb)))*(ub - lb)
+
+
+def test_evaluator():
+    p = pb.get_problem('cts2@low')
+    X = designs(p, 6)
+    F, G = p.evaluate_chunk(X)
+    evaluator = Evaluator(p, cache_size=8)
+    assert 'collisions' in evaluator.nodes
+    assert 'extents' not in evaluator.nodes
+    assert evaluator.nodes.index('mesh') < evaluator.nodes.index('hull')
+
+    F_e, G_e = evaluator.evaluate(X)
+    assert np.array_equal(F, F_e)
+    assert np.array_equal(G, G_e)
+    assert set(evaluator.stats) == set(evaluator.nodes)
+    assert all(s.count == len(X) for s in evaluator.stats.values())
+    assert 'hull' in evaluator.report()
+
+    # Designs evaluated again reuse their intermediate quantities
+    f, g = evaluator(X[2])
+    assert np.array_equal(f, F[2]) and np.array_equal(g, G[2])
+    evaluator.evaluate(X[3:])
+    assert evaluator.hits == 4
+    assert all(s.count == len(X) for s in evaluator.stats.values())
+    evaluator.evaluate(designs(p, 4, 1))
+    assert evaluator.stats['mesh'].count == len(X) + 4
+    assert len(evaluator._cache) == 8
+
+    evaluator.reset()
+    p.fidelity = 'full'
+    F_full, _ = evaluator.evaluate(X[:2])
+    assert evaluator.hits == 0
+    assert np.array_equal(F_full, p.evaluate_chunk(X[:2])[0])
+
+
+def test_evaluator_screening():
+    p = pb.get_problem('cs3', screening=pb.Screening(penalty=2.))
+    X = designs(p, 5)
+    F, G = Evaluator(p, cache_size=10).evaluate(X)
+    for x, f, g in zip(X, F, G):
+        f_p, g_p = p(x)
+        assert np.array_equal(f, f_p)
+        assert np.array_equal(g, g_p)
+
+
+def test_batch_operating_points():
+    p = pb.get_problem('ctse2s2')
+    X = designs(p, 40, 2)
+    X[:, 0] = np.arange(40) % 5 + 0.5  # all the motors, interleaved
+    actuators = [create_actuator_from_x(x, 2, True) for x in X]
+    # A motor outside of the registry is evaluated in its own group
+    custom = Stepper('custom', motor_data['A'])
+    custom.adjust_coil(0.8, 1.2)
+    actuators[0].components[0] = custom
+
+    def values(ops):
+        return [(op.speed, op.torque, op.V, op.imax) for op in ops]
+
+    batch = p.batch_operating_points(actuators)
+    for actuator, (output, op_per_comp, t_err) in zip(actuators, batch):
+        ref_output, ref_op_per_comp, ref_t_err = p.operating_points(actuator)
+        assert values(output) == values(ref_output)
+        assert t_err == ref_t_err
+        assert len(op_per_comp) == len(ref_op_per_comp) == 3
+        for ops, ref_ops in zip(op_per_comp, ref_op_per_comp):
+            assert values(ops) == values(ref_ops)
@@ -1,5 +1,8 @@
+import attr
 import numpy as np
+import pytest
 
+from modact.materials import get_material, materials
 from modact.models import OperatingCondition
 from modact.models.gears import GearPair, SpurGear, make_gearpair
 
@@ -44,3 +47,12 @@ def test_make_method():
     assert gp.gears.g.Z == 80
     assert gp.gears.p.m == 1.
     assert gp.gears.g.m == 1.
+
+
+def test_shared_materials():
+    gp = make_gearpair(20, 0., 60, 0., 0.5, 10)
+    assert gp.gears.p.material is gp.gears.g.material is get_material('steel')
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        gp.gears.p.material.E = 1.
+    assert not materials.table.flags.writeable
+    assert materials.table['E'][materials.index('steel')] == 210e9
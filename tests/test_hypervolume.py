@@ -0,0 +1,55 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+import modact.problems as pb
+from modact.hypervolume import Hypervolume, hypervolume, hypervolume_mc
+
+
+def inclusion_exclusion(F, ref):
+    hv = 0.
+    for k in range(1, len(F)+1):
+        for subset in combinations(F, k):
+            hv += (-1)**(k+1)*np.prod(ref - np.max(subset, axis=0))
+    return hv
+
+
+def test_simple_fronts():
+    assert hypervolume([[1., 1.]], [2., 3.]) == 2.
+    assert hypervolume([[0., 1.], [1., 0.], [1., 1.]], [2., 2.]) == 3.
+    assert hypervolume([[3., 0.]], [2., 2.]) == 0.
+    assert hypervolume(np.zeros((0, 3)), [1., 1., 1.]) == 0.
+    F = [[0., 0., 1.], [0., 1., 0.], [1., 0., 0.]]
+    assert abs(hypervolume(F, [2., 2., 2.]) - 7.) < 1e-12
+
+
+@pytest.mark.parametrize("n_obj", [2, 3, 4, 5])
+def test_exact_hypervolume(n_obj):
+    rng = np.random.default_rng(n_obj)
+    F = rng.random((8, n_obj))
+    ref = np.full(n_obj, 1.1)
+    assert abs(hypervolume(F, ref) - inclusion_exclusion(F, ref)) < 1e-10
+
+
+def test_monte_carlo_estimate():
+    rng = np.random.default_rng(5)
+    F = rng.random((30, 5))
+    F /= np.linalg.norm(F, axis=1, keepdims=True)
+    ref = np.full(5, 1.1)
+    exact = hypervolume(F, ref)
+    estimate, error = hypervolume_mc(F, ref, 200000, seed=0)
+    assert abs(estimate - exact) < 5*error
+
+
+def test_problem_hypervolume():
+    problem = pb.get_problem('ctsei1')
+    ideal = (0., 1., 10., 1., 1.)
+    nadir = (1., 0., 0., 0., 10.)
+    hv = Hypervolume(problem, ideal, nadir)
+    assert np.allclose(hv.normalize(ideal), 0.)
+    assert np.allclose(hv.normalize(nadir), 10.)
+    assert abs(hv([ideal]) - 11.**5) < 1e-6
+    assert hv([nadir]) == 1.
+    mc = Hypervolume(problem, ideal, nadir, n_samples=1000, seed=0)
+    assert mc([ideal]) == 11.**5
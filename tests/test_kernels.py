@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from modact.materials import get_material
+from modact.models import OperatingCondition
+from modact.models import kernels
+from modact.models.gears import make_gearpair
+from modact.models.motors import get_stepper, motor_names
+
+
+@pytest.fixture(scope="module")
+def gear_pairs():
+    rng = np.random.default_rng(0)
+    n = 50
+    return (rng.integers(9, 41, n), rng.uniform(-0.1, 0.6, n),
+            rng.integers(30, 81, n), rng.uniform(-0.6, 0.6, n),
+            rng.uniform(0.3, 1., n), rng.uniform(5., 15., n))
+
+
+def reference_gear_values(Z1, x1, Z2, x2, m, b):
+    op = OperatingCondition(1., 1., 12, 2.)
+    values = []
+    for args in zip(Z1, x1, Z2, x2, m, b):
+        gp = make_gearpair(*args)
+        values.append((gp.interference, gp.contact_ratio,
+                       *gp.specific_speed, gp.alpha_p,
+                       *gp.security_h(op), *gp.security_f(op)))
+    return np.array(values).T
+
+
+def evaluate_gears(Z1, x1, Z2, x2, m, b, backend):
+    steel = get_material('steel')
+    kin = kernels.gear_pair_kinematics(Z1, x1, Z2, x2, m, backend=backend)
+    sec = kernels.gear_pair_security(Z1, x1, Z2, x2, m, b, kin[4], kin[1],
+                                     steel, steel, backend=backend)
+    return np.array(kin + sec)
+
+
+def test_numpy_backend_matches_models(gear_pairs):
+    expected = reference_gear_values(*gear_pairs)
+    values = evaluate_gears(*gear_pairs, 'numpy')
+    assert np.allclose(values, expected, rtol=1e-7, atol=1e-9)
+
+
+def test_numba_backend_matches_numpy(gear_pairs):
+    pytest.importorskip("numba")
+    values = evaluate_gears(*gear_pairs, 'numba')
+    assert np.allclose(values, evaluate_gears(*gear_pairs, 'numpy'),
+                       rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "numba"])
+def test_stepper_kernel(backend):
+    if backend == "numba":
+        pytest.importorskip("numba")
+    speeds = np.linspace(0., 400., 7)
+    for name in motor_names:
+        s = get_stepper(name, 0.7, 1.3)
+        d = s.motor
+        out = kernels.stepper_speed_torque(
+            speeds, 12., 2., s.R, s.Nw, d.km0, d.L0, d.Nm, d.Q_fstat,
+            d.Q_fdyn, backend=backend)
+        for k, speed in enumerate(speeds):
+            op = s.get_speed_torque(OperatingCondition(speed, 0, 12., 2.))
+            assert np.allclose((out[0][k], out[1][k], out[2][k]),
+                               (op.speed, op.torque, op.imax))
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setenv("MODACT_BACKEND", "numpy")
+    assert kernels.backend() == "numpy"
+    monkeypatch.delenv("MODACT_BACKEND")
+    assert kernels.backend() in ("numpy", "numba")
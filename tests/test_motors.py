@@ -1,4 +1,9 @@
-from modact.models.motors import get_stepper, motor_names
+import tracemalloc
+
+import attr
+import pytest
+
+from modact.models.motors import get_stepper, motor_data, motor_names, motors
 
 
 def test_get_stepper_with_number():
@@ -14,3 +19,36 @@ def test_get_stepper_configured():
     mot1 = get_stepper(0, 0.5, 1.2)
     assert mot1.fill_factor == 0.5
     assert mot1.r_scale == 1.2
+
+
+def test_shared_motor_records():
+    mot1 = get_stepper(1, 0.5, 1.2)
+    mot2 = get_stepper(1, 0.8, 0.9)
+    assert mot1.motor is mot2.motor is motors[motor_names[1]]
+    assert mot1.R != mot2.R and mot1.Nw != mot2.Nw
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        mot1.motor.RNom = 1.
+    assert not motors.table.flags.writeable
+    assert motors.table['RNom'][1] == motor_data[motor_names[1]]['RNom']
+    assert motors.table['r'][1] == motor_data[motor_names[1]]['mesh']['r']
+    data = mot1.motor_data
+    assert data['R'] == mot1.R
+    assert data['mesh'] == motor_data[motor_names[1]]['mesh']
+    # Changes to the view would be lost, so it is read-only
+    with pytest.raises(TypeError):
+        data['km0'] = 1.
+    with pytest.raises(TypeError):
+        data['mesh']['r'] = 1.
+
+
+def test_stepper_allocations():
+    get_stepper(0)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    steppers = [get_stepper(k % 5, 0.5, 1.1) for k in range(1000)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, 'filename'))
+    # The motor properties are not copied (about 630 bytes per stepper
+    # with a copy of the motor data)
+    assert size/len(steppers) < 400
@@ -0,0 +1,73 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import modact.problems as pb
+from modact.archive import EvaluationArchive
+
+MPI = pytest.importorskip("mpi4py.MPI")
+
+from modact.mpi import MPIEvaluator  # noqa: E402
+
+
+def random_designs(problem, n, seed=0):
+    lb, ub = problem.bounds()
+    return lb + np.random.default_rng(seed).random((n, len(lb)))*(ub - lb)
+
+
+def test_single_rank(tmp_path):
+    problem = pb.get_problem('cs1')
+    X = random_designs(problem, 5)
+    archive = EvaluationArchive.for_problem(str(tmp_path / 'a.bin'), problem)
+    evaluator = MPIEvaluator(problem, MPI.COMM_SELF, archive)
+    assert evaluator.start()
+    F, G = evaluator.evaluate(X)
+    evaluator.close()
+    for x, f, g in zip(X, F, G):
+        f_s, g_s = problem(x)
+        assert np.allclose(f, f_s)
+        assert np.allclose(g, g_s)
+    assert len(archive) == 5
+    assert np.allclose(archive.X, X)
+
+
+def test_failed_evaluation():
+    problem = pb.get_problem('cs1')
+    evaluator = MPIEvaluator(problem, MPI.COMM_SELF)
+    evaluator.submit(np.zeros(3))
+    with pytest.raises(RuntimeError):
+        evaluator.next_result()
+
+    # The other designs of a failed evaluation are not returned later
+    X = random_designs(problem, 4)
+    bad = list(X[:2]) + [np.zeros(3)] + list(X[2:])
+    with pytest.raises(RuntimeError):
+        evaluator.evaluate(bad)
+    assert evaluator.n_pending == 0
+    F, G = evaluator.evaluate(X[::-1])
+    F_s, G_s = problem.evaluate_chunk(X[::-1])
+    assert np.allclose(F, F_s)
+    assert np.allclose(G, G_s)
+    with pytest.raises(RuntimeError):
+        evaluator.next_result()
+
+
+@pytest.mark.skipif(shutil.which('mpirun') is None, reason="requires mpirun")
+def test_mpirun(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    env = dict(os.environ, OMPI_ALLOW_RUN_AS_ROOT='1',
+               OMPI_ALLOW_RUN_AS_ROOT_CONFIRM='1',
+               OMPI_MCA_rmaps_base_oversubscribe='1')
+    subprocess.run(['mpirun', '-n', '4', sys.executable, '-m', 'modact.mpi',
+                    'cs1', '20', path], check=True, env=env, timeout=300,
+                   cwd=os.path.dirname(os.path.dirname(__file__)))
+    archive = EvaluationArchive(path)
+    assert len(archive) == 20
+    problem = pb.get_problem('cs1')
+    X = random_designs(problem, 20)
+    order = np.lexsort(archive.X.T)
+    assert np.allclose(archive.X[order], X[np.lexsort(X.T)])
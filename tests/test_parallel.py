@@ -0,0 +1,49 @@
+import threading
+
+import numpy as np
+
+import modact.problems as pb
+from modact.models import cached_property
+from modact.parallel import ThreadPoolEvaluator
+
+
+def test_thread_pool_matches_serial():
+    problem = pb.get_problem('cts3')
+    lb, ub = problem.bounds()
+    rng = np.random.default_rng(0)
+    X = lb + rng.random((12, len(lb)))*(ub - lb)
+    with ThreadPoolEvaluator(problem, 4) as evaluator:
+        F, G = evaluator(X)
+    assert F.shape == (12, 3)
+    assert G.shape == (12, 10)
+    for x, f, g in zip(X, F, G):
+        f_s, g_s = problem(x)
+        assert np.allclose(f, f_s)
+        assert np.allclose(g, g_s)
+
+
+def test_thread_safe_cached_property():
+    class Slow(object):
+        calls = 0
+
+        @cached_property
+        def value(self):
+            Slow.calls += 1
+            return object()
+
+    obj = Slow()
+    barrier = threading.Barrier(8)
+    seen = []
+
+    def read():
+        barrier.wait()
+        seen.append(obj.value)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(seen) == 8
+    assert all(v is seen[0] for v in seen)
+    assert obj.value is seen[0]
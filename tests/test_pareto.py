@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import modact.problems as pb
+from modact.pareto import ParetoArchive, non_dominated_mask
+
+
+def test_non_dominated_mask():
+    F = np.array([[1., 2.], [2., 1.], [2., 2.], [0.5, 3.], [1., 2.]])
+    assert non_dominated_mask(F).tolist() == [True, True, False, True, True]
+
+
+@pytest.mark.parametrize("n_obj", [2, 3, 5])
+def test_incremental_front(n_obj):
+    rng = np.random.default_rng(n_obj)
+    F = rng.random((400, n_obj))
+    if n_obj == 2:
+        # Rounded values to exercise ties and duplicates
+        F = np.round(F, 1)
+    archive = ParetoArchive(n_obj)
+    for i, f in enumerate(F):
+        archive.add(f, x=i)
+    assert archive.feasible
+    assert archive.n_added == 400
+    assert sorted(archive.X) == np.flatnonzero(non_dominated_mask(F)).tolist()
+    assert archive.F.shape == (len(archive), n_obj)
+
+
+def test_constrained_dominance():
+    archive = ParetoArchive(2)
+    assert archive.add([0., 0.], [2.], x=0)
+    assert archive.add([1., 1.], [1.], x=1)
+    assert not archive.add([0., 0.], [1.5], x=2)
+    assert archive.X.tolist() == [1]
+    assert not archive.feasible
+    assert archive.add([2., 2.], [0.], x=3)
+    assert archive.feasible
+    assert archive.add([1., 3.], [-1.], x=4)
+    assert not archive.add([0., 0.], [0.5], x=5)
+    assert sorted(archive.X) == [3, 4]
+    mask = archive.add_batch(np.array([[3., 3.], [0., 5.]]),
+                             np.array([[-1.], [-1.]]))
+    assert mask.tolist() == [False, True]
+
+
+def test_problem_weights():
+    problem = pb.get_problem('cs1')
+    archive = ParetoArchive.for_problem(problem)
+    # cost is minimized, safety maximized
+    assert archive.add((1., 2.), (0,)*7)
+    assert not archive.add((2., 1.), (0,)*7)
+    assert archive.add((2., 3.), (0,)*7)
+    assert np.array_equal(archive.F, [[1., -2.], [2., -3.]])
+    # c_weights = -1: g >= 0 is feasible
+    assert not archive.add((0., 5.), (-1,) + (0,)*6)
@@ -1,9 +1,209 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+import pytest
+import scipy.stats
 
 import modact.problems as pb
+from modact.models import OperatingCondition
 
 
 def test_abstract_problems():
     p = pb.Problem("abstract", pb.op_set_2, pb.Objectives(), pb.Constraints(), 2)
     lb, ub = p.bounds()
     assert len(lb) == len(ub) == 14
+
+
+def test_fidelity_parsing():
+    p = pb.get_problem('cs3')
+    assert p.fidelity == 'full'
+    p = pb.get_problem('cs3@low')
+    assert p.fidelity == 'low'
+    assert p.name == 'cs3@low'
+    with pytest.raises(NotImplementedError):
+        pb.get_problem('cs3@medium')
+
+
+def test_low_fidelity_correlation():
+    """Low fidelity (coarse hull, analytic collisions and bounding box) is
+    strongly correlated with full fidelity: the objectives differ only by
+    the hull cost and the geometric constraints agree on feasibility for
+    almost all designs."""
+    full = pb.get_problem('cs5')
+    low = pb.get_problem('cs5@low')
+    lb, ub = full.bounds()
+    rng = np.random.default_rng(0)
+    X = lb + rng.random((60, len(lb)))*(ub - lb)
+    F_full, G_full = zip(*[full(x) for x in X])
+    F_low, G_low = zip(*[low(x) for x in X])
+    F_full, F_low = np.array(F_full), np.array(F_low)
+    G_full, G_low = np.array(G_full), np.array(G_low)
+
+    assert np.corrcoef(F_full[:, 0], F_low[:, 0])[0, 1] > 0.999
+    assert np.allclose(F_full[:, 1], F_low[:, 1])
+    assert np.allclose(G_full[:, :7], G_low[:, :7])
+    for k in range(7, G_full.shape[1]):
+        assert np.corrcoef(G_full[:, k], G_low[:, k])[0, 1] > 0.99
+        assert np.mean((G_full[:, k] > 0) == (G_low[:, k] > 0)) > 0.95
+
+    # Fidelity can be switched on an existing problem
+    low.fidelity = 'full'
+    f, g = low(X[0])
+    assert np.allclose(f, F_full[0])
+    assert np.allclose(g, G_full[0])
+
+
+def test_staged_evaluation():
+    full = pb.get_problem('cs3')
+    lb, ub = full.bounds()
+    rng = np.random.default_rng(1)
+    X = lb + rng.random((10, len(lb)))*(ub - lb)
+
+    # Without skipping, staged evaluation gives the same results
+    staged = pb.get_problem('cs3', screening=pb.Screening(margin=np.inf))
+    for x in X:
+        f, g = full(x)
+        f_s, g_s = staged(x)
+        assert np.allclose(f, f_s)
+        assert np.allclose(g, g_s)
+
+    screened = pb.get_problem('cs3', screening=pb.Screening(penalty=2.))
+    w = np.array(screened.c_weights)
+    stages = np.array(screened.constraints.stages)
+    for x in X:
+        _, g = full(x)
+        _, g_s = screened(x)
+        g, g_s = np.array(g), np.array(g_s)
+        kinematic = (stages == 'kinematic') | (stages == 'torque')
+        assert np.allclose(g[kinematic], g_s[kinematic])
+        skipped = ~np.isclose(g, g_s)
+        observed = np.maximum(g_s[~skipped]*w[~skipped], 0).sum()
+        assert np.allclose(g_s[skipped]*w[skipped], 2. + observed)
+        # Skipped constraints only make the design look more infeasible
+        assert np.maximum(g_s*w, 0).sum() > 0
+
+
+def test_screening_ranking():
+    full = pb.get_problem('cs3')
+    screened = pb.get_problem('cs3', screening=pb.Screening(margin=1.))
+    w = np.array(full.c_weights)
+    lb, ub = full.bounds()
+    X = lb + np.random.default_rng(5).random((40, len(lb)))*(ub - lb)
+    _, G = full.evaluate_chunk(X)
+    _, G_s = screened.evaluate_chunk(X)
+    V = np.maximum(G*w, 0).sum(axis=1)
+    V_s = np.maximum(G_s*w, 0).sum(axis=1)
+    skipped = ~np.isclose(G, G_s).all(axis=1)
+    assert 0 < skipped.sum() < len(X)
+    # Never better than the real violation
+    assert np.all(V_s >= V - 1e-12)
+    assert np.allclose(V_s[~skipped], V[~skipped])
+    # Skipped designs rank after all the evaluated ones
+    assert V_s[skipped].min() > V_s[~skipped].max()
+    assert V_s[skipped].min() > V.max()
+
+
+def test_iter_evaluate():
+    p = pb.get_problem('ct1')
+    lb, ub = p.bounds()
+    X = lb + np.random.default_rng(0).random((23, len(lb)))*(ub - lb)
+    F, G = p.evaluate_chunk(X)
+    consumed = []
+
+    def designs():
+        for x in X:
+            consumed.append(1)
+            yield x
+
+    blocks = p.iter_evaluate(designs(), chunk_size=5)
+    X_b, F_b, G_b = next(blocks)
+    # Designs are consumed lazily
+    assert len(consumed) == 5
+    blocks = [(X_b, F_b, G_b)] + list(blocks)
+    assert [len(b[0]) for b in blocks] == [5, 5, 5, 5, 3]
+    assert np.allclose(np.vstack([b[1] for b in blocks]), F)
+    assert np.allclose(np.vstack([b[2] for b in blocks]), G)
+
+    with ThreadPoolExecutor(2) as executor:
+        ordered = list(p.iter_evaluate(X, 4, executor, max_pending=2))
+        unordered = list(p.iter_evaluate(X, 4, executor, ordered=False,
+                                         max_pending=4))
+        with pytest.raises(ValueError):
+            next(p.iter_evaluate(X, 4, executor))
+    assert np.allclose(np.vstack([b[0] for b in ordered]), X)
+    assert np.allclose(np.vstack([b[1] for b in ordered]), F)
+    X_u = np.vstack([b[0] for b in unordered])
+    F_u = np.vstack([b[1] for b in unordered])
+    assert np.allclose(F_u[np.lexsort(X_u.T)], F[np.lexsort(X.T)])
+
+
+def test_duty_cycle():
+    cycle = pb.DutyCycle.from_conditions(pb.op_set_2)
+    assert list(cycle) == pb.op_set_2
+    rng = np.random.default_rng(1)
+    for name in ('ctsei3', 'cs4s2@low'):
+        p = pb.get_problem(name)
+        d = pb.get_duty_cycle_problem(name, cycle)
+        lb, ub = p.bounds()
+        for x in lb + rng.random((5, len(lb)))*(ub - lb):
+            f1, g1 = p(x)
+            f2, g2 = d(x)
+            assert np.allclose(f1, f2, rtol=1e-12, atol=0)
+            assert np.allclose(g1, g2, rtol=1e-12, atol=0)
+
+    # Dense cycle: same results as the conditions one at a time
+    n = 200
+    cycle = pb.DutyCycle(np.linspace(0.3, 1.8, n), np.linspace(1.2, 0.6, n),
+                         V=9, imax=2.)
+    p = pb.get_problem('ctse1')
+    x = np.mean(p.bounds(), axis=0)
+    for aggregation in (None,) + pb.AGGREGATIONS:
+        d = pb.get_duty_cycle_problem('ctse1', cycle, aggregation)
+        ref = pb.Problem('ref', list(cycle), d.objectives, d.constraints, 3)
+        f1, g1 = d(x)
+        f2, g2 = ref(x)
+        assert np.allclose(f1, f2, rtol=1e-12, atol=0)
+        assert np.allclose(g1, g2, rtol=1e-12, atol=0)
+
+    cycle = pb.DutyCycle(cycle.speed, cycle.torque, 9, 2.,
+                         weights=np.linspace(1, 2, n))
+    assert cycle.weights.sum() == pytest.approx(1)
+    d = pb.get_duty_cycle_problem('ctse1', cycle, 'weighted')
+    actuator, output, t_err, _, resistance = d.prepare(x)
+    assert resistance.shape == (3, n, 4)
+    assert d.objectives(actuator, output, t_err, None, resistance)[1] == \
+        pytest.approx(np.average(t_err, weights=cycle.weights))
+    with pytest.raises(ValueError):
+        pb.CTS('mean')
+
+
+def test_batch_objectives():
+    values = np.random.default_rng(2).random((3, 4, 2, 2)) + 0.1
+    assert pb.hmean(values) == pytest.approx(scipy.stats.hmean(values, None),
+                                             rel=1e-14)
+    assert np.allclose(pb.hmean(values, axis=(1, 2)),
+                       scipy.stats.hmean(values.reshape(3, 8, 2), axis=1))
+    assert pb.hmean([1., 0.]) == 0
+
+    rng = np.random.default_rng(3)
+    for name in ('ctsei3', 'cs2', 'cts1'):
+        p = pb.get_problem(name)
+        lb, ub = p.bounds()
+        X = lb + rng.random((8, len(lb)))*(ub - lb)
+        F, G = p.evaluate_chunk(X)
+        prepared = [p.prepare(x) for x in X]
+        actuators, outputs, t_err, kinematic, resistance = zip(*prepared)
+        output = OperatingCondition(
+            *(np.array([[getattr(op, f) for op in out] for out in outputs])
+              for f in ('speed', 'torque', 'V', 'imax')))
+        cost = np.array([sum(a.cost(True)) for a in actuators])
+        i_gp = np.array([a.i_gp for a in actuators])
+        F_b = p.objectives.batch(cost, output, np.array(t_err),
+                                 np.array(kinematic), np.array(resistance),
+                                 i_gp)
+        geometric = np.array([p.constraints.geometric_constraints(a)
+                              for a in actuators]).reshape(len(X), -1)
+        G_b = p.constraints.batch(np.array(t_err), np.array(kinematic),
+                                  np.array(resistance), geometric.T)
+        assert np.allclose(F_b, F, rtol=1e-12, atol=0)
+        assert np.allclose(G_b, G, rtol=1e-12, atol=0)
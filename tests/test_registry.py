@@ -0,0 +1,121 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import attr
+import numpy as np
+import pytest
+
+from modact.materials import Material, materials, validate_material
+from modact.models.motors import MotorRecord, motor_data, validate_motor
+from modact.registry import Registry
+
+FIELDS = ('L0', 'Nm', 'NwNom', 'RNom', 'km0', 'Q_fstat', 'Q_fdyn', 'cb', 'ca',
+          'r', 'h')
+
+
+def catalogue_rows(n):
+    rows = []
+    for k in range(n):
+        row = dict(motor_data['A'], name='M{:03d}'.format(k))
+        row.update(row.pop('mesh'))
+        row['RNom'] = 10. + k
+        rows.append(row)
+    return rows
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, ['name', *FIELDS])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_bulk_loading(tmp_path):
+    rows = catalogue_rows(300)
+    write_csv(str(tmp_path / 'motors.csv'), rows[:100])
+    with open(str(tmp_path / 'motors.json'), 'w') as f:
+        json.dump({row.pop('name'): row for row in rows[100:200]}, f)
+    rows = catalogue_rows(300)[200:]
+    np.savez(str(tmp_path / 'motors.npz'),
+             **{key: [row[key] for row in rows] for key in rows[0]})
+
+    registry = Registry(MotorRecord, validate=validate_motor)
+    for ext in ('csv', 'json', 'npz'):
+        registry.load(str(tmp_path / 'motors.{}'.format(ext)))
+    assert len(registry) == 300
+    assert registry.index('M150') == 150
+    assert registry[150] is registry['M150']
+    assert registry['M150'].RNom == 160.
+    assert all(type(registry[k].Nm) is int for k in range(len(registry)))
+    assert np.array_equal(registry.table['RNom'], 10. + np.arange(300))
+    assert not registry.table.flags.writeable
+
+    # New records are appended
+    registry.register(dict(motor_data['B'], name='B'))
+    assert registry.index('B') == 300
+    assert registry.table['RNom'][300] == motor_data['B']['RNom']
+
+
+def test_validation(tmp_path):
+    registry = Registry(MotorRecord, validate=validate_motor)
+    row = catalogue_rows(1)[0]
+    registry.register(row)
+    with pytest.raises(ValueError):
+        registry.register(row)
+    registry.register(dict(row, RNom=5.), replace=True)
+    assert registry[0].RNom == 5.
+    for invalid in (dict(row, name='x', RNom=-1.),
+                    dict(row, name='x', h=float('nan')),
+                    dict(row, name='x', Nm=5.5)):
+        with pytest.raises(ValueError):
+            registry.register(invalid)
+    missing = dict(row, name='x')
+    del missing['km0']
+    with pytest.raises(ValueError):
+        registry.register(missing)
+    steel = dict(attr.asdict(materials['steel']), name='x', E=0.)
+    with pytest.raises(ValueError):
+        Registry(Material, validate=validate_material).register(steel)
+    assert len(registry) == 1
+
+
+def test_lazy_loading(tmp_path):
+    path = str(tmp_path / 'motors.csv')
+    write_csv(path, catalogue_rows(3))
+    registry = Registry(MotorRecord, validate=validate_motor)
+    registry.add_source(path)
+    names = registry.names
+    assert registry._names == []
+    # Every access loads the pending sources first
+    assert 'M001' in names
+    assert len(registry._names) == 3
+    for check in (lambda: names == ['M000', 'M001', 'M002'],
+                  lambda: list(names) == ['M000', 'M001', 'M002'],
+                  lambda: bool(names), lambda: names.index('M002') == 2,
+                  lambda: len(names) == 3, lambda: names[2] == 'M002'):
+        registry = Registry(MotorRecord, validate=validate_motor)
+        registry.add_source(path)
+        names = registry.names
+        assert check()
+
+
+def test_environment_catalogue(tmp_path):
+    path = str(tmp_path / 'motors.csv')
+    write_csv(path, catalogue_rows(20))
+    script = (
+        "import modact.problems as pb\n"
+        "from modact.models.motors import motor_names\n"
+        "p = pb.get_problem('cs1')\n"
+        "lb, ub = p.bounds()\n"
+        "assert len(motor_names) == 25, len(motor_names)\n"
+        "assert ub[0] == 25 - 1e-6\n"
+        "x = (lb + ub)/2\n"
+        "x[0] = 24.5\n"
+        "f, g = p(x)\n"
+        "assert len(f) == 2\n")
+    env = dict(os.environ, MODACT_MOTORS=path)
+    subprocess.run([sys.executable, '-c', script], check=True, env=env,
+                   cwd=os.path.dirname(os.path.dirname(__file__)))
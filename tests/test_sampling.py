@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pytest
+
+import modact.problems as pb
+from modact.codec import Codec
+from modact.models.kernels import gear_pair_kinematics
+from modact.sampling import (DesignSampler, aim_output, cheap_constraints,
+                             cheap_violation, layout)
+from modact.util import create_actuator_from_x
+
+
+def random_designs(problem, n, seed=0):
+    lb, ub = problem.bounds()
+    return lb + np.random.default_rng(seed).random((n, len(lb)))*(ub - lb)
+
+
+def alpha_p(designs):
+    s = designs['stages']
+    return gear_pair_kinematics(s['Z1'], s['x1'], s['Z2'], s['x2'])[4]
+
+
+def test_layout():
+    X = random_designs(pb.get_problem('cs3'), 10)
+    designs = Codec(3).decode(X)
+    centers, radius, height = layout(designs, alpha_p(designs))
+    for k, x in enumerate(X):
+        actuator = create_actuator_from_x(x, 3, True, 'low')
+        c, r, h = actuator.cylinders()
+        assert np.allclose(centers[k], c)
+        assert np.allclose(radius[k], r)
+        assert np.allclose(height[k], h)
+
+
+@pytest.mark.parametrize('name', ['cts1', 'cs2', 'cs3', 'ctsei4s2', 'cs5'])
+def test_cheap_constraints(name):
+    problem = pb.get_problem(name + '@low')
+    X = random_designs(problem, 20)
+    G = cheap_constraints(problem, X)
+    for x, g in zip(X, G):
+        _, g_ref = problem(x)
+        assert np.allclose(g, g_ref, rtol=1e-6, atol=1e-8)
+
+
+def test_aim_output():
+    problem = pb.get_problem('cs4')
+    designs = Codec(3).decode(random_designs(problem, 200))
+    centers, _, _ = layout(aim_output(designs, alpha_p(designs)),
+                           alpha_p(designs))
+    distance = np.linalg.norm(centers[:, -1, :2] - [40., 0.], axis=1)
+    assert np.mean(distance < 1e-6) > 0.3
+
+
+def test_sampler_bank(tmp_path):
+    problem = pb.get_problem('cs1')
+    path = str(tmp_path / 'bank.npy')
+    sampler = DesignSampler(problem, 'sobol', seed=3, batch_size=128,
+                            n_refine=5, path=path)
+    X = sampler.sample(20)
+    assert X.shape == (20, 20)
+    # Read back from the bank
+    assert np.array_equal(sampler.sample(20), X)
+    # Same candidates when the bank is extended
+    first = np.array(sampler.bank(1))
+    assert np.array_equal(sampler.bank(2)[:128], first)
+    assert len(np.load(path)) == 256
+    other = DesignSampler(problem, 'sobol', seed=4, batch_size=128,
+                          n_refine=5, path=str(tmp_path / 'other.npy'))
+    assert not np.array_equal(other.sample(20), X)
+    records = sampler.bank(2)
+    for x in records['x'][records['violation'] == 0][:5]:
+        _, g = problem(x)
+        assert np.all(np.array(g)*problem.c_weights <= 0)
+
+
+def test_sampler_bank_per_problem(tmp_path, monkeypatch):
+    monkeypatch.setenv('MODACT_CACHE', str(tmp_path))
+    paths = {DesignSampler(problem, batch_size=64, n_refine=2).path
+             for problem in (pb.get_problem('cs1'),
+                             pb.get_problem('cs1', pb.op_set_1),
+                             pb.build_problem('cs1', pb.CS(), pb.C1(min_t=1.)),
+                             pb.get_problem('cs1s2'))}
+    assert len(paths) == 4
+    # Same bank for the same problem
+    assert (DesignSampler(pb.get_problem('cs1')).path ==
+            DesignSampler(pb.get_problem('cs1')).path)
+
+    # The bank of a problem is not used for the same name with other
+    # operating conditions
+    a = DesignSampler(pb.get_problem('cs1'), batch_size=64, n_refine=2)
+    b = DesignSampler(pb.get_problem('cs1', pb.op_set_1), batch_size=64,
+                      n_refine=2)
+    a.bank(1)
+    assert not os.path.exists(b.path)
+    records = b.bank(1)
+    assert np.allclose(records['violation'],
+                       cheap_violation(b.problem, records['x']))
+
+
+def test_sampler_methods():
+    problem = pb.get_problem('cs4')
+    lb, ub = problem.bounds()
+    for method in ('lhs', 'sobol', 'uniform'):
+        sampler = DesignSampler(problem, method, batch_size=64, n_refine=2)
+        X = sampler.sample(10, cache=False)
+        assert np.all((X >= lb) & (X <= ub))
+    with pytest.raises(ValueError):
+        DesignSampler(problem, 'grid')
@@ -0,0 +1,69 @@
+import numpy as np
+
+from modact.surrogate import (SurrogatePolicy, SurrogateProblem,
+                              get_surrogate_problem)
+
+
+class LinearProblem(object):
+    """Cheap problem with a half-space constraint g = x0 - 0.5 <= 0"""
+    name = 'linear'
+    weights = (-1, -1)
+    c_weights = (1,)
+    n_stages = 0
+
+    def __init__(self):
+        self.n_calls = 0
+
+    def bounds(self):
+        return np.zeros(2), np.ones(2)
+
+    def __call__(self, x):
+        self.n_calls += 1
+        return (x[0], x[1]), (x[0] - 0.5,)
+
+
+def test_surrogate_avoids_infeasible_designs():
+    problem = LinearProblem()
+    policy = SurrogatePolicy(min_samples=20, refresh=5, margin=0.1,
+                             max_distance=0.2)
+    sp = SurrogateProblem(problem, policy)
+    rng = np.random.default_rng(1)
+    for x in rng.random((20, 2)):
+        sp(x)
+    assert sp.trusted
+    assert sp.n_fits == 1
+    assert sp.stats['n_avoided'] == 0
+
+    f, g = sp(np.array([0.95, 0.5]))
+    assert sp.n_avoided == 1
+    assert problem.n_calls == 20
+    assert abs(g[0] - 0.45) < 0.05
+
+    # Promising designs are always evaluated
+    sp(np.array([0.1, 0.5]))
+    assert problem.n_calls == 21
+    assert sp.stats['n_calls'] == 22
+
+
+def test_surrogate_refresh_policy():
+    problem = LinearProblem()
+    policy = SurrogatePolicy(min_samples=10, refresh=5, max_samples=12,
+                             margin=np.inf)
+    sp = SurrogateProblem(problem, policy)
+    rng = np.random.default_rng(2)
+    for x in rng.random((20, 2)):
+        sp(x)
+    assert sp.n_true == 20
+    assert sp.n_fits == 3
+    assert len(sp._X) == 12
+
+
+def test_surrogate_problem_interface():
+    sp = get_surrogate_problem('cs1', SurrogatePolicy(min_samples=5))
+    assert sp.name == 'cs1'
+    assert sp.weights == (-1, 1)
+    lb, ub = sp.bounds()
+    f, g = sp(lb + 0.5*(ub - lb))
+    assert len(f) == 2
+    assert len(g) == len(sp.c_weights)
+    assert isinstance(f, tuple)
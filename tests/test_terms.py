@@ -0,0 +1,77 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import modact.problems as pb
+from modact.terms import QUANTITIES, Term
+
+
+def volume(objectives, actuator):
+    return (actuator.volume,)
+
+
+VOLUME = Term('volume', volume, ('actuator',), (-1,))
+
+
+def test_benchmark_terms():
+    rng = np.random.default_rng(0)
+    custom = pb.build_problem(
+        'custom', ['cost', 'torque', 'security', 'efficiency'],
+        ['kinematic', 'resistance', 'torque', 'collisions', 'output'], 2)
+    p = pb.get_problem('ctse4s2')
+    assert custom.weights == p.weights == pb.CTSE().weights
+    assert custom.c_weights == p.c_weights
+    assert custom.constraints.stages == p.constraints.stages
+    assert custom.constraints.min_t == p.constraints.min_t
+    lb, ub = p.bounds()
+    for x in lb + rng.random((5, len(lb)))*(ub - lb):
+        f1, g1 = p(x)
+        f2, g2 = custom(x)
+        assert np.array_equal(f1, f2)
+        assert np.array_equal(g1, g2)
+
+    # Class-level weights of the benchmark definitions
+    assert pb.CS.weights == (-1, 1)
+    assert pb.CTSEI.weights == (-1, 1, 1, 1, -1)
+    assert pb.C1.weights == (-1,)*7
+    assert pb.C2.weights == pb.C1.weights + (1,)
+    assert pb.C5.weights == pb.C2.weights + (1, 1, 1)
+    assert pb.Objectives(terms=['cost', VOLUME]).weights == (-1, -1)
+    assert pb.Objectives.weights == ()
+
+    for name in ('cse1', 'ct6', 'ct1s', 'cts1s0', 'ctsi1'):
+        with pytest.raises(NotImplementedError):
+            pb.get_problem(name)
+
+
+def test_required_quantities(monkeypatch):
+    p = pb.get_problem('cs1')
+    assert 'mesh' in p.requires and 'collisions' not in p.requires
+    assert 'extents' in pb.get_problem('cs3').requires
+
+    p = pb.build_problem('light', ['component_cost', 'torque', VOLUME],
+                         ['kinematic', 'resistance', 'torque'])
+    assert p.constraints.min_t == pytest.approx(0.599)
+    assert 'mesh' not in p.requires
+    x = np.mean(p.bounds(), axis=0)
+    q = p.quantities(x)
+    f, g = p.objectives.evaluate(q), p.constraints.evaluate(q)
+    assert set(q.values) == set(p.requires)
+    assert 'mesh' not in q['actuator'].__dict__
+    assert f[0] == sum(q['actuator'].cost())
+    assert f[2] == q['actuator'].volume
+    assert np.allclose(g, pb.get_problem('ct1')(x)[1])
+
+    # Each quantity is computed once
+    calls = []
+    resistance = QUANTITIES['resistance']
+    monkeypatch.setitem(QUANTITIES, 'resistance', resistance.__class__(
+        'resistance', lambda *args: calls.append(1) or resistance.func(*args),
+        resistance.requires))
+    pb.get_problem('cts2')(x)
+    assert len(calls) == 1
+
+    p = pickle.loads(pickle.dumps(pb.build_problem(
+        'light', ['component_cost', VOLUME], ['torque'])))
+    assert p(x)[0][1] == q['actuator'].volume